@@ -0,0 +1,197 @@
+"""
+Micro-benchmark: intent engine vs. the original keyword scans.
+
+Times per-message cost of `utils.intents` against a verbatim copy of the
+original `/conversation` and `/ask-about-idea` keyword logic, on short
+utterances and long voice transcripts, and checks both agree on every input.
+Also times a transcript arriving word by word as partial results: one
+analyze_message() per partial vs. one TranscriptAnalyzer fed every partial.
+
+Run from backend/:
+    python -m bench.bench_intents [--repeat 200]
+"""
+
+import argparse
+import random
+import re
+import time
+from typing import Optional
+
+from utils.intents import TranscriptAnalyzer, analyze_message, classify_question
+
+# -----------------------------------------------------------------------------
+# original implementations (reference only)
+# -----------------------------------------------------------------------------
+def legacy_classify_question(question: str) -> str:
+    q = question.lower()
+    if "how" in q or "implement" in q:
+        return "implement"
+    elif "why" in q or "benefit" in q or "important" in q:
+        return "value"
+    elif "who" in q or "target" in q or "user" in q:
+        return "audience"
+    elif "what" in q and ("next" in q or "step" in q):
+        return "next_steps"
+    elif "challenge" in q or "problem" in q or "difficulty" in q:
+        return "challenges"
+    elif "cost" in q or "expensive" in q or "budget" in q:
+        return "cost"
+    return "general"
+
+
+def legacy_reply_intent(message: str) -> Optional[str]:
+    m = message.lower()
+    if any(w in m for w in ['hello', 'hi', 'hey']):
+        return "greeting"
+    if any(w in m for w in ['idea', 'thinking about', 'want to', 'thought']):
+        return "idea"
+    if any(w in m for w in ['problem', 'challenge', 'issue', 'struggling']):
+        return "problem"
+    if any(w in m for w in ['how', 'implement', 'build', 'create', 'make']):
+        return "implement"
+    if any(w in m for w in ['yes', 'sure', 'okay', 'ok', 'yeah', 'yep']):
+        return "agree"
+    if any(w in m for w in ['more', 'elaborate', 'explain', 'tell me']):
+        return "more"
+    return None
+
+
+def legacy_analyze(message: str):
+    message_lower = message.lower()
+    extracted_topic = None
+    extracted_name = None
+    name_patterns = [
+        r"(?:my name is|i'm|i am|call me|this is)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+        r"^([A-Z][a-z]+)\s+(?:here|speaking)"
+    ]
+    for pattern in name_patterns:
+        match = re.search(pattern, message, re.IGNORECASE)
+        if match:
+            extracted_name = match.group(1).strip()
+            break
+    idea_keywords = ['idea', 'thinking about', 'want to', 'problem', 'challenge', 'trying to', 'explore']
+    if any(keyword in message_lower for keyword in idea_keywords):
+        sentences = re.split(r'[.!?]+', message)
+        for sentence in sentences:
+            sentence = sentence.strip()
+            if len(sentence) > 20 and any(keyword in sentence.lower() for keyword in idea_keywords):
+                sentence_lower = sentence.lower()
+                for phrase in ['i have an idea for', 'i want to', "i'm thinking about", 'i am thinking about']:
+                    sentence_lower = sentence_lower.replace(phrase, '').strip()
+                if sentence_lower and len(sentence_lower) > 10:
+                    extracted_topic = sentence_lower.capitalize()[:100]
+                    break
+    if not extracted_topic and len(message) > 30:
+        cleaned = message_lower
+        for word in ['hello', 'hi', 'hey', 'my name is', "i'm", 'i am', 'call me']:
+            cleaned = cleaned.replace(word, '', 1)
+        cleaned = cleaned.strip()
+        if len(cleaned) > 15:
+            extracted_topic = cleaned.capitalize()[:100]
+    return legacy_reply_intent(message), extracted_name, extracted_topic
+
+
+# -----------------------------------------------------------------------------
+# workload
+# -----------------------------------------------------------------------------
+FILLER = (
+    "so um basically we were talking at lunch about the cafeteria and how much "
+    "food ends up in the bins every single day and nobody really tracks it"
+).split()
+PHRASES = [
+    "Hi, my name is Jordan Park.",
+    "I have an idea for reducing plastic waste at festivals.",
+    "The problem is vendors hand out single use cups.",
+    "Maybe we could build a deposit system?",
+    "Yeah okay, tell me more.",
+    "I'm thinking about how students could run it.",
+]
+QUESTIONS = [
+    "How would we implement this?",
+    "Why does this matter?",
+    "Who is the target user?",
+    "What are the next steps?",
+    "What challenges should we expect?",
+    "How expensive is it?",
+    "Is this original?",
+]
+
+
+def make_transcript(rng: random.Random, words: int) -> str:
+    parts = []
+    while sum(len(p.split()) for p in parts) < words:
+        if rng.random() < 0.2:
+            parts.append(rng.choice(PHRASES))
+        else:
+            parts.append(" ".join(rng.choice(FILLER) for _ in range(rng.randint(6, 18))) + ".")
+    return " ".join(parts)
+
+
+def partials(text: str):
+    words = text.split(" ")
+    return [" ".join(words[:i]) for i in range(1, len(words) + 1)]
+
+
+def rescan_partials(parts) -> tuple:
+    for part in parts:
+        analysis = analyze_message(part)
+    return analysis
+
+
+def incremental_partials(parts) -> tuple:
+    analyzer = TranscriptAnalyzer()
+    for part in parts:
+        analyzer.update(part)
+        analyzer.decided()
+    return analyzer.result()
+
+
+def timeit(fn, inputs, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in inputs:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(inputs)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    workloads = {
+        "short utterance": PHRASES,
+        "transcript 200w": [make_transcript(rng, 200) for _ in range(20)],
+        "transcript 2000w": [make_transcript(rng, 2000) for _ in range(5)],
+    }
+
+    for label, inputs in workloads.items():
+        for text in inputs:
+            assert analyze_message(text) == legacy_analyze(text), text
+    for question in QUESTIONS:
+        assert classify_question(question) == legacy_classify_question(question), question
+
+    print(f"{'workload':<20}{'legacy µs':>12}{'engine µs':>12}{'speedup':>10}")
+    for label, inputs in workloads.items():
+        repeat = max(1, args.repeat // max(1, len(inputs[0]) // 200))
+        legacy = timeit(legacy_analyze, inputs, repeat)
+        engine = timeit(analyze_message, inputs, repeat)
+        print(f"{label:<20}{legacy:>12.1f}{engine:>12.1f}{legacy / engine:>9.2f}x")
+    legacy = timeit(legacy_classify_question, QUESTIONS, args.repeat * 10)
+    engine = timeit(classify_question, QUESTIONS, args.repeat * 10)
+    print(f"{'question intent':<20}{legacy:>12.1f}{engine:>12.1f}{legacy / engine:>9.2f}x")
+
+    print(f"\n{'partials':<20}{'rescan ms':>12}{'incr. ms':>12}{'speedup':>10}")
+    for words in (50, 200, 1000):
+        utterances = [partials(make_transcript(rng, words)) for _ in range(3)]
+        for parts in utterances:
+            assert incremental_partials(parts) == analyze_message(parts[-1]), parts[-1]
+        repeat = max(1, args.repeat // words)
+        rescan = timeit(rescan_partials, utterances, repeat) / 1000
+        incremental = timeit(incremental_partials, utterances, repeat) / 1000
+        print(f"{f'{words} words':<20}{rescan:>12.2f}{incremental:>12.2f}{rescan / incremental:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+Load test: per-endpoint throughput and latency under concurrency.
+
+Drives the API either in-process (httpx ASGITransport, no sockets) or over
+real uvicorn workers, with a closed loop of `--concurrency` clients sending a
+weighted mix of requests:
+
+  brainstorm         short /brainstorm prompts (unique, so cache misses)
+  ask                /ask-about-idea questions
+  conversation       /conversation with a long conversation_history
+  transcript         /conversation with a long voice transcript message
+
+With `--model-latency-ms`, /brainstorm goes through the real model path
+(USE_VERTEX=true, MODEL_BACKEND=http) against stub_model_server.py started
+with that latency. The run then also checks prompt-prefix caching: once
+warmed up, no measured call may resend the system instruction (the stub
+counts calls that carried it), otherwise it exits 1.
+
+Results (throughput, p50/p95/p99 per scenario) are printed and can be saved
+as JSON; `--baseline` compares against a stored run and exits 1 when a
+scenario's p95 or throughput regressed by more than `--tolerance`.
+
+Run from backend/:
+    python -m bench.loadtest --duration 10 --concurrency 32
+    python -m bench.loadtest --mode uvicorn --workers 4 --model-latency-ms 300
+    python -m bench.loadtest --out run.json --baseline bench/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JSON_HEADERS = {"content-type": "application/json"}
+
+MIXES = {
+    "default": {"brainstorm": 4, "ask": 3, "conversation": 2, "transcript": 1},
+    "brainstorm": {"brainstorm": 1},
+    "ask": {"ask": 1},
+    "conversation": {"conversation": 1, "transcript": 1},
+}
+
+TOPICS = [
+    "reducing plastic waste at festivals",
+    "helping remote teams feel connected",
+    "getting students to cook at home",
+    "making city parks safer at night",
+    "cutting food waste in school cafeterias",
+]
+QUESTIONS = [
+    "How would we implement this?",
+    "Why does this matter?",
+    "Who is the target user?",
+    "What are the next steps?",
+    "How expensive is it?",
+]
+FILLER = (
+    "so um basically we were talking at lunch about the cafeteria and how much "
+    "food ends up in the bins every single day and nobody really tracks it"
+).split()
+
+
+# -----------------------------------------------------------------------------
+# payloads
+# -----------------------------------------------------------------------------
+def transcript(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(FILLER) for _ in range(words)) + ". I have an idea for " + rng.choice(TOPICS) + "."
+
+
+def build_pools(seed: int, size: int = 32) -> Dict[str, List[bytes]]:
+    """Pre-encoded bodies for the heavy payloads, so the client stays cheap."""
+    rng = random.Random(seed)
+    conversation = []
+    for _ in range(size):
+        history = [
+            {"type": "user" if i % 2 == 0 else "assistant", "text": transcript(rng, 40)}
+            for i in range(60)
+        ]
+        conversation.append({"message": "Yeah okay, tell me more.", "conversation_history": history})
+    return {
+        "conversation": [json.dumps(body).encode() for body in conversation],
+        "transcript": [
+            json.dumps({"message": transcript(rng, 400), "conversation_history": []}).encode()
+            for _ in range(size)
+        ],
+    }
+
+
+def make_request(scenario: str, rng: random.Random, seq: int, pools: Dict[str, List[bytes]]):
+    """(path, encoded JSON body) for one request of a scenario."""
+    if scenario == "brainstorm":
+        return "/brainstorm", json.dumps({
+            "prompt": f"{rng.choice(TOPICS)} #{seq}",
+            "max_ideas": 8,
+            "personality": rng.choice(["balanced", "analytical", "high_energy"]),
+        }).encode()
+    if scenario == "ask":
+        return "/ask-about-idea", json.dumps({
+            "question": rng.choice(QUESTIONS),
+            "idea_text": f"Run a deposit scheme for reusable cups, variant {seq}",
+            "topic": rng.choice(TOPICS),
+        }).encode()
+    if scenario in pools:
+        return "/conversation", rng.choice(pools[scenario])
+    raise ValueError(f"unknown scenario: {scenario}")
+
+
+# -----------------------------------------------------------------------------
+# servers
+# -----------------------------------------------------------------------------
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url + "/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+def start_uvicorn(app: str, port: int, workers: int, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env},
+    )
+
+
+# -----------------------------------------------------------------------------
+# load loop
+# -----------------------------------------------------------------------------
+async def run_load(client: httpx.AsyncClient, mix: Dict[str, int], concurrency: int, duration: float, seed: int):
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    scenarios, weights = zip(*mix.items())
+    pools = build_pools(seed)
+    deadline = time.perf_counter() + duration
+    counter = iter(range(10 ** 9))
+
+    async def worker(index: int):
+        rng = random.Random(seed + index)
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(scenarios, weights)[0]
+            path, body = make_request(scenario, rng, next(counter), pools)
+            start = time.perf_counter()
+            try:
+                resp = await client.post(path, content=body, headers=JSON_HEADERS)
+                ok = resp.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            elapsed = time.perf_counter() - start
+            if ok:
+                latencies[scenario].append(elapsed)
+            else:
+                errors[scenario] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies, errors, elapsed: float) -> Dict[str, Dict]:
+    report = {}
+    for scenario in sorted(set(latencies) | set(errors)):
+        values = sorted(latencies.get(scenario, []))
+        report[scenario] = {
+            "requests": len(values),
+            "errors": errors.get(scenario, 0),
+            "rps": round(len(values) / elapsed, 1),
+            "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+        }
+    return report
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Human-readable regressions of `report` against `baseline`."""
+    regressions = []
+    for scenario, base in baseline.get("scenarios", {}).items():
+        current = report["scenarios"].get(scenario)
+        if current is None:
+            continue
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{scenario}: p95 {current['p95_ms']} ms vs baseline {base['p95_ms']} ms")
+        if base["rps"] and current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{scenario}: {current['rps']} req/s vs baseline {base['rps']} req/s")
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{scenario}: {current['errors']} errors vs baseline {base['errors']}")
+    return regressions
+
+
+def print_report(report: Dict) -> None:
+    print(f"{'scenario':<14}{'reqs':>8}{'errs':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for scenario, row in report["scenarios"].items():
+        print(
+            f"{scenario:<14}{row['requests']:>8}{row['errors']:>6}{row['rps']:>9}"
+            f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+        )
+
+
+def stub_prefix_stats(stub_url: Optional[str]) -> Optional[Dict[str, int]]:
+    """The stub model server's counts of calls that carried or omitted the system instruction."""
+    if stub_url is None:
+        return None
+    return httpx.get(stub_url + "/health", timeout=5.0).json()["prefix"]
+
+
+async def main_async(args) -> Dict:
+    env: Dict[str, str] = {}
+    processes: List[subprocess.Popen] = []
+    stub_url = None
+    prefix = None
+    if args.model_latency_ms is not None:
+        stub_port = free_port()
+        processes.append(start_uvicorn("stub_model_server:app", stub_port, 1, {
+            "STUB_LATENCY_MS": str(args.model_latency_ms),
+            "STUB_JITTER_MS": str(args.model_latency_ms * 0.25),
+        }))
+        stub_url = f"http://127.0.0.1:{stub_port}"
+        wait_ready(stub_url)
+        env.update({"USE_VERTEX": "true", "MODEL_BACKEND": "http", "MODEL_ENDPOINT": f"http://127.0.0.1:{stub_port}"})
+    # One process stands in for many clients: measure capacity, not the rate limiter.
+    env["ADMISSION_RATE"] = os.getenv("ADMISSION_RATE", "0")
+    # Keep runs independent of whatever is on disk.
+    env.setdefault("SESSION_LOG_PATH", os.path.join(BACKEND_DIR, "bench", f".loadtest-{os.getpid()}.db"))
+
+    try:
+        if args.mode == "inprocess":
+            os.environ.update(env)
+            sys.path.insert(0, BACKEND_DIR)
+            from main import app
+
+            transport = httpx.ASGITransport(app=app)
+            client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0)
+        else:
+            port = free_port()
+            processes.append(start_uvicorn("main:app", port, args.workers, env))
+            wait_ready(f"http://127.0.0.1:{port}")
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60.0, limits=limits)
+
+        async with client:
+            if args.warmup:
+                await run_load(client, MIXES[args.mix], args.concurrency, args.warmup, args.seed + 10_000)
+            before = stub_prefix_stats(stub_url)
+            latencies, errors, elapsed = await run_load(client, MIXES[args.mix], args.concurrency, args.duration, args.seed)
+            if before is not None:
+                after = stub_prefix_stats(stub_url)
+                prefix = {name: after[name] - before[name] for name in after}
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(env["SESSION_LOG_PATH"] + suffix)
+            except OSError:
+                pass
+
+    return {
+        "meta": {
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "uvicorn" else 1,
+            "concurrency": args.concurrency,
+            "duration_sec": round(elapsed, 2),
+            "mix": args.mix,
+            "model_latency_ms": args.model_latency_ms,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "model_prefix": prefix,
+        },
+        "scenarios": summarize(latencies, errors, elapsed),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn workers (uvicorn mode)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unmeasured load first")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="default")
+    parser.add_argument("--model-latency-ms", type=float, default=None, help="route /brainstorm through a stub model with this latency")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against this JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    prefix = report["meta"]["model_prefix"]
+    if prefix is not None:
+        print(f"model prefix: sent {prefix['received']}, omitted {prefix['omitted']}, misses {prefix['misses']}")
+        if args.warmup and prefix["received"]:
+            print("PREFIX system instruction was resent on measured calls after warmup")
+            return 1
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("mode") != args.mode or baseline.get("meta", {}).get("mix") != args.mix:
+            print("warning: baseline was recorded with a different mode or mix")
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.tolerance:.0%} of baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
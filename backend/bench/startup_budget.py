@@ -0,0 +1,178 @@
+"""
+Startup budget: cold import time and first-request latency of the backend.
+
+Each run is a fresh interpreter that measures, in order:
+
+  framework_import   importing FastAPI/pydantic/Starlette (reference only)
+  app_import         importing main on top of that: our modules and routes
+  startup            the app's startup hooks, with the warmup pass disabled
+  first_<endpoint>   the first call to each hot endpoint (lazy imports,
+                     compiled tables and caches are paid here)
+
+It also records which heavy optional modules were imported. The Vertex
+SDK, httpx, redis and NumPy must not be imported by `import main`; the
+SDK must stay unloaded after serving requests with USE_VERTEX off.
+
+The median of `--runs` runs is compared against a stored budget. The run
+exits 1 when a stage exceeds the budget by more than `--tolerance` plus
+`--slack-ms`, or when a forbidden module is loaded. The framework import
+is reported but not budgeted: it is not ours to fix, and it is the
+noisiest number.
+
+Run from backend/:
+    python -m bench.startup_budget
+    python -m bench.startup_budget --runs 7 --out run.json --budget bench/startup_budget.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules `import main` must not pull in (model clients, optional stores, NumPy).
+LAZY_AT_IMPORT = ("vertexai", "google.cloud.aiplatform", "google.api_core", "httpx", "redis", "numpy")
+# Still unloaded after serving requests through the offline generator.
+LAZY_WITHOUT_VERTEX = ("vertexai", "google.cloud.aiplatform", "google.api_core", "redis")
+
+FIRST_REQUESTS = [
+    ("health", "GET", "/health", None),
+    ("brainstorm", "POST", "/brainstorm", {"prompt": "cold start", "max_ideas": 8}),
+    ("conversation", "POST", "/conversation", {"message": "Hi, I have an idea for cutting food waste"}),
+    ("ask", "POST", "/ask-about-idea", {"question": "How would we implement this?", "idea_text": "A food swap shelf"}),
+]
+
+# Executed in a fresh interpreter with backend/ as cwd; prints one JSON line.
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import fastapi, fastapi.responses, fastapi.encoders, fastapi.middleware.cors, pydantic
+t1 = time.perf_counter()
+import main
+t2 = time.perf_counter()
+loaded_at_import = [m for m in LAZY_AT_IMPORT if m in sys.modules]
+
+import asyncio
+import httpx
+
+async def run():
+    timings = {}
+    start = time.perf_counter()
+    for hook in main.app.router.on_startup:
+        await hook()
+    timings["startup"] = time.perf_counter() - start
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://budget") as client:
+        for name, method, path, body in FIRST_REQUESTS:
+            start = time.perf_counter()
+            resp = await client.request(method, path, json=body)
+            timings["first_" + name] = time.perf_counter() - start
+            if resp.status_code >= 400:
+                raise SystemExit(f"{path}: HTTP {resp.status_code}")
+    return timings
+
+timings = {"framework_import": t1 - t0, "app_import": t2 - t1, **asyncio.run(run())}
+print(json.dumps({
+    "ms": {name: round(value * 1000, 2) for name, value in timings.items()},
+    "loaded_at_import": loaded_at_import,
+    "loaded_after_requests": [m for m in LAZY_WITHOUT_VERTEX if m in sys.modules],
+}))
+"""
+
+
+def probe_once() -> Dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "USE_VERTEX": "false",
+            "WARMUP_ON_START": "false",
+            "SESSION_LOG_PATH": os.path.join(tmp, "sessions.db"),
+        }
+        prelude = (
+            f"LAZY_AT_IMPORT = {LAZY_AT_IMPORT!r}\n"
+            f"LAZY_WITHOUT_VERTEX = {LAZY_WITHOUT_VERTEX!r}\n"
+            f"FIRST_REQUESTS = {FIRST_REQUESTS!r}\n"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", prelude + PROBE],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=False,
+        )
+    if out.returncode != 0:
+        raise RuntimeError(f"probe failed:\n{out.stderr or out.stdout}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(runs: int) -> Dict:
+    probe_once()  # populate __pycache__ so every measured run sees the same disk state
+    samples = [probe_once() for _ in range(runs)]
+    stages = samples[0]["ms"].keys()
+    return {
+        "meta": {
+            "runs": runs,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "median_ms": {stage: round(statistics.median(s["ms"][stage] for s in samples), 2) for stage in stages},
+        "loaded_at_import": sorted({m for s in samples for m in s["loaded_at_import"]}),
+        "loaded_after_requests": sorted({m for s in samples for m in s["loaded_after_requests"]}),
+    }
+
+
+def check(report: Dict, budget: Optional[Dict], tolerance: float, slack_ms: float) -> List[str]:
+    """Human-readable budget violations."""
+    violations = [f"`import main` loaded {m}" for m in report["loaded_at_import"]]
+    violations += [f"serving with USE_VERTEX=false loaded {m}" for m in report["loaded_after_requests"]]
+    for stage, limit in (budget or {}).get("median_ms", {}).items():
+        if stage == "framework_import":
+            continue
+        current = report["median_ms"].get(stage)
+        if current is not None and current > limit * (1 + tolerance) + slack_ms:
+            violations.append(f"{stage}: {current} ms vs budget {limit} ms")
+    return violations
+
+
+def print_report(report: Dict, budget: Optional[Dict]) -> None:
+    limits = (budget or {}).get("median_ms", {})
+    print(f"{'stage':<22}{'median ms':>11}{'budget ms':>11}")
+    for stage, value in report["median_ms"].items():
+        print(f"{stage:<22}{value:>11}{limits.get(stage, '-'):>11}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to measure (median is used)")
+    parser.add_argument("--budget", default=os.path.join(BACKEND_DIR, "bench", "startup_budget.json"))
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative overrun")
+    parser.add_argument("--slack-ms", type=float, default=15.0, help="allowed absolute overrun (timer noise)")
+    parser.add_argument("--out", help="write the JSON report here (e.g. to record a new budget)")
+    args = parser.parse_args(argv)
+
+    report = measure(args.runs)
+    budget = None
+    if args.budget and os.path.exists(args.budget):
+        with open(args.budget) as f:
+            budget = json.load(f)
+    print_report(report, budget)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    violations = check(report, budget, args.tolerance, args.slack_ms)
+    for line in violations:
+        print("OVER BUDGET", line)
+    if violations:
+        return 1
+    print("within budget" if budget else "no budget file; only lazy-import checks were applied")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
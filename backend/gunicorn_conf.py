@@ -0,0 +1,49 @@
+"""
+Gunicorn settings for production serving (see `python start_system.py --prod`).
+
+    gunicorn -c gunicorn_conf.py main:app
+
+The app is imported once in the master and forked into Uvicorn workers
+(`preload_app`), so imports and module-level tables are shared copy-on-write
+and a broken app fails before any worker starts. Each worker then runs its
+own startup hooks, including the warmup pass, before it accepts requests.
+
+On SIGTERM the master stops accepting connections and gives workers up to
+`graceful_timeout` seconds to finish in-flight requests, streamed responses
+included; /ready reports "draining" meanwhile.
+
+Nothing that holds a file or socket is opened at import, so no worker
+inherits one from the master: the session log, the cache's SQLite tier
+(CACHE_DB_PATH) and model/Redis clients all open on first use in the worker.
+
+State such as in-memory sessions and idea trees is per worker; use
+SESSION_STORE=redis when running more than one.
+"""
+
+import os
+
+
+def available_cpus() -> int:
+    """CPUs this process may actually use: affinity mask and cgroup quota, not host cores."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY") or available_cpus())
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT_SEC", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT_SEC", "60"))
+keepalive = 5
+accesslog = "-" if os.getenv("ACCESS_LOG", "false").lower() == "true" else None
@@ -1,27 +1,66 @@
 """
-AI Brainstorming Agent – Backend API (placeholder version)
+AI Brainstorming Agent – Backend API
 
-This FastAPI app exposes two endpoints:
-  • GET /health → simple readiness probe.
-  • POST /brainstorm → accepts a prompt and optional parameters, returns placeholder ideas.
+Ideas come from the configured model backend when USE_VERTEX is on
+(MODEL_BACKEND=vertex or http, see utils/llm.py) and otherwise from the
+local technique templates in `generate_ideas_placeholder()`. Generation
+goes through admission control (utils/admission.py) and the response cache.
 
-To enable real Vertex AI integration later, replace the
-`generate_ideas_placeholder()` function with a call using
-`google-cloud-aiplatform` or a LangChain chain.
+Endpoints:
+  • GET  /health, /ready              → liveness; readiness ("draining" on shutdown).
+  • GET  /metrics, /cache/stats       → Prometheus metrics; cache counters.
+  • GET|POST /debug/profiler[/start|/stop] → sampling profiler (PROFILER_ENABLED).
+  • POST /brainstorm                  → scored ideas for one prompt.
+  • POST /brainstorm/batch            → several prompts in one request.
+  • POST /brainstorm/stream           → ideas as NDJSON or SSE while they are generated.
+  • POST /novelty, /dedupe, /cluster  → score, deduplicate or group given ideas.
+  • POST /branch                      → expand one idea of a session's idea tree.
+  • GET  /sessions/{id}/tree          → that tree (or a subtree).
+  • GET  /sessions/{id}/events        → the session's event log.
+  • GET  /sessions/{id}/export        → the session as Markdown, JSONL or PDF.
+  • POST /ask-about-idea              → answer a question about one idea.
+  • POST /conversation                → one chat turn, remembered per session.
+  • WS   /ws/conversation             → the same for voice, partial transcripts in.
 
 Run locally:
     uvicorn main:app --reload --port 8000
+
+Production: `gunicorn -c gunicorn_conf.py main:app` (see gunicorn_conf.py).
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Tuple
+import asyncio
+import json
+import math
 import os
 import random
-import re
-from datetime import datetime, timedelta
-from utils.techniques import suggest_technique
+import signal
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import partial
+from itertools import chain, islice
+from utils.techniques import TECHNIQUE_MAP, choose_personality, suggest_technique
+from utils.offline import offline_ideas, request_rng
+from utils.vibe import score_sentiment
+from utils.idea_tree import IdeaTree, IdeaTreeFull, get_idea_tree
+from utils.llm import get_model_backend, close_model_backend
+from utils.prompts import get_prompt_library
+# utils.scorer, utils.dedupe and utils.clustering are NumPy-backed and imported
+# where they are first used, so a cold worker can answer sooner.
+from utils.intents import MessageAnalysis, TranscriptAnalyzer, analyze_message, classify_question
+from utils.sessions import ConversationSession, close_session_store, get_session_store
+from utils.session_log import EVENT_KINDS, close_session_log, get_session_log
+from utils.export import EXPORT_FORMATS, export_chunks, export_tag, spool_export
+from utils.cache import answer_cache, brainstorm_cache, cache_stats, make_key, normalize_text
+from utils.admission import AdmissionRejected, admission
+from utils.metrics import PROFILER_ENABLED, MetricsMiddleware, profiler, register_collector, render_prometheus, span
 
 # -----------------------------------------------------------------------------
 # configuration
@@ -31,6 +70,13 @@ PROJECT_ID = os.getenv("GCP_PROJECT_ID", "demo-project")
 REGION = os.getenv("GCP_REGION", "us-central1")
 VERTEX_MODEL = os.getenv("VERTEX_MODEL", "gemini-1.0-pro")
 USE_VERTEX = os.getenv("USE_VERTEX", "false").lower() == "true"
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "200"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_ITEMS_PER_TOKEN = int(os.getenv("BATCH_ITEMS_PER_TOKEN", "10"))  # rate-limit tokens a batch costs: one per this many items
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "true").lower() == "true"
+WS_MAX_UTTERANCE_CHARS = int(os.getenv("WS_MAX_UTTERANCE_CHARS", "10000"))
+DEDUPE_OVERSAMPLE = int(os.getenv("DEDUPE_OVERSAMPLE", "3"))
+DEDUPE_MAX_CANDIDATES = int(os.getenv("DEDUPE_MAX_CANDIDATES", "500"))
 
 # -----------------------------------------------------------------------------
 # app + models
@@ -45,18 +91,31 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)} if exc.retry_after is not None else None,
+    )
 
 class BrainstormRequest(BaseModel):
     prompt: str = Field(..., example="Ideas for reducing plastic waste")
-    max_ideas: int = Field(5, ge=1, le=10)
+    max_ideas: int = Field(5, ge=1, le=50)
     temperature: float = Field(0.8, ge=0.0, le=1.0)
     mode: str = Field("untimed", example="untimed")  # untimed, lightning (90s), or deep_dive (180s)
-    personality: Optional[str] = Field(None, example="high_energy")  # high_energy, analytical, contrarian, empathetic, balanced
+    personality: Optional[str] = Field(None, example="high_energy")  # high_energy, analytical, contrarian, empathetic, balanced; inferred from the session's conversation when omitted
+    session_id: Optional[str] = Field(None, example="team-42")  # scopes novelty scoring and dedupe to the session
+    dedupe: bool = Field(True, description="Drop near-duplicates of ideas already shown in this session")
+    phase_end_at: Optional[str] = Field(None, description="End of the round this request belongs to; may only move the server-tracked end later, up to now plus the mode's duration")
 
 class Idea(BaseModel):
     text: str
     novelty: float
     sentiment: float
+    duplicate_of: Optional[str] = None  # set only when the session had run out of new ideas
 
 class BrainstormResponse(BaseModel):
     ideas: List[Idea]
@@ -65,11 +124,108 @@ class BrainstormResponse(BaseModel):
     phase_end_at: Optional[str] = None
     mode: str = "lightning"
 
+class BrainstormBatchRequest(BaseModel):
+    requests: List[BrainstormRequest]
+    stream: bool = Field(False, description="Stream items as NDJSON in completion order")
+
+class BrainstormBatchItem(BaseModel):
+    index: int
+    ok: bool
+    result: Optional[BrainstormResponse] = None
+    error: Optional[str] = None
+
+class BrainstormBatchResponse(BaseModel):
+    results: List[BrainstormBatchItem]
+
+class NoveltyRequest(BaseModel):
+    ideas: List[str]
+    session_id: Optional[str] = None
+    update: bool = Field(False, description="Add the ideas to the session index after scoring")
+
+class NoveltyResponse(BaseModel):
+    novelty: List[float]
+
+class DedupeRequest(BaseModel):
+    ideas: List[str]
+    session_id: Optional[str] = None
+    prompt: Optional[str] = Field(None, description="Session prompt; its words are ignored when comparing")
+    threshold: Optional[float] = Field(None, ge=0.0, le=1.0)
+    update: bool = False
+
+class DuplicateIdea(BaseModel):
+    index: int
+    text: str
+    duplicate_of: str
+
+class DedupeResponse(BaseModel):
+    unique: List[str]
+    duplicates: List[DuplicateIdea]
+
+class ClusterRequest(BaseModel):
+    ideas: List[str]
+    session_id: Optional[str] = None
+    k: Optional[int] = Field(None, ge=1, le=50)  # number of themes; chosen automatically if omitted
+    append: bool = Field(False, description="Fold these new ideas into the session's existing clusters")
+
+class IdeaCluster(BaseModel):
+    id: int
+    theme: str
+    size: int
+    representative: str
+    ideas: List[str]
+
+class ClusterResponse(BaseModel):
+    clusters: List[IdeaCluster]
+    outliers: List[str]
+    total_ideas: int
+
+class SessionEvent(BaseModel):
+    id: int
+    session_id: str
+    ts: float
+    kind: str  # idea, turn or phase
+    data: dict
+
+class SessionEventsResponse(BaseModel):
+    session_id: str
+    events: List[SessionEvent]
+    next_after: Optional[int] = None
+
+class BranchRequest(BaseModel):
+    session_id: str = Field(..., example="team-42")
+    node_id: Optional[int] = Field(None, ge=0, description="Tree node to expand; omit to branch from idea_text")
+    idea_text: Optional[str] = Field(None, example="Run a deposit scheme for reusable cups")
+    topic: Optional[str] = Field(None, example="Reducing plastic waste")  # becomes the root on first use
+    max_ideas: int = Field(5, ge=1, le=20)
+    temperature: float = Field(0.8, ge=0.0, le=1.0)
+    personality: Optional[str] = Field(None, example="analytical")
+
+class IdeaNode(BaseModel):
+    id: int
+    parent: Optional[int] = None
+    text: str
+    depth: int
+    expanded: bool
+    children: int
+
+class BranchResponse(BaseModel):
+    session_id: str
+    node: IdeaNode
+    path: List[str]  # texts from the topic down to the expanded idea
+    children: List[IdeaNode]
+    cached: bool  # children were already generated earlier
+    chosen_technique: Optional[str] = None
+
+class IdeaTreeResponse(BaseModel):
+    session_id: str
+    nodes: List[IdeaNode]  # pre-order; nest them with `parent`
+
 class IdeaQuestionRequest(BaseModel):
     question: str = Field(..., example="How can I implement this idea?")
     idea_text: str = Field(..., example="Create a blockchain marketplace")
     topic: Optional[str] = Field(None, example="Reducing plastic waste")
     context: Optional[str] = Field(None, example="Additional context about the idea")
+    session_id: Optional[str] = Field(None, example="team-42")  # logs the Q&A for export
 
 class IdeaQuestionResponse(BaseModel):
     answer: str
@@ -77,8 +233,9 @@ class IdeaQuestionResponse(BaseModel):
 
 class ConversationRequest(BaseModel):
     message: str = Field(..., example="I have an idea for reducing plastic waste")
-    conversation_history: Optional[List[dict]] = Field(None, example=[])
+    conversation_history: Optional[List[dict]] = Field(None, example=[])  # ignored when session_id is set
     context: Optional[str] = Field(None, example="User is brainstorming")
+    session_id: Optional[str] = Field(None, example="voice-7f3a")  # server keeps the history; send only the new message
 
 class ConversationResponse(BaseModel):
     response: str
@@ -86,253 +243,1000 @@ class ConversationResponse(BaseModel):
     extracted_name: Optional[str] = None
     should_proceed: bool = False
     suggested_questions: Optional[List[str]] = None
+    session_id: Optional[str] = None
+
+# /ws/conversation: open connections and frames handled by this worker.
+socket_stats = {"open": 0, "partial": 0, "final": 0, "draft": 0, "reply": 0}
+
+# What /ready reports for this worker: starting -> ready -> draining.
+worker_state = {"state": "starting", "pid": None, "warmup_ms": None, "warmup_errors": []}
+
+WARMUP_REQUESTS = [
+    ("/brainstorm", {"prompt": "warmup", "max_ideas": 8}),
+    ("/brainstorm/stream", {"prompt": "warmup stream", "max_ideas": 2}),
+    ("/ask-about-idea", {"question": "How would this work?", "idea_text": "A warmup idea"}),
+    ("/conversation", {"message": "Hi, I'm Sam and I have an idea for warming up"}),
+    ("/novelty", {"ideas": ["A warmup idea", "Another warmup idea"]}),
+    ("/dedupe", {"ideas": ["A warmup idea", "A warmup idea!"]}),
+]
+
+@app.on_event("startup")
+async def load_prompts():
+    """Load and validate prompt templates up front so a bad edit fails the boot."""
+    get_prompt_library()
+
+@app.on_event("startup")
+async def warm_up():
+    """Send one request per hot endpoint through the app before taking traffic.
+
+    Runs before the server accepts connections, so lazy imports, compiled
+    rules, NumPy kernels and the session log are initialized by the time the
+    first real request arrives. A failing warmup request (say, the model
+    endpoint is down) is reported by /ready but doesn't block the boot.
+    Warmup requests show up in /metrics.
+    """
+    worker_state["pid"] = os.getpid()
+    watch_for_drain()
+    if WARMUP_ON_START:
+        import httpx
+
+        started = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://warmup", headers={"X-Client-Id": "warmup"}) as client:
+            for path, body in WARMUP_REQUESTS:
+                resp = await client.post(path, json=body)
+                if resp.status_code >= 400:
+                    worker_state["warmup_errors"].append(f"{path}: HTTP {resp.status_code}")
+        get_session_log()
+        worker_state["warmup_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    worker_state["state"] = "ready"
+
+def watch_for_drain() -> None:
+    """Report "draining" from /ready as soon as the server is told to stop.
+
+    Chains in front of the server's own SIGTERM/SIGINT handlers, which stop
+    accepting connections and let in-flight (including streaming) responses
+    finish before the shutdown hooks run.
+    """
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            previous = signal.getsignal(signum)
+        except ValueError:
+            return
+
+        def handler(received, frame, previous=previous):
+            worker_state["state"] = "draining"
+            if callable(previous):
+                previous(received, frame)
+            elif previous != signal.SIG_IGN:
+                signal.signal(received, signal.SIG_DFL)
+                os.kill(os.getpid(), received)
+
+        try:
+            signal.signal(signum, handler)
+        except ValueError:
+            return  # not the main thread (e.g. embedded in a test client)
+
+@app.on_event("shutdown")
+async def shutdown_model_backend():
+    """Close pooled model connections on shutdown."""
+    await close_model_backend()
+    await close_session_store()
+    close_session_log()
 
 # -----------------------------------------------------------------------------
 # core logic (placeholder version)
 # -----------------------------------------------------------------------------
-def generate_ideas_placeholder(prompt: str, max_ideas: int, temperature: float) -> List[Idea]:
+def generate_ideas_placeholder(
+    prompt: str, max_ideas: int, temperature: float, technique_info: Optional[dict] = None,
+) -> Iterator[Idea]:
     """
-    Generates mock ideas locally for quick iteration.
-    Replace this with real Vertex AI logic later.
+    Generates ideas locally from the technique's combinatorial templates.
+    Used when USE_VERTEX is off (development, load tests, degraded mode).
     """
-    random.seed(len(prompt))
-    
-    # More diverse and topic-aware idea templates
-    base_templates = [
-        f"Leverage {prompt} through community micro-grants and local partnerships",
-        f"Gamify {prompt} with digital rewards and engagement systems",
-        f"Partner with educational institutions for {prompt} innovation",
-        f"Use sustainable and biodegradable solutions for {prompt}",
-        f"Adopt open-source tracking and transparency for {prompt}",
-        f"Create {prompt} marketplace with blockchain technology",
-        f"Design {prompt} mobile app with AR/VR integration",
-        f"Build {prompt} platform using AI-powered matching algorithms",
-        f"Implement {prompt} through crowdsourcing and collective intelligence",
-        f"Develop {prompt} solution with IoT sensor networks",
-    ]
-    
-    # Select unique ideas
-    selected = random.sample(base_templates, k=min(max_ideas, len(base_templates)))
-    
-    return [
-        Idea(
-            text=idea,
-            novelty=round(random.uniform(0.5, 1.0), 2),
-            sentiment=round(random.uniform(0.3, 0.9), 2),
+    technique_info = technique_info or suggest_technique("balanced")
+    rng = request_rng(prompt, technique_info["method"], temperature)
+    for text in islice(offline_ideas(prompt, technique_info, rng), max_ideas):
+        yield Idea(
+            text=text,
+            novelty=round(rng.uniform(0.5, 1.0), 2),
+            sentiment=0.5,
         )
-        for idea in selected
-    ]
+
+def make_idea(text: str) -> Idea:
+    """Wrap generated text in an Idea with placeholder scores."""
+    return Idea(
+        text=text,
+        novelty=round(random.uniform(0.5, 1.0), 2),
+        sentiment=0.5,
+    )
+
+async def generate_ideas_model(prompt: str, max_ideas: int, temperature: float, technique_info: dict) -> List[Idea]:
+    """Generate ideas through the configured model backend."""
+    backend = get_model_backend(PROJECT_ID, REGION, VERTEX_MODEL)
+    texts = await backend.generate(prompt, max_ideas, temperature, technique_info)
+    return [make_idea(text) for text in texts]
+
+async def stream_ideas(prompt: str, max_ideas: int, temperature: float, technique_info: dict) -> AsyncIterator[Idea]:
+    """Yield ideas one at a time from whichever generator is active."""
+    if USE_VERTEX:
+        backend = get_model_backend(PROJECT_ID, REGION, VERTEX_MODEL)
+        async for text in backend.stream(prompt, max_ideas, temperature, technique_info):
+            yield make_idea(text)
+    else:
+        for idea in generate_ideas_placeholder(prompt, max_ideas, temperature, technique_info):
+            yield idea
+
+def candidate_count(request: BrainstormRequest) -> int:
+    """How many candidates to generate so dedupe can still leave `max_ideas`."""
+    if request.session_id and request.dedupe:
+        return max(request.max_ideas, min(request.max_ideas * DEDUPE_OVERSAMPLE, DEDUPE_MAX_CANDIDATES))
+    return request.max_ideas
+
+def more_candidates(request: BrainstormRequest, technique_info: dict, skip: int) -> Iterator[dict]:
+    """Offline candidates past the first `skip`; the walk is seeded, so it continues the cached pool."""
+    if USE_VERTEX:
+        return iter(())
+    ideas = generate_ideas_placeholder(request.prompt, DEDUPE_MAX_CANDIDATES, request.temperature, technique_info)
+    return (jsonable_encoder(idea) for idea in islice(ideas, skip, None))
+
+def pick_fresh(candidates: Iterable[dict], max_ideas: int, session_id: str, prompt: str) -> List[dict]:
+    """Pull candidates until `max_ideas` are new to the session or the candidates run out.
+
+    If they run out, the shortfall is filled with the repeats, marked with
+    `duplicate_of`, so a regenerate never comes back empty.
+    """
+    from utils.dedupe import find_duplicates
+
+    candidates = iter(candidates)
+    fresh: List[dict] = []
+    repeats: List[dict] = []
+    with span("dedupe"):
+        while len(fresh) < max_ideas:
+            # A chunk never exceeds the shortfall, so every idea it adds to the
+            # session's index is one that gets returned.
+            chunk = list(islice(candidates, max_ideas - len(fresh)))
+            if not chunk:
+                break
+            matches = find_duplicates([idea["text"] for idea in chunk], session_id, prompt)
+            for idea, match in zip(chunk, matches):
+                if match is None:
+                    fresh.append(idea)
+                else:
+                    repeats.append({**idea, "duplicate_of": match})
+    return fresh + repeats[:max_ideas - len(fresh)]
+
+def score_ideas(ideas: List[dict], session_id: Optional[str] = None, prompt: Optional[str] = None) -> List[dict]:
+    """Replace placeholder novelty with distance from the session's prior ideas, and sentiment with a lexicon score."""
+    from utils.scorer import score_novelty
+
+    texts = [idea["text"] for idea in ideas]
+    # Repeats are already in the session's index; score them without re-adding.
+    fresh = [i for i, idea in enumerate(ideas) if not idea.get("duplicate_of")]
+    repeats = [i for i, idea in enumerate(ideas) if idea.get("duplicate_of")]
+    novelty = [0.0] * len(ideas)
+    with span("scoring"):
+        for indices, update in ((fresh, True), (repeats, False)):
+            for i, n in zip(indices, score_novelty([texts[i] for i in indices], session_id, update=update)):
+                novelty[i] = n
+        sentiment = score_sentiment(texts, prompt)
+    return [{**idea, "novelty": n, "sentiment": s} for idea, n, s in zip(ideas, novelty, sentiment)]
+
+async def pick_technique(personality: Optional[str], session_id: Optional[str]) -> Tuple[str, dict]:
+    """TECHNIQUE_MAP key and technique: the requested personality, else the session's conversation vibe."""
+    vibe = None
+    if not personality and session_id:
+        session = await get_session_store().get(session_id)
+        vibe = session.vibe if session else None
+    key = choose_personality(personality, vibe)
+    return key, TECHNIQUE_MAP[key]
+
+def log_phase(request: BrainstormRequest, technique: str, phase_end_at: Optional[str]) -> None:
+    """Record the start of a brainstorm round in the session's event log."""
+    if request.session_id:
+        get_session_log().append(request.session_id, "phase", {
+            "mode": request.mode,
+            "prompt": request.prompt,
+            "technique": technique,
+            "phase_end_at": phase_end_at,
+        })
+
+def log_ideas(session_id: Optional[str], ideas: List[dict]) -> None:
+    ideas = [idea for idea in ideas if not idea.get("duplicate_of")]
+    if session_id and ideas:
+        get_session_log().append_many(session_id, "idea", ideas)
+
+# Round length per mode in seconds; untimed rounds have none.
+ROUND_SECONDS = {"lightning": 90, "deep_dive": 180}
+
+def round_deadline(request: BrainstormRequest) -> Tuple[Optional[str], float]:
+    """The round's `phase_end_at` and the matching admission deadline.
+
+    The end is tracked server-side per session (see `admission.round_end`);
+    a client-sent `phase_end_at` can push it later but never earlier.
+    """
+    claimed = None
+    if request.phase_end_at:
+        try:
+            parsed = datetime.fromisoformat(request.phase_end_at.replace("Z", "+00:00"))
+        except ValueError:
+            raise HTTPException(status_code=422, detail="phase_end_at must be an ISO 8601 timestamp")
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        claimed = parsed.timestamp()
+    phase_end = admission.round_end(request.session_id, request.mode, ROUND_SECONDS.get(request.mode), claimed)
+    if phase_end is None:
+        return None, admission.deadline_for(None)
+    phase_end_at = datetime.fromtimestamp(phase_end, timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+    return phase_end_at, admission.deadline_for(phase_end)
+
+def batch_cost(items: int) -> int:
+    """Rate-limit tokens charged for a batch of `items` requests."""
+    return math.ceil(items / max(1, BATCH_ITEMS_PER_TOKEN))
+
+# Every batch the endpoint accepts must be affordable from full buckets.
+if admission.rate > 0 and batch_cost(BATCH_MAX_ITEMS) > admission.max_cost:
+    raise RuntimeError(
+        f"BATCH_MAX_ITEMS={BATCH_MAX_ITEMS} costs {batch_cost(BATCH_MAX_ITEMS)} tokens but the burst is "
+        f"{admission.max_cost:g}; raise BATCH_ITEMS_PER_TOKEN or ADMISSION_BURST/ADMISSION_ADDRESS_BURST"
+    )
+
+def client_address(http_request: Request) -> str:
+    return http_request.client.host if http_request.client else "anonymous"
+
+def client_key(http_request: Request, session_id: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """Who a request is rate-limited as: its address, then client id or session within it.
+
+    The id comes from the caller, so it only splits the address's allowance;
+    it never gets a fresh one.
+    """
+    return client_address(http_request), http_request.headers.get("x-client-id") or session_id
+
+def encode_frame(frame: dict, stream_format: str) -> str:
+    """Serialize one stream frame as an NDJSON line or an SSE event."""
+    data = json.dumps(frame)
+    if stream_format == "sse":
+        return f"event: {frame['type']}\ndata: {data}\n\n"
+    return data + "\n"
 
 # -----------------------------------------------------------------------------
 # endpoints
 # -----------------------------------------------------------------------------
 @app.get("/health")
 async def health_check():
-    """Simple readiness check."""
+    """Liveness: the worker's event loop is answering."""
     return {"status": "ok", "env": APP_ENV}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 only while this worker is warmed up, not draining and not saturated."""
+    log = get_session_log() if worker_state["state"] == "ready" else None
+    checks = {
+        "state": worker_state["state"],
+        "session_log": "ok" if log is None or log.alive else "writer stopped",
+        "queue_depth": admission.waiting,
+        "queue_limit": admission.max_queue,
+        "prompts": get_prompt_library().last_error or "ok",
+        "warmup_errors": worker_state["warmup_errors"],
+    }
+    ready = (
+        worker_state["state"] == "ready"
+        and checks["session_log"] == "ok"
+        and admission.waiting < admission.max_queue
+    )
+    body = {"status": "ready" if ready else "unavailable", "pid": worker_state["pid"], "warmup_ms": worker_state["warmup_ms"], "checks": checks}
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+async def run_brainstorm(request: BrainstormRequest) -> dict:
+    """Run one brainstorm round and return the response payload."""
+    # Determine personality/technique
+    with span("technique"):
+        personality, technique_info = await pick_technique(request.personality, request.session_id)
+
+    # Calculate phase end time based on mode (None for untimed)
+    phase_end_at, deadline = round_deadline(request)
+    log_phase(request, technique_info["method"], phase_end_at)
+
+    count = candidate_count(request)
+
+    async def compute():
+        # Only cache misses take a generation slot; hits never queue.
+        async with admission.slot(deadline):
+            with span("generate"):
+                if USE_VERTEX:
+                    ideas = await generate_ideas_model(request.prompt, count, request.temperature, technique_info)
+                else:
+                    ideas = generate_ideas_placeholder(request.prompt, count, request.temperature, technique_info)
+                return [jsonable_encoder(idea) for idea in ideas]
+
+    # phase_end_at is per request and dedupe per session, so only the
+    # pre-dedupe candidates are cached.
+    key = make_key(normalize_text(request.prompt), count, request.temperature, personality)
+    candidates = await brainstorm_cache.get_or_compute(key, compute)
+    if request.session_id and request.dedupe:
+        pool = chain(candidates, more_candidates(request, technique_info, len(candidates)))
+        ideas = pick_fresh(pool, request.max_ideas, request.session_id, request.prompt)
+    else:
+        ideas = candidates[:request.max_ideas]
+    ideas = score_ideas(ideas, request.session_id, request.prompt)
+    log_ideas(request.session_id, ideas)
+
+    return {
+        "ideas": ideas,
+        "chosen_technique": technique_info["method"],
+        "technique_description": technique_info["description"],
+        "phase_end_at": phase_end_at,
+        "mode": request.mode
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint (this worker's histograms and counters)."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def collect_cache_counters():
+    stats = cache_stats()
+    return {
+        (("cache", name), ("event", event)): stats[name][event]
+        for name in ("brainstorm", "ask_about_idea")
+        for event in ("hits", "disk_hits", "misses", "coalesced", "evictions", "expirations")
+    }
+
+def collect_session_log():
+    snapshot = get_session_log().snapshot()
+    return {(("state", key),): snapshot[key] for key in ("queued", "committed", "errors")}
+
+def collect_admission_events():
+    return {(("outcome", key),): value for key, value in admission.stats.items()}
+
+def collect_socket_events():
+    return {(("frame", key),): socket_stats[key] for key in ("partial", "final", "draft", "reply")}
+
+def collect_open_sockets():
+    return {(): socket_stats["open"]}
+
+def collect_admission_state():
+    snapshot = admission.snapshot()
+    return {(("state", key),): snapshot[key] for key in ("inflight", "slots", "queue_depth", "service_time_sec")}
+
+register_collector("response_cache_events_total", "Response cache lookups and evictions.", collect_cache_counters, "counter")
+register_collector("session_log_events", "Session event log writer state.", collect_session_log)
+register_collector("admission_events_total", "Admission control decisions.", collect_admission_events, "counter")
+register_collector("admission_state", "Generation slots, queue depth and expected service time.", collect_admission_state)
+register_collector("conversation_socket_events_total", "/ws/conversation frames by kind.", collect_socket_events, "counter")
+register_collector("conversation_sockets_open", "Open /ws/conversation connections.", collect_open_sockets)
+
+@app.get("/debug/profiler")
+async def profiler_status():
+    """State of this worker's sampling profiler (disabled unless PROFILER_ENABLED=true)."""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="profiler is disabled")
+    return profiler.snapshot()
+
+@app.post("/debug/profiler/start")
+async def profiler_start(interval_ms: float = Query(5.0, ge=1.0, le=1000.0)):
+    """Start sampling the event loop thread of the worker that serves this request."""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="profiler is disabled")
+    profiler.start(interval_ms)
+    return profiler.snapshot()
+
+@app.post("/debug/profiler/stop", response_class=PlainTextResponse)
+async def profiler_stop():
+    """Stop sampling and return collapsed stacks for flamegraph tools."""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="profiler is disabled")
+    profiler.stop()
+    return PlainTextResponse(profiler.collapsed(), headers={"X-Profiler-Pid": str(profiler.snapshot()["pid"])})
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss/eviction counters for the response caches."""
+    return cache_stats()
+
 @app.post("/brainstorm", response_model=BrainstormResponse)
-async def brainstorm(request: BrainstormRequest):
+async def brainstorm(request: BrainstormRequest, http_request: Request):
     """Return a list of brainstormed ideas for the given prompt."""
+    admission.check_rate(client_key(http_request, request.session_id))
     try:
-        # Determine personality/technique
-        personality = request.personality or "balanced"
-        technique_info = suggest_technique(personality)
+        return await run_brainstorm(request)
+    except (AdmissionRejected, HTTPException):
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+@app.post("/brainstorm/batch", response_model=BrainstormBatchResponse)
+async def brainstorm_batch(batch: BrainstormBatchRequest, http_request: Request):
+    """Run many brainstorm requests concurrently with a bounded worker pool.
 
-        # Calculate phase end time based on mode (None for untimed)
-        phase_end_at = None
-        if request.mode == "lightning":
-            phase_end_at = (datetime.utcnow() + timedelta(seconds=90)).isoformat() + "Z"
-        elif request.mode == "deep_dive":
-            phase_end_at = (datetime.utcnow() + timedelta(seconds=180)).isoformat() + "Z"
-        # untimed mode: phase_end_at remains None
+    Results come back in request order, each with its own ok/error so one
+    failure doesn't fail the batch. With `stream=true` items are sent as
+    NDJSON lines in completion order instead.
+    """
+    if not batch.requests:
+        raise HTTPException(status_code=422, detail="requests must not be empty")
+    if len(batch.requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"batch is limited to {BATCH_MAX_ITEMS} requests")
+    admission.check_rate(client_key(http_request), cost=batch_cost(len(batch.requests)))
 
-        if USE_VERTEX:
-            # placeholder for future Vertex AI integration
-            raise NotImplementedError("Vertex AI call not yet implemented")
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
 
-        ideas = generate_ideas_placeholder(request.prompt, request.max_ideas, request.temperature)
+    async def run_item(index: int, request: BrainstormRequest) -> BrainstormBatchItem:
+        async with semaphore:
+            try:
+                result = await run_brainstorm(request)
+                return BrainstormBatchItem(index=index, ok=True, result=result)
+            except Exception as exc:
+                return BrainstormBatchItem(index=index, ok=False, error=str(exc))
 
-        return {
-            "ideas": ideas,
+    tasks = [asyncio.ensure_future(run_item(i, req)) for i, req in enumerate(batch.requests)]
+
+    if not batch.stream:
+        return {"results": await asyncio.gather(*tasks)}
+
+    async def lines():
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                yield json.dumps(jsonable_encoder(item)) + "\n"
+        finally:
+            # Client went away: don't keep generating for nobody.
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/brainstorm/stream")
+async def brainstorm_stream(
+    request: BrainstormRequest,
+    http_request: Request,
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$"),
+):
+    """Stream ideas as they are generated.
+
+    The first frame carries `chosen_technique` and `phase_end_at`, then one
+    `idea` frame per idea, then a `done` frame (or an `error` frame).
+    """
+    # Refuse up front while a plain 429/503 can still be sent.
+    admission.check_rate(client_key(http_request, request.session_id))
+    phase_end_at, deadline = round_deadline(request)
+    admission.check_deadline(deadline)
+    with span("technique"):
+        _, technique_info = await pick_technique(request.personality, request.session_id)
+    log_phase(request, technique_info["method"], phase_end_at)
+
+    async def frames():
+        yield encode_frame({
+            "type": "meta",
             "chosen_technique": technique_info["method"],
             "technique_description": technique_info["description"],
             "phase_end_at": phase_end_at,
-            "mode": request.mode
+            "mode": request.mode,
+        }, stream_format)
+        count = 0
+        repeats: List[dict] = []
+        try:
+            async with admission.slot(deadline):
+                limit = candidate_count(request)
+                if request.session_id and request.dedupe and not USE_VERTEX:
+                    limit = DEDUPE_MAX_CANDIDATES  # the offline walk is lazy, so only what's used is generated
+                ideas = stream_ideas(request.prompt, limit, request.temperature, technique_info)
+                try:
+                    async for idea in ideas:
+                        batch = [jsonable_encoder(idea)]
+                        if request.session_id and request.dedupe:
+                            picked = pick_fresh(batch, 1, request.session_id, request.prompt)
+                            if picked[0].get("duplicate_of"):
+                                repeats.append(picked[0])
+                                continue
+                            batch = picked
+                        batch = score_ideas(batch, request.session_id, request.prompt)
+                        log_ideas(request.session_id, batch)
+                        count += 1
+                        yield encode_frame({"type": "idea", "idea": batch[0]}, stream_format)
+                        if count >= request.max_ideas:
+                            break
+                finally:
+                    await ideas.aclose()
+                # Out of new ideas: show the repeats, marked, rather than nothing.
+                for repeat in score_ideas(repeats[:request.max_ideas - count], request.session_id, request.prompt):
+                    count += 1
+                    yield encode_frame({"type": "idea", "idea": repeat}, stream_format)
+        except AdmissionRejected as exc:
+            yield encode_frame({"type": "error", "detail": exc.detail, "retry_after": exc.retry_after}, stream_format)
+            return
+        except Exception as exc:
+            yield encode_frame({"type": "error", "detail": str(exc)}, stream_format)
+            return
+        yield encode_frame({"type": "done", "count": count}, stream_format)
+
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        frames(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/novelty", response_model=NoveltyResponse)
+async def novelty(request: NoveltyRequest):
+    """Score a batch of ideas for novelty, e.g. to rank them during Reflection."""
+    from utils.scorer import score_novelty
+
+    try:
+        return {"novelty": score_novelty(request.ideas, request.session_id, update=request.update)}
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+@app.post("/dedupe", response_model=DedupeResponse)
+async def dedupe(request: DedupeRequest):
+    """Group near-duplicate ideas, e.g. before Organize/Export."""
+    from utils.dedupe import find_duplicates
+
+    try:
+        matches = find_duplicates(request.ideas, request.session_id, request.prompt, request.update, request.threshold)
+        return {
+            "unique": [text for text, match in zip(request.ideas, matches) if match is None],
+            "duplicates": [
+                {"index": i, "text": text, "duplicate_of": match}
+                for i, (text, match) in enumerate(zip(request.ideas, matches))
+                if match is not None
+            ],
         }
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
+@app.post("/cluster", response_model=ClusterResponse)
+async def cluster(request: ClusterRequest):
+    """Group ideas into themes with representatives and outliers."""
+    from utils.clustering import cluster_ideas
+
+    try:
+        return cluster_ideas(request.ideas, request.session_id, request.k, request.append)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+@app.get("/sessions/{session_id}/events", response_model=SessionEventsResponse)
+def session_events(
+    session_id: str,
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    kind: Optional[List[str]] = Query(None),
+):
+    """Page through a session's ideas, turns and phase changes, oldest first.
+
+    Pass the returned `next_after` as `after` to fetch the next page; it is
+    null once the log is exhausted.
+    """
+    if kind and not set(kind) <= set(EVENT_KINDS):
+        raise HTTPException(status_code=422, detail=f"kind must be one of {', '.join(EVENT_KINDS)}")
+    log = get_session_log()
+    log.flush()  # read-your-writes for events appended just before this call
+    events = log.read(session_id, after, limit, kind)
+    return {
+        "session_id": session_id,
+        "events": events,
+        "next_after": events[-1]["id"] if len(events) == limit else None,
+    }
+
+@app.get("/sessions/{session_id}/export")
+def export_session(
+    session_id: str,
+    export_format: str = Query("markdown", alias="format", pattern="^(markdown|jsonl|pdf)$"),
+    range_header: Optional[str] = Header(None, alias="Range"),
+):
+    """Download a session's rounds, ideas, themes, Q&A and conversation.
+
+    Plain requests stream the export as it is rendered. Requests with a
+    `Range` header (resumed downloads) are served from a spooled copy of the
+    same rendering, identified by the ETag.
+    """
+    log = get_session_log()
+    log.flush()
+    until = log.last_event_id(session_id)
+    if not until:
+        raise HTTPException(status_code=404, detail="session has no events")
+    from utils.clustering import session_themes
+
+    themes = session_themes(session_id)
+    tag = export_tag(session_id, export_format, until, themes)
+    media_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"brainstorm-{tag[:8]}.{extension}"
+    headers = {"ETag": f'"{tag}"', "Accept-Ranges": "bytes"}
+
+    if range_header:
+        path = spool_export(export_chunks(log, session_id, export_format, until, themes), session_id, export_format, tag)
+        return FileResponse(path, media_type=media_type, filename=filename, headers=headers)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(export_chunks(log, session_id, export_format, until, themes), media_type=media_type, headers=headers)
+
+async def sync_idea_tree(session_id: str, topic: Optional[str]) -> IdeaTree:
+    """The session's idea tree, caught up with every "branch" event in the log.
+
+    Other workers append to the same log, so a cached tree is brought up to
+    date before each use rather than trusted as-is.
+    """
+    tree = get_idea_tree(session_id, lambda: IdeaTree(topic or ""))
+    await catch_up_tree(session_id, tree)
+    return tree
+
+async def catch_up_tree(session_id: str, tree: IdeaTree) -> None:
+    # SQLite reads run in the threadpool; the tree itself is only touched on the loop.
+    read = partial(get_session_log().replay, session_id, ["branch"], after=tree.log_id)
+    for event in await run_in_threadpool(lambda: list(read())):
+        tree.apply(event)
+
+async def record_branch(session_id: str, tree: IdeaTree, data: dict) -> None:
+    """Log a tree change, then apply it from the log so node ids follow log order."""
+    log = get_session_log()
+    log.append(session_id, "branch", {"topic": tree.texts[0], **data})
+    if not await run_in_threadpool(log.flush):
+        raise HTTPException(status_code=503, detail="session log is not keeping up; try again")
+    await catch_up_tree(session_id, tree)
+
+async def generate_branch(topic: str, idea: str, max_ideas: int, temperature: float, technique_info: dict) -> List[str]:
+    """Follow-on ideas for one idea, from the model or the offline engine."""
+    if USE_VERTEX:
+        backend = get_model_backend(PROJECT_ID, REGION, VERTEX_MODEL)
+        return await backend.generate(topic, max_ideas, temperature, technique_info, branch_from=idea)
+    return [item.text for item in generate_ideas_placeholder(idea, max_ideas, temperature, technique_info)]
+
+@app.post("/branch", response_model=BranchResponse)
+async def branch(request: BranchRequest, http_request: Request):
+    """Go deeper on one idea: expand its node in the session's idea tree.
+
+    The first expansion of a node generates its children; later calls for
+    the same node return them without generating again.
+    """
+    if request.node_id is None and not request.idea_text:
+        raise HTTPException(status_code=422, detail="node_id or idea_text is required")
+    session_id = request.session_id
+    tree = await sync_idea_tree(session_id, request.topic)
+    if request.topic:
+        tree.set_topic(request.topic)
+    try:
+        if request.node_id is None:
+            node = tree.lookup(request.idea_text)
+            if node is None:
+                tree.check_room(1)
+                await record_branch(session_id, tree, {"parent": 0, "children": [request.idea_text], "expanded": False})
+                node = tree.lookup(request.idea_text)
+                if node is None:
+                    # Another worker filled the tree before this idea landed.
+                    raise IdeaTreeFull(f"idea tree is limited to {tree.max_nodes} ideas")
+        else:
+            node = request.node_id
+            tree.path(node)  # raises KeyError for unknown nodes
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"node {request.node_id} is not in this session's tree")
+    except IdeaTreeFull as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+    _, technique_info = await pick_technique(request.personality, session_id)
+    path = [tree.texts[n] for n in tree.path(node)]
+
+    async def generate() -> List[str]:
+        admission.check_rate(client_key(http_request, session_id))
+        async with admission.slot(admission.deadline_for(None)):
+            with span("generate"):
+                return await generate_branch(path[0] or path[-1], path[-1], request.max_ideas, request.temperature, technique_info)
+
+    async def commit(texts: List[str]) -> None:
+        tree.check_room(len(texts))
+        await record_branch(session_id, tree, {"parent": node, "children": texts})
+
+    try:
+        children, cached = await tree.expand(node, generate, commit)
+    except IdeaTreeFull as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except (AdmissionRejected, HTTPException):
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+    return {
+        "session_id": session_id,
+        "node": tree.node_dict(node),
+        "path": path,
+        "children": [tree.node_dict(c) for c in children],
+        "cached": cached,
+        "chosen_technique": None if cached else technique_info["method"],
+    }
+
+@app.get("/sessions/{session_id}/tree", response_model=IdeaTreeResponse)
+async def session_tree(
+    session_id: str,
+    node: int = Query(0, ge=0),
+    depth: Optional[int] = Query(None, ge=0, le=100),
+):
+    """A subtree of the session's ideas (the whole tree by default), pre-order."""
+    tree = await sync_idea_tree(session_id, None)
+    try:
+        return {"session_id": session_id, "nodes": tree.subtree(node, depth)}
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"node {node} is not in this session's tree")
+
 @app.post("/ask-about-idea", response_model=IdeaQuestionResponse)
 async def ask_about_idea(request: IdeaQuestionRequest):
     """Answer questions about a specific idea."""
     try:
-        # Generate contextual answer based on question and idea
-        answer = generate_idea_answer(request.question, request.idea_text, request.topic, request.context)
-        suggested_followups = generate_followup_questions(request.question)
-        return {
-            "answer": answer,
-            "suggested_followups": suggested_followups
-        }
+        with span("intents"):
+            intent = classify_question(request.question)
+        # Only the generic answer echoes the question text, so other intents
+        # share one cache entry per (intent, idea, topic).
+        key = make_key(
+            intent,
+            normalize_text(request.idea_text),
+            normalize_text(request.topic or ""),
+            normalize_text(request.question) if intent == "general" else "",
+        )
+
+        async def compute():
+            # Generate contextual answer based on question and idea
+            answer = generate_idea_answer(request.question, request.idea_text, request.topic, request.context, intent)
+            suggested_followups = generate_followup_questions(request.question)
+            return {
+                "answer": answer,
+                "suggested_followups": suggested_followups
+            }
+
+        result = await answer_cache.get_or_compute(key, compute)
+        if request.session_id:
+            get_session_log().append(request.session_id, "qa", {
+                "question": request.question,
+                "idea_text": request.idea_text,
+                "answer": result["answer"],
+            })
+        return result
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
-def generate_idea_answer(question: str, idea_text: str, topic: Optional[str] = None, context: Optional[str] = None) -> str:
+def generate_idea_answer(question: str, idea_text: str, topic: Optional[str] = None, context: Optional[str] = None, intent: Optional[str] = None) -> str:
     """Generate an answer about an idea based on the question."""
-    question_lower = question.lower()
+    intent = intent or classify_question(question)
     
     # Context-aware answers
-    if "how" in question_lower or "implement" in question_lower:
+    if intent == "implement":
         return f"To implement '{idea_text}', you could start by breaking it down into smaller phases. First, identify the core components and stakeholders involved. Consider creating a prototype to validate the concept, then iterate based on feedback. You might also want to research similar solutions and learn from their approaches."
     
-    elif "why" in question_lower or "benefit" in question_lower or "important" in question_lower:
+    elif intent == "value":
         return f"This idea is valuable because it addresses {topic or 'the problem'} in an innovative way. '{idea_text}' could provide unique benefits by offering a fresh perspective and potentially solving challenges that traditional approaches haven't addressed effectively."
     
-    elif "who" in question_lower or "target" in question_lower or "user" in question_lower:
+    elif intent == "audience":
         return f"For '{idea_text}', your target audience could include people who are interested in {topic or 'innovative solutions'}. Consider who would benefit most from this approach and who might face the challenges this idea addresses."
     
-    elif "what" in question_lower and ("next" in question_lower or "step" in question_lower):
+    elif intent == "next_steps":
         return f"Next steps for '{idea_text}' could include: 1) Research and validate the concept, 2) Create a detailed plan, 3) Identify resources and partnerships needed, 4) Build a prototype or MVP, 5) Test and gather feedback, 6) Iterate and improve."
     
-    elif "challenge" in question_lower or "problem" in question_lower or "difficulty" in question_lower:
+    elif intent == "challenges":
         return f"Potential challenges for '{idea_text}' might include: technical complexity, resource requirements, market adoption, or regulatory considerations. However, these challenges also present opportunities for creative problem-solving and innovation."
     
-    elif "cost" in question_lower or "expensive" in question_lower or "budget" in question_lower:
+    elif intent == "cost":
         return f"The cost of implementing '{idea_text}' would depend on various factors like scale, technology choices, and resources. Consider starting with a lean approach, using open-source tools where possible, and scaling gradually based on results."
     
     else:
         # Generic helpful answer
         return f"Regarding '{idea_text}': {question}. This is an interesting aspect to explore. The idea offers potential for innovation in {topic or 'this area'}. To dive deeper, consider researching similar solutions, identifying key stakeholders, and thinking about how to make this idea unique and valuable."
 
+FOLLOWUP_QUESTIONS = (
+    "What are the key challenges in implementing this?",
+    "Who would benefit most from this idea?",
+    "What are the next steps to get started?",
+    "How does this compare to existing solutions?",
+    "What resources would be needed?",
+)
+
 def generate_followup_questions(original_question: str) -> List[str]:
     """Generate suggested follow-up questions."""
-    followups = [
-        "What are the key challenges in implementing this?",
-        "Who would benefit most from this idea?",
-        "What are the next steps to get started?",
-        "How does this compare to existing solutions?",
-        "What resources would be needed?"
-    ]
     # Return 3 random followups
-    return random.sample(followups, k=min(3, len(followups)))
+    return random.sample(FOLLOWUP_QUESTIONS, k=min(3, len(FOLLOWUP_QUESTIONS)))
+
+SUGGESTED_QUESTIONS = (
+    "Tell me more about this idea",
+    "What problem does it solve?",
+    "Who would benefit from this?",
+    "What makes it unique?",
+    "How would you implement it?",
+)
 
 @app.post("/conversation", response_model=ConversationResponse)
 async def conversation(request: ConversationRequest):
     """Handle conversational messages and extract information."""
     try:
-        message_lower = request.message.lower()
-        extracted_topic = None
-        extracted_name = None
-        should_proceed = False
-        
-        # Extract name
-        name_patterns = [
-            r"(?:my name is|i'm|i am|call me|this is)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
-            r"^([A-Z][a-z]+)\s+(?:here|speaking)"
-        ]
-        for pattern in name_patterns:
-            match = re.search(pattern, request.message, re.IGNORECASE)
-            if match:
-                extracted_name = match.group(1).strip()
-                break
-        
-        # Extract topic/idea
-        # Look for idea-related keywords
-        idea_keywords = ['idea', 'thinking about', 'want to', 'problem', 'challenge', 'trying to', 'explore']
-        if any(keyword in message_lower for keyword in idea_keywords):
-            # Extract sentences that might contain the idea
-            sentences = re.split(r'[.!?]+', request.message)
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if len(sentence) > 20 and any(keyword in sentence.lower() for keyword in idea_keywords):
-                    # Clean up the sentence
-                    sentence_lower = sentence.lower()
-                    for phrase in ['i have an idea for', 'i want to', "i'm thinking about", 'i am thinking about']:
-                        sentence_lower = sentence_lower.replace(phrase, '').strip()
-                    if sentence_lower and len(sentence_lower) > 10:
-                        extracted_topic = sentence_lower.capitalize()[:100]
-                        break
-        
-        # If no clear topic found, use the message if it's substantial
-        if not extracted_topic and len(request.message) > 30:
-            # Remove greeting words
-            cleaned = message_lower
-            for word in ['hello', 'hi', 'hey', 'my name is', "i'm", 'i am', 'call me']:
-                cleaned = cleaned.replace(word, '', 1)
-            cleaned = cleaned.strip()
-            if len(cleaned) > 15:
-                extracted_topic = cleaned.capitalize()[:100]  # Limit length
-        
-        # Generate conversational response
-        response = generate_conversational_response(request.message, request.conversation_history, extracted_topic)
-        
-        # Determine if we should proceed (have topic and enough conversation)
-        if extracted_topic and len(request.conversation_history or []) >= 2:
-            should_proceed = True
-        
-        # Generate suggested questions
-        suggested_questions = [
-            "Tell me more about this idea",
-            "What problem does it solve?",
-            "Who would benefit from this?",
-            "What makes it unique?",
-            "How would you implement it?"
-        ]
-        
-        return {
-            "response": response,
-            "extracted_topic": extracted_topic,
-            "extracted_name": extracted_name,
-            "should_proceed": should_proceed,
-            "suggested_questions": suggested_questions[:3]
-        }
+        with span("intents"):
+            analysis = analyze_message(request.message)
+        return await conversation_turn(request.message, analysis, request.session_id, request.conversation_history)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
-def generate_conversational_response(message: str, history: Optional[List[dict]] = None, topic: Optional[str] = None) -> str:
+async def conversation_turn(message: str, analysis: MessageAnalysis, session_id: Optional[str] = None, history: Optional[List[dict]] = None) -> dict:
+    """Reply to one finished message and record it in the session, if any."""
+    extracted_topic = analysis.extracted_topic
+    extracted_name = analysis.extracted_name
+    should_proceed = False
+
+    session = None
+    history = history or []
+    if session_id:
+        store = get_session_store()
+        session = await store.get(session_id) or ConversationSession(session_id)
+        # Fall back to what earlier turns told us.
+        extracted_name = extracted_name or session.name
+        extracted_topic = extracted_topic or session.topic
+        history = session.history
+
+    # Generate conversational response
+    response = generate_conversational_response(message, history, extracted_topic, analysis.reply_intent)
+
+    # Determine if we should proceed (have topic and enough conversation)
+    message_count = session.message_count if session else len(history)
+    if extracted_topic and message_count >= 2:
+        should_proceed = True
+
+    if session:
+        def add_turn(latest: ConversationSession) -> None:
+            # Re-applied to the stored copy, which may hold turns from other workers.
+            latest.remember(analysis.extracted_name, analysis.extracted_topic)
+            latest.vibe.update(message)
+            latest.record("user", message)
+            latest.record("assistant", response)
+
+        await store.update(session_id, add_turn)
+        get_session_log().append_many(session_id, "turn", [
+            {"type": "user", "text": message, "name": extracted_name, "topic": extracted_topic},
+            {"type": "assistant", "text": response},
+        ])
+
+    return {
+        "response": response,
+        "extracted_topic": extracted_topic,
+        "extracted_name": extracted_name,
+        "should_proceed": should_proceed,
+        "suggested_questions": list(SUGGESTED_QUESTIONS[:3]),
+        "session_id": session_id
+    }
+
+def conversation_draft(analyzer: TranscriptAnalyzer, session: Optional[ConversationSession]) -> dict:
+    """What a partial transcript has settled so far, plus a provisional reply.
+
+    Name and topic are only reported once decided (or known from earlier
+    turns). `should_proceed` is null until decidable: with fewer than two
+    earlier messages it is already false, and with a known topic already true.
+    """
+    decided = analyzer.decided()
+    intent = analyzer.intent
+    name = decided.extracted_name or (session.name if session else None)
+    topic = decided.extracted_topic or (session.topic if session else None)
+    message_count = session.message_count if session else 0
+    should_proceed = False if message_count < 2 else (True if topic else None)
+    history = session.history if session else []
+    return {
+        "type": "draft",
+        "reply_intent": intent,
+        "intent_decided": decided.reply_intent is not None,
+        "extracted_name": name,
+        "extracted_topic": topic,
+        "should_proceed": should_proceed,
+        "response": generate_conversational_response(analyzer.text, history, topic, intent),
+    }
+
+@app.websocket("/ws/conversation")
+async def conversation_socket(websocket: WebSocket, session_id: Optional[str] = Query(None)):
+    """Realtime /conversation for voice: partial transcripts in, drafts and replies out.
+
+    Client frames (JSON):
+      {"type": "partial", "text": "..."}  the whole utterance so far, resent as it grows or is revised
+      {"type": "final", "text": "..."}    the finished utterance ("text" defaults to the last partial)
+    Server frames:
+      {"type": "ready", "session_id": ...}   once, on connect
+      {"type": "draft", ...}                 when a partial changes the intent or what's decided
+      {"type": "reply", ...}                 a ConversationResponse, after each final
+      {"type": "error", "detail": ...}
+
+    Only the text that changed since the previous partial is analyzed, and a
+    final costs no more than the partials before it. History lives in the
+    session (a new one if no session_id is given), as with /conversation.
+    """
+    if worker_state["state"] == "draining":
+        await websocket.close(code=1013)  # try again later (on another worker)
+        return
+    await websocket.accept()
+    session_id = session_id or uuid.uuid4().hex
+    store = get_session_store()
+    session = await store.get(session_id)
+    analyzer = TranscriptAnalyzer()
+    draft_key = None
+    socket_stats["open"] += 1
+    try:
+        await websocket.send_json({"type": "ready", "session_id": session_id})
+        while True:
+            try:
+                frame = json.loads(await websocket.receive_text())
+                kind = frame["type"]
+                text = frame.get("text")
+                if kind not in ("partial", "final") or not isinstance(text, (str, type(None))):
+                    raise ValueError
+            except (ValueError, KeyError, TypeError):
+                await websocket.send_json({"type": "error", "detail": 'expected {"type": "partial" | "final", "text": "..."}'})
+                continue
+            if text is not None and len(text) > WS_MAX_UTTERANCE_CHARS:
+                await websocket.send_json({"type": "error", "detail": f"utterance is limited to {WS_MAX_UTTERANCE_CHARS} characters"})
+                continue
+            socket_stats[kind] += 1
+            if text is not None and text != analyzer.text:
+                with span("intents"):
+                    analyzer.update(text)
+
+            if kind == "partial":
+                decided = analyzer.decided()
+                key = (analyzer.intent, decided)
+                if key != draft_key:
+                    draft_key = key
+                    socket_stats["draft"] += 1
+                    await websocket.send_json(conversation_draft(analyzer, session))
+                continue
+
+            if not analyzer.text.strip():
+                await websocket.send_json({"type": "error", "detail": "nothing to reply to"})
+                continue
+            try:
+                reply = await conversation_turn(analyzer.text, analyzer.result(), session_id)
+            except Exception as exc:
+                await websocket.send_json({"type": "error", "detail": str(exc)})
+                continue
+            socket_stats["reply"] += 1
+            await websocket.send_json({"type": "reply", **reply})
+            session = await store.get(session_id)
+            analyzer = TranscriptAnalyzer()
+            draft_key = None
+    except WebSocketDisconnect:
+        pass
+    finally:
+        socket_stats["open"] -= 1
+
+# Generic helpful responses
+GENERIC_RESPONSES = (
+    "That's a great point! Tell me more about that.",
+    "I understand. What are you hoping to achieve with this?",
+    "Interesting! What makes this important to you?",
+    "Let's explore that further. What are the key aspects?",
+    "That's valuable insight! How would this work in practice?",
+)
+
+def generate_conversational_response(message: str, history: Optional[List[dict]] = None, topic: Optional[str] = None, intent: Optional[str] = None) -> str:
     """Generate a conversational response based on user message."""
-    message_lower = message.lower()
+    if intent is None:
+        intent = analyze_message(message).reply_intent
     history = history or []
     
     # Greeting responses
-    if any(word in message_lower for word in ['hello', 'hi', 'hey']):
+    if intent == "greeting":
         return "Hello! I'm excited to help you brainstorm. What idea or problem would you like to explore today?"
     
     # Idea-related responses
-    if any(word in message_lower for word in ['idea', 'thinking about', 'want to', 'thought']):
+    if intent == "idea":
         if topic:
             return f"That's a fascinating idea about {topic}! Tell me more about it. What problem does it solve, or what makes it unique?"
         return "That sounds interesting! Tell me more about your idea. What problem does it solve, or what makes it unique?"
     
     # Problem-related responses
-    if any(word in message_lower for word in ['problem', 'challenge', 'issue', 'struggling']):
+    if intent == "problem":
         return "I see. Let's think about this problem from different angles. What have you tried so far? What obstacles are you facing?"
     
     # Implementation questions
-    if any(word in message_lower for word in ['how', 'implement', 'build', 'create', 'make']):
+    if intent == "implement":
         return "Great question! Let's break this down. What's the core concept? Who would use this? What resources would you need?"
     
     # Agreement/continuation
-    if any(word in message_lower for word in ['yes', 'sure', 'okay', 'ok', 'yeah', 'yep']):
+    if intent == "agree":
         if topic:
             return f"Perfect! Let's dive deeper into {topic}. What aspect would you like to explore first?"
         return "Great! Tell me more about what you're thinking. What's the main concept?"
     
     # More information request
-    if any(word in message_lower for word in ['more', 'elaborate', 'explain', 'tell me']):
+    if intent == "more":
         return "I'd love to hear more! Can you describe the key components? What would make this idea successful?"
     
-    # Generic helpful response
-    responses = [
-        "That's a great point! Tell me more about that.",
-        "I understand. What are you hoping to achieve with this?",
-        "Interesting! What makes this important to you?",
-        "Let's explore that further. What are the key aspects?",
-        "That's valuable insight! How would this work in practice?"
-    ]
-    
     # Use context from history if available
     if len(history) >= 2:
-        return responses[random.randint(0, len(responses) - 1)]
+        return random.choice(GENERIC_RESPONSES)
     
     return "I'm listening! Tell me more about your idea. What excites you about it?"
@@ -0,0 +1,115 @@
+"""
+Stub Model Server – local stand-in for the real model backend.
+
+Speaks the same /v1/generate protocol as `utils.llm.HTTPModelBackend`, with
+configurable latency and failure rate, so the full USE_VERTEX path can be
+load-tested offline. Like a real server it keeps each system instruction by
+`system_version` and answers 412 for a version it doesn't hold; /health
+counts how many calls carried the prefix and how many omitted it.
+
+Run locally:
+    STUB_LATENCY_MS=400 uvicorn stub_model_server:app --port 8100
+
+Then start the API with:
+    USE_VERTEX=true MODEL_BACKEND=http MODEL_ENDPOINT=http://127.0.0.1:8100 \
+        uvicorn main:app --port 8000
+"""
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from itertools import chain, cycle, islice, product
+from typing import Dict, List, Optional
+import asyncio
+import json
+import os
+import random
+
+STUB_LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "300"))
+STUB_JITTER_MS = float(os.getenv("STUB_JITTER_MS", "100"))
+STUB_ERROR_RATE = float(os.getenv("STUB_ERROR_RATE", "0.0"))
+STUB_PER_IDEA_MS = float(os.getenv("STUB_PER_IDEA_MS", "80"))  # streaming gap between ideas
+
+app = FastAPI(title="Stub Model Server")
+
+IDEA_SHAPES = [
+    "Prototype a {topic} pilot with a single neighborhood",
+    "Turn {topic} into a weekly community challenge",
+    "Bundle {topic} with an existing subscription service",
+    "Run {topic} as a volunteer-led pop-up event",
+    "Open-source the tooling behind {topic}",
+    "Pair {topic} with a local school curriculum",
+    "Crowdfund {topic} through micro-donations",
+    "Offer {topic} as a rewards perk for loyal customers",
+    "Map {topic} hotspots with citizen-reported data",
+    "Partner with city transit for {topic} outreach",
+]
+# Fillers for requests that want more ideas than there are shapes.
+AUDIENCES = [
+    "students", "retirees", "busy parents", "small businesses",
+    "newcomers", "commuters", "teenagers", "remote workers",
+]
+TWISTS = [
+    "starting with a one-week trial", "with a public progress board", "run entirely by volunteers",
+    "funded by a local sponsor", "built around a monthly event", "with a printed starter kit",
+]
+
+
+# system_version -> system instruction, as received
+SYSTEM_PREFIXES: Dict[str, str] = {}
+prefix_stats = {"received": 0, "omitted": 0, "misses": 0}
+
+
+class GenerateRequest(BaseModel):
+    prompt: str
+    system: Optional[str] = None
+    system_version: Optional[str] = None
+    topic: Optional[str] = None
+    max_ideas: int = Field(5, ge=1)
+    temperature: float = 0.8
+    stream: bool = False
+
+
+@app.get("/health")
+async def health_check():
+    return {"status": "ok", "latency_ms": STUB_LATENCY_MS, "prefix": prefix_stats}
+
+
+@app.post("/v1/generate")
+async def generate(request: GenerateRequest):
+    """Sleep for the configured latency, then return templated ideas."""
+    if request.system is not None:
+        prefix_stats["received"] += 1
+        if request.system_version:
+            SYSTEM_PREFIXES[request.system_version] = request.system
+    elif request.system_version:
+        if request.system_version not in SYSTEM_PREFIXES:
+            prefix_stats["misses"] += 1
+            raise HTTPException(status_code=412, detail="unknown system_version; resend system")
+        prefix_stats["omitted"] += 1
+    delay = max(0.0, STUB_LATENCY_MS + random.uniform(-STUB_JITTER_MS, STUB_JITTER_MS))
+    await asyncio.sleep(delay / 1000)
+    if random.random() < STUB_ERROR_RATE:
+        raise HTTPException(status_code=503, detail="stub: injected failure")
+    topic = request.topic or request.prompt
+    ideas = [{"text": text} for text in idea_texts(topic, request.max_ideas)]
+    if request.stream:
+        return StreamingResponse(stream_ideas(ideas), media_type="application/x-ndjson")
+    return {"ideas": ideas}
+
+
+def idea_texts(topic: str, count: int) -> List[str]:
+    """`count` ideas: every shape once, then shapes with varied audiences and twists, cycling if needed."""
+    plain = (shape.format(topic=topic) for shape in random.sample(IDEA_SHAPES, len(IDEA_SHAPES)))
+    combos = list(product(IDEA_SHAPES, AUDIENCES, TWISTS))
+    random.shuffle(combos)
+    varied = (f"{shape.format(topic=topic)} for {audience}, {twist}" for shape, audience, twist in combos)
+    return list(islice(cycle(chain(plain, varied)), count))
+
+
+async def stream_ideas(ideas):
+    """Emit one idea per line, spaced like token-by-token generation."""
+    for i, idea in enumerate(ideas):
+        if i:
+            await asyncio.sleep(STUB_PER_IDEA_MS / 1000)
+        yield json.dumps(idea) + "\n"
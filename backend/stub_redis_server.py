@@ -0,0 +1,186 @@
+"""
+Stub Redis Server – local stand-in for a shared session store.
+
+A tiny asyncio server speaking enough of the Redis protocol (RESP) for
+`utils.sessions.RedisSessionStore`: PING, HELLO, GET, SET [EX|PX], DEL, EXISTS,
+EXPIRE, TTL, plus WATCH/MULTI/EXEC/DISCARD/UNWATCH for its check-and-set
+updates. Data lives in memory, so several API workers can share
+conversation sessions locally without installing Redis.
+
+Run locally:
+    python stub_redis_server.py --port 6380
+
+Then start the API with:
+    SESSION_STORE=redis SESSION_REDIS_URL=redis://127.0.0.1:6380/0 \
+        uvicorn main:app --workers 4 --port 8000
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+_data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+_versions: Dict[bytes, int] = {}  # bumped on every write, for WATCH
+
+
+def _touch(key: bytes) -> None:
+    _versions[key] = _versions.get(key, 0) + 1
+
+
+def _get(key: bytes) -> Optional[bytes]:
+    entry = _data.get(key)
+    if entry is None:
+        return None
+    value, expires_at = entry
+    if expires_at is not None and expires_at <= time.monotonic():
+        del _data[key]
+        return None
+    return value
+
+
+def _null(resp3: bool) -> bytes:
+    return b"_\r\n" if resp3 else b"$-1\r\n"
+
+
+def _bulk(value: Optional[bytes], resp3: bool = False) -> bytes:
+    return _null(resp3) if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _int(value: int) -> bytes:
+    return b":%d\r\n" % value
+
+
+def execute(args: List[bytes], resp3: bool = False) -> bytes:
+    command = args[0].upper()
+    if command == b"PING":
+        return b"+PONG\r\n"
+    if command in (b"CLIENT", b"SELECT"):
+        return b"+OK\r\n"
+    if command == b"GET":
+        return _bulk(_get(args[1]), resp3)
+    if command == b"SET":
+        expires_at = None
+        options = [a.upper() for a in args[3:]]
+        if b"EX" in options:
+            expires_at = time.monotonic() + int(args[3 + options.index(b"EX") + 1])
+        elif b"PX" in options:
+            expires_at = time.monotonic() + int(args[3 + options.index(b"PX") + 1]) / 1000
+        _data[args[1]] = (args[2], expires_at)
+        _touch(args[1])
+        return b"+OK\r\n"
+    if command == b"DEL":
+        deleted = [key for key in args[1:] if _data.pop(key, None) is not None]
+        for key in deleted:
+            _touch(key)
+        return _int(len(deleted))
+    if command == b"EXISTS":
+        return _int(sum(1 for key in args[1:] if _get(key) is not None))
+    if command == b"EXPIRE":
+        value = _get(args[1])
+        if value is None:
+            return _int(0)
+        _data[args[1]] = (value, time.monotonic() + int(args[2]))
+        _touch(args[1])
+        return _int(1)
+    if command == b"TTL":
+        if _get(args[1]) is None:
+            return _int(-2)
+        expires_at = _data[args[1]][1]
+        return _int(-1 if expires_at is None else int(expires_at - time.monotonic()))
+    return b"-ERR unknown command '%s'\r\n" % command.decode(errors="replace").encode()
+
+
+async def read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.split()  # inline command, e.g. from telnet
+    args = []
+    for _ in range(int(line[1:])):
+        size = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(size + 2))[:-2])
+    return args
+
+
+class Connection:
+    """Per-client state: protocol version, watched key versions, queued commands."""
+
+    def __init__(self):
+        self.resp3 = False  # redis-py >= 8 asks for RESP3 with HELLO 3
+        self.watched: Dict[bytes, int] = {}
+        self.queued: Optional[List[List[bytes]]] = None  # None outside MULTI
+
+    def execute(self, args: List[bytes]) -> bytes:
+        command = args[0].upper()
+        if command == b"HELLO":
+            self.resp3 = len(args) > 1 and args[1] == b"3"
+            proto = b"3" if self.resp3 else b"2"
+            header = b"%2\r\n" if self.resp3 else b"*4\r\n"
+            return header + b"$6\r\nserver\r\n$4\r\nstub\r\n$5\r\nproto\r\n:" + proto + b"\r\n"
+        if command == b"WATCH":
+            if self.queued is not None:
+                return b"-ERR WATCH inside MULTI is not allowed\r\n"
+            for key in args[1:]:
+                self.watched.setdefault(key, _versions.get(key, 0))
+            return b"+OK\r\n"
+        if command == b"UNWATCH":
+            self.watched.clear()
+            return b"+OK\r\n"
+        if command == b"MULTI":
+            if self.queued is not None:
+                return b"-ERR MULTI calls can not be nested\r\n"
+            self.queued = []
+            return b"+OK\r\n"
+        if command == b"DISCARD":
+            if self.queued is None:
+                return b"-ERR DISCARD without MULTI\r\n"
+            self.queued = None
+            self.watched.clear()
+            return b"+OK\r\n"
+        if command == b"EXEC":
+            if self.queued is None:
+                return b"-ERR EXEC without MULTI\r\n"
+            queued, self.queued = self.queued, None
+            changed = any(_versions.get(key, 0) != version for key, version in self.watched.items())
+            self.watched.clear()
+            if changed:
+                return b"_\r\n" if self.resp3 else b"*-1\r\n"
+            # One event loop, no awaits: the queued commands run atomically.
+            return b"*%d\r\n" % len(queued) + b"".join(execute(queued_args, self.resp3) for queued_args in queued)
+        if self.queued is not None:
+            self.queued.append(args)
+            return b"+QUEUED\r\n"
+        return execute(args, self.resp3)
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    connection = Connection()
+    try:
+        while True:
+            args = await read_command(reader)
+            if args is None:
+                break
+            if args:
+                writer.write(connection.execute(args))
+                await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int) -> None:
+    server = await asyncio.start_server(handle, host, port)
+    print(f"stub redis listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Redis server for local testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
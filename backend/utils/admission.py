@@ -0,0 +1,262 @@
+"""
+Admission Control for AI Brainstorming Agent
+--------------------------------------------
+Sits in front of idea generation so overload degrades predictably:
+
+  • Token buckets cap request rate (429 + Retry-After): one per remote
+    address, and inside it one per session or client id, so rotating ids
+    never buys a fresh allowance. Every bucket of a kind has the same burst;
+    a request costing more than it could never be afforded and gets 413
+    without Retry-After. (/brainstorm/batch is priced so its largest
+    accepted batch always fits.)
+  • Generation runs in a fixed number of slots. Waiters queue by deadline
+    (earliest round end first), so a Lightning Round about to close is
+    served before an untimed request. Round ends are tracked server-side
+    per session; a client-sent `phase_end_at` can only move its own round
+    later, never earlier, so it can't be used to jump the queue.
+  • Requests that can no longer finish before their round ends are shed
+    instead of doing wasted work, and a full queue rejects new arrivals
+    (503 + Retry-After) instead of growing without bound.
+
+Expected service time is an EWMA of observed generation times; it drives
+both the "can this still make it" check and Retry-After estimates.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+ADMISSION_RATE = float(os.getenv("ADMISSION_RATE", "5"))  # requests/sec per client; 0 disables
+ADMISSION_BURST = float(os.getenv("ADMISSION_BURST", "20"))
+ADMISSION_ADDRESS_RATE = float(os.getenv("ADMISSION_ADDRESS_RATE", "20"))  # requests/sec per remote address, all its sessions together
+ADMISSION_ADDRESS_BURST = float(os.getenv("ADMISSION_ADDRESS_BURST", "80"))
+ADMISSION_SLOTS = int(os.getenv("ADMISSION_SLOTS", "16"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))
+ADMISSION_UNTIMED_DEADLINE_SEC = float(os.getenv("ADMISSION_UNTIMED_DEADLINE_SEC", "30"))
+ADMISSION_MAX_CLIENTS = int(os.getenv("ADMISSION_MAX_CLIENTS", "10000"))
+ADMISSION_MAX_ROUNDS = int(os.getenv("ADMISSION_MAX_ROUNDS", "10000"))
+
+
+class AdmissionRejected(Exception):
+    """Request refused by admission control; maps to an HTTP status."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[float] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        # None: retrying the same request will never succeed.
+        self.retry_after = None if retry_after is None else max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def wait(self, cost: float = 1.0) -> float:
+        """Seconds until `cost` tokens are available (0 if they are now)."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self, cost: float = 1.0) -> float:
+        """Spend `cost` tokens; returns 0 on success, else seconds until affordable."""
+        wait = self.wait(cost)
+        if not wait:
+            self.tokens -= cost
+        return wait
+
+
+class AdmissionController:
+    """Token buckets plus an earliest-deadline-first generation queue."""
+
+    def __init__(
+        self,
+        rate: float = ADMISSION_RATE,
+        burst: float = ADMISSION_BURST,
+        slots: int = ADMISSION_SLOTS,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        address_rate: float = ADMISSION_ADDRESS_RATE,
+        address_burst: float = ADMISSION_ADDRESS_BURST,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.address_rate = address_rate
+        self.address_burst = address_burst
+        self.slots = slots
+        self.max_queue = max_queue
+        self.inflight = 0
+        self.waiting = 0
+        self.service_time = 0.5  # seconds, EWMA of observed generation time
+        self._buckets: "OrderedDict[Tuple[str, Optional[str]], TokenBucket]" = OrderedDict()
+        self._rounds: "OrderedDict[Tuple[str, str], float]" = OrderedDict()  # (session, mode) -> wall-clock end
+        self._queue: List[Tuple[float, int, asyncio.Future]] = []  # (deadline, seq, waiter)
+        self._seq = itertools.count()
+        self.stats = {
+            "admitted": 0,
+            "queued": 0,
+            "rate_limited": 0,
+            "over_burst": 0,
+            "shed_deadline": 0,
+            "shed_queue_full": 0,
+            "expired_in_queue": 0,
+        }
+
+    # -- rate limiting --------------------------------------------------------
+    @property
+    def max_cost(self) -> float:
+        """Largest request cost that a full set of buckets can afford."""
+        return min(self.burst, self.address_burst)
+
+    def check_rate(self, client: Tuple[str, Optional[str]], cost: float = 1.0) -> None:
+        """Charge the (address, session) buckets or raise 429 (413 if never affordable)."""
+        if self.rate <= 0:
+            return
+        if cost > self.max_cost:
+            self.stats["over_burst"] += 1
+            raise AdmissionRejected(413, f"request costs {cost:g} tokens but the per-client burst is {self.max_cost:g}; split it up")
+        address, sub = client
+        buckets = [self._bucket((address, None), self.address_rate, self.address_burst)]
+        if sub:
+            buckets.append(self._bucket((address, sub), self.rate, self.burst))
+        # Both must afford it before either is charged.
+        wait = max(bucket.wait(cost) for bucket in buckets)
+        if wait:
+            self.stats["rate_limited"] += 1
+            raise AdmissionRejected(429, "rate limit exceeded", wait)
+        for bucket in buckets:
+            bucket.tokens -= cost
+
+    def _bucket(self, key: Tuple[str, Optional[str]], rate: float, burst: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst)
+            while len(self._buckets) > ADMISSION_MAX_CLIENTS:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(key)
+        return bucket
+
+    # -- scheduling -----------------------------------------------------------
+    def round_end(self, session: Optional[str], mode: str, duration: Optional[float], claimed: Optional[float] = None) -> Optional[float]:
+        """Wall-clock end of the caller's current round, as this server tracks it.
+
+        A session's round starts the first time it is seen in a mode and
+        lasts `duration`. A `claimed` end (the client's phase_end_at) is only
+        honoured if it is later than that, and never beyond now + duration.
+        Untimed rounds (duration None) have no end.
+        """
+        if duration is None:
+            return None
+        now = time.time()
+        latest = now + duration
+        key = (session, mode) if session else None
+        end = self._rounds.get(key) if key else None
+        if end is None or end <= now:
+            end = latest
+        if claimed is not None and claimed > end:
+            end = min(claimed, latest)
+        if key:
+            self._rounds[key] = end
+            self._rounds.move_to_end(key)
+            while len(self._rounds) > ADMISSION_MAX_ROUNDS:
+                self._rounds.popitem(last=False)
+        return end
+
+    def deadline_for(self, phase_end: Optional[float]) -> float:
+        """Monotonic deadline from a wall-clock round end (or the untimed default)."""
+        if phase_end is None:
+            return time.monotonic() + ADMISSION_UNTIMED_DEADLINE_SEC
+        return time.monotonic() + (phase_end - time.time())
+
+    def estimated_wait(self) -> float:
+        """Rough time until a newly queued request would get a slot."""
+        return (self.waiting // max(1, self.slots) + 1) * self.service_time
+
+    def check_deadline(self, deadline: float) -> None:
+        """Raise 503 if the request cannot finish before its round ends."""
+        remaining = deadline - time.monotonic()
+        wait = self.estimated_wait() if self.inflight >= self.slots else 0.0
+        if remaining < wait + self.service_time:
+            self.stats["shed_deadline"] += 1
+            raise AdmissionRejected(503, "round ends before this request could finish", wait + self.service_time)
+
+    @asynccontextmanager
+    async def slot(self, deadline: float):
+        """Hold one generation slot for the duration of the block."""
+        self.check_deadline(deadline)
+        if self.inflight < self.slots:
+            self.inflight += 1
+        else:
+            await self._wait_for_slot(deadline)
+        self.stats["admitted"] += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.service_time = 0.8 * self.service_time + 0.2 * (time.monotonic() - started)
+            self._release()
+
+    async def _wait_for_slot(self, deadline: float) -> None:
+        if self.waiting >= self.max_queue:
+            self.stats["shed_queue_full"] += 1
+            raise AdmissionRejected(503, "generation queue is full", self.estimated_wait())
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (deadline, next(self._seq), waiter))
+        self.waiting += 1
+        self.stats["queued"] += 1
+        try:
+            # Past this point the result would arrive after the round closed.
+            await asyncio.wait_for(asyncio.shield(waiter), max(0.0, deadline - time.monotonic() - self.service_time))
+        except asyncio.TimeoutError:
+            if waiter.cancel():
+                self.waiting -= 1
+                self.stats["expired_in_queue"] += 1
+                raise AdmissionRejected(503, "round ended while queued", self.estimated_wait()) from None
+            waiter.result()  # granted (or shed) at the same moment: honour that
+        except asyncio.CancelledError:
+            if waiter.cancel():
+                self.waiting -= 1
+            elif waiter.exception() is None:
+                self._release()  # slot was granted just as we were cancelled
+            raise
+
+    def _release(self) -> None:
+        """Hand the freed slot to the most urgent waiter that can still make it."""
+        self.inflight -= 1
+        now = time.monotonic()
+        while self._queue and self.inflight < self.slots:
+            deadline, _, waiter = heapq.heappop(self._queue)
+            if waiter.done():
+                continue  # gave up while queued; already uncounted
+            self.waiting -= 1
+            if deadline - now < self.service_time:
+                self.stats["expired_in_queue"] += 1
+                waiter.set_exception(AdmissionRejected(503, "round ended while queued", self.service_time))
+                continue
+            self.inflight += 1
+            waiter.set_result(None)
+
+    def snapshot(self) -> Dict:
+        return {
+            **self.stats,
+            "inflight": self.inflight,
+            "slots": self.slots,
+            "queue_depth": self.waiting,
+            "service_time_sec": round(self.service_time, 4),
+        }
+
+
+admission = AdmissionController()
@@ -0,0 +1,246 @@
+"""
+Response Cache for AI Brainstorming Agent
+-----------------------------------------
+Two-tier cache used by /brainstorm and /ask-about-idea:
+
+  • Tier 1: in-memory LRU with per-entry TTL.
+  • Tier 2: optional SQLite file that survives restarts (set CACHE_DB_PATH).
+    Reads and writes run in a worker thread, never on the event loop, and
+    expired rows are purged when a worker opens the file and every
+    CACHE_PURGE_EVERY writes after that.
+
+Concurrent misses for the same key are collapsed into a single upstream
+computation (single-flight). Hit/miss/eviction counters are kept per cache
+so the sizes can be tuned from `/cache/stats`.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.metrics import span
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_TTL_SEC = float(os.getenv("CACHE_TTL_SEC", "600"))
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "")  # empty → memory tier only
+CACHE_PURGE_EVERY = int(os.getenv("CACHE_PURGE_EVERY", "1000"))  # disk writes between purges of expired rows
+
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of free text for cache keys."""
+    return " ".join(text.lower().split())
+
+
+def make_key(*parts: Any) -> str:
+    """Build a stable string key from a normalized request tuple."""
+    return json.dumps(parts, separators=(",", ":"), default=str)
+
+
+class DiskTier:
+    """SQLite-backed second tier; values are stored as JSON text.
+
+    The connection is opened on first use, and again in a forked child, so a
+    worker never uses a connection inherited from the preloading master.
+    """
+
+    def __init__(self, path: str, purge_every: int = CACHE_PURGE_EVERY):
+        self.path = path
+        self.purge_every = purge_every
+        self.purged = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._pid = 0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL,"
+                " value TEXT NOT NULL, expires_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.commit()
+            self._db, self._pid = conn, os.getpid()
+            self._writes = 0
+            self._purge()
+        return self._db
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), expires_at),
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes >= self.purge_every:
+                self._writes = 0
+                self._purge()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows now; returns how many."""
+        with self._lock:
+            return self._purge()
+
+    def _purge(self) -> int:
+        # Caller holds the lock.
+        cur = self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        self._conn.commit()
+        self.purged += cur.rowcount
+        return cur.rowcount
+
+
+class ResponseCache:
+    """LRU + TTL memory tier, optional disk tier, single-flight on miss.
+
+    Values must be JSON-serializable (plain dicts/lists) so both tiers hold
+    the same shape.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl: float = CACHE_TTL_SEC,
+        disk: Optional[DiskTier] = None,
+    ):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk = disk
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "disk_errors": 0,
+        }
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return a cached value or None, checking memory then disk."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at >= time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return value
+            del self._entries[key]
+            self.stats["expirations"] += 1
+        if self.disk is not None:
+            try:
+                value = await asyncio.to_thread(self.disk.get, self.namespace, key)
+            except sqlite3.Error:
+                self.stats["disk_errors"] += 1
+                return None
+            if value is not None:
+                self.stats["disk_hits"] += 1
+                self._remember(key, value)
+                return value
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        self._remember(key, value)
+        await self._store(key, value)
+
+    async def _store(self, key: str, value: Any) -> None:
+        if self.disk is None:
+            return
+        try:
+            await asyncio.to_thread(self.disk.set, self.namespace, key, value, time.time() + self.ttl)
+        except sqlite3.Error:
+            self.stats["disk_errors"] += 1
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value, or compute it once for all concurrent callers."""
+        with span("cache_lookup"):
+            value = await self.get(key)
+        if value is not None:
+            return value
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The leader was cancelled, not us: take over the computation.
+                return await self.get_or_compute(key, compute)
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so an unawaited failure doesn't log a warning.
+            future.exception()
+            raise
+        else:
+            self._remember(key, value)
+            future.set_result(value)
+        finally:
+            del self._inflight[key]
+        # Waiters already have the value; only the leader waits for the disk write.
+        await self._store(key, value)
+        return value
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"] + self.stats["coalesced"]
+        served = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+        }
+
+
+_disk: Optional[DiskTier] = DiskTier(CACHE_DB_PATH) if CACHE_DB_PATH else None
+
+brainstorm_cache = ResponseCache("brainstorm", disk=_disk)
+answer_cache = ResponseCache("ask_about_idea", disk=_disk)
+
+
+def cache_stats() -> dict:
+    return {
+        "disk_tier": CACHE_DB_PATH or None,
+        "disk_purged": _disk.purged if _disk is not None else 0,
+        "brainstorm": brainstorm_cache.snapshot(),
+        "ask_about_idea": answer_cache.snapshot(),
+    }
@@ -0,0 +1,180 @@
+"""
+Idea Clustering for AI Brainstorming Agent
+------------------------------------------
+Groups ideas into themes for the Reflection & Clustering phase using
+spherical mini-batch k-means over the local TF-IDF vectors from scorer.py.
+
+A session keeps its fitted centers, so ideas arriving during a live round
+are folded in with a few mini-batch steps (and may open a new theme) instead
+of re-clustering everything from scratch.
+"""
+
+import math
+import os
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.scorer import EMBED_DIM, corpus_idf, keywords, term_counts, unit_vectors
+
+CLUSTER_MAX_K = int(os.getenv("CLUSTER_MAX_K", "12"))
+CLUSTER_BATCH_SIZE = int(os.getenv("CLUSTER_BATCH_SIZE", "256"))
+CLUSTER_ITERATIONS = int(os.getenv("CLUSTER_ITERATIONS", "30"))
+CLUSTER_OUTLIER_SIM = float(os.getenv("CLUSTER_OUTLIER_SIM", "0.15"))
+CLUSTER_MAX_SESSIONS = int(os.getenv("CLUSTER_MAX_SESSIONS", "500"))
+
+
+def auto_k(n: int) -> int:
+    """Rule-of-thumb theme count: sqrt(n / 2), kept within [1, CLUSTER_MAX_K]."""
+    return max(1, min(CLUSTER_MAX_K, n, round(math.sqrt(n / 2))))
+
+
+class ClusterModel:
+    """Spherical k-means state: unit centers plus per-center update counts."""
+
+    def __init__(self, seed: int = 0):
+        self.idf = np.ones(EMBED_DIM, dtype=np.float32)
+        self.centers = np.zeros((0, EMBED_DIM), dtype=np.float32)
+        self.counts = np.zeros(0, dtype=np.float32)
+        self.texts: List[str] = []
+        self.vectors = np.zeros((0, EMBED_DIM), dtype=np.float32)
+        self._rng = np.random.RandomState(seed)
+
+    def _seed_centers(self, vectors: np.ndarray, k: int) -> None:
+        """k-means++ seeding on a sample of the vectors."""
+        sample = vectors
+        if len(sample) > 1024:
+            sample = vectors[self._rng.choice(len(vectors), 1024, replace=False)]
+        chosen = [sample[self._rng.randint(len(sample))]]
+        dist = 1.0 - sample @ chosen[0]
+        for _ in range(1, k):
+            weights = np.clip(dist, 0, None) ** 2
+            total = weights.sum()
+            if total <= 0:
+                break
+            chosen.append(sample[self._rng.choice(len(sample), p=weights / total)])
+            dist = np.minimum(dist, 1.0 - sample @ chosen[-1])
+        self.centers = np.array(chosen, dtype=np.float32)
+        self.counts = np.zeros(len(chosen), dtype=np.float32)
+
+    def _step(self, batch: np.ndarray) -> None:
+        """One mini-batch update with per-center learning rate 1 / count."""
+        labels = (batch @ self.centers.T).argmax(axis=1)
+        for c in np.unique(labels):
+            members = batch[labels == c]
+            self.counts[c] += len(members)
+            rate = len(members) / self.counts[c]
+            center = (1 - rate) * self.centers[c] + rate * members.mean(axis=0)
+            self.centers[c] = center / (np.linalg.norm(center) or 1.0)
+
+    def fit(self, vectors: np.ndarray, k: int) -> None:
+        self._seed_centers(vectors, k)
+        for _ in range(CLUSTER_ITERATIONS):
+            if len(vectors) > CLUSTER_BATCH_SIZE:
+                batch = vectors[self._rng.choice(len(vectors), CLUSTER_BATCH_SIZE, replace=False)]
+            else:
+                batch = vectors
+            self._step(batch)
+
+    def partial_fit(self, vectors: np.ndarray, max_k: int) -> None:
+        """Fold new vectors in; poorly matched ones may start new themes."""
+        for vector in vectors:
+            if len(self.centers) < max_k and (
+                not len(self.centers) or float((self.centers @ vector).max()) < CLUSTER_OUTLIER_SIM
+            ):
+                self.centers = np.vstack([self.centers, vector[None, :]])
+                self.counts = np.append(self.counts, 1.0).astype(np.float32)
+        for start in range(0, len(vectors), CLUSTER_BATCH_SIZE):
+            self._step(vectors[start:start + CLUSTER_BATCH_SIZE])
+
+    def add(self, texts: List[str], k: Optional[int] = None, refit: bool = False) -> None:
+        """Add ideas; `refit` re-derives IDF and re-clusters from scratch."""
+        if not texts:
+            return
+        counts = term_counts(texts)
+        if refit:
+            # IDF is frozen after a full fit so appended vectors stay comparable.
+            self.idf = corpus_idf(counts)
+        vectors = unit_vectors(counts, self.idf)
+        self.texts.extend(texts)
+        self.vectors = np.vstack([self.vectors, vectors])
+        if refit or not len(self.centers):
+            self.fit(self.vectors, k or auto_k(len(self.texts)))
+        else:
+            self.partial_fit(vectors, k or auto_k(len(self.texts)))
+
+    def summarize(self) -> Dict:
+        """Assign every idea to its nearest center and describe the themes."""
+        if not self.texts:
+            return {"clusters": [], "outliers": [], "total_ideas": 0}
+        sims = self.vectors @ self.centers.T
+        labels = sims.argmax(axis=1)
+        best = sims[np.arange(len(labels)), labels]
+        outlier = best < CLUSTER_OUTLIER_SIM
+
+        doc_freq = Counter()
+        words_by_idea = [set(keywords(t)) for t in self.texts]
+        for words in words_by_idea:
+            doc_freq.update(words)
+        n = len(self.texts)
+
+        clusters = []
+        for c in range(len(self.centers)):
+            members = np.flatnonzero((labels == c) & ~outlier)
+            if not len(members):
+                continue
+            in_cluster = Counter()
+            for i in members:
+                in_cluster.update(words_by_idea[i])
+            top = sorted(in_cluster, key=lambda w: -in_cluster[w] * math.log(1 + n / doc_freq[w]))[:3]
+            representative = members[best[members].argmax()]
+            clusters.append({
+                "theme": ", ".join(top) or "misc",
+                "size": int(len(members)),
+                "representative": self.texts[representative],
+                "ideas": [self.texts[i] for i in members],
+            })
+        clusters.sort(key=lambda cluster: -cluster["size"])
+        for i, cluster in enumerate(clusters):
+            cluster["id"] = i
+        return {
+            "clusters": clusters,
+            "outliers": [self.texts[i] for i in np.flatnonzero(outlier)],
+            "total_ideas": n,
+        }
+
+
+_sessions: "OrderedDict[str, ClusterModel]" = OrderedDict()
+
+
+def cluster_ideas(texts: List[str], session_id: Optional[str] = None, k: Optional[int] = None, append: bool = False) -> Dict:
+    """Cluster ideas, optionally folding them into a session's live model.
+
+    With `append`, `texts` are new ideas for the session's existing model;
+    otherwise the given ideas are clustered from scratch (and become the
+    session's model when a session_id is given).
+    """
+    model = _sessions.get(session_id) if session_id else None
+    if model is None or not append:
+        model = ClusterModel()
+        model.add(texts, k, refit=True)
+    else:
+        model.add(texts, k)
+    if session_id:
+        _sessions[session_id] = model
+        _sessions.move_to_end(session_id)
+        while len(_sessions) > CLUSTER_MAX_SESSIONS:
+            _sessions.popitem(last=False)
+    return model.summarize()
+
+
+def session_themes(session_id: str) -> List[Dict]:
+    """Theme summaries (no member lists) of a session's live model, if any."""
+    model = _sessions.get(session_id)
+    if model is None:
+        return []
+    return [
+        {"theme": c["theme"], "size": c["size"], "representative": c["representative"]}
+        for c in model.summarize()["clusters"]
+    ]
@@ -0,0 +1,158 @@
+"""
+Near-Duplicate Detection for AI Brainstorming Agent
+---------------------------------------------------
+Per-session MinHash signatures with LSH banding. Ideas are shingled into word
+bigrams (with the session prompt's words masked, so "Gamify X with rewards"
+and "Gamify Y with rewards" collide), hashed into NUM_PERM minimum hashes and
+bucketed by band. A lookup only compares against ideas sharing a band bucket,
+so it stays sublinear as a session grows, and inserts are incremental.
+"""
+
+import os
+import re
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+NUM_PERM = int(os.getenv("DEDUPE_NUM_PERM", "64"))
+NUM_BANDS = int(os.getenv("DEDUPE_NUM_BANDS", "16"))
+DEDUPE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", "0.6"))
+DEDUPE_MAX_SESSIONS = int(os.getenv("DEDUPE_MAX_SESSIONS", "1000"))
+
+_ROWS_PER_BAND = NUM_PERM // NUM_BANDS
+_MERSENNE = np.uint64((1 << 61) - 1)
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_TOPIC = "\0topic"
+
+
+def shingles(text: str, mask: Iterable[str] = ()) -> List[str]:
+    """Word unigrams and bigrams, with masked words collapsed to one token."""
+    mask = set(mask)
+    words: List[str] = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        word = _TOPIC if word in mask else word
+        # A multi-word prompt becomes a single placeholder.
+        if not (word == _TOPIC and words and words[-1] == _TOPIC):
+            words.append(word)
+    grams = list(words)
+    grams.extend(a + " " + b for a, b in zip(words, words[1:]))
+    return grams or [text]
+
+
+def signature(grams: List[str]) -> np.ndarray:
+    """MinHash signature of a shingle set (NUM_PERM uint64 values)."""
+    hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in set(grams)), dtype=np.uint64)
+    # (a * x + b) mod p with x < 2^32 and a, b < 2^31 stays below 2^64.
+    return ((np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE).min(axis=1)
+
+
+class DedupeIndex:
+    """Incremental MinHash/LSH index over one session's ideas."""
+
+    def __init__(self, threshold: float = DEDUPE_THRESHOLD):
+        self.threshold = threshold
+        self.texts: List[str] = []
+        self._signatures = np.zeros((64, NUM_PERM), dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(NUM_BANDS)]
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _bands(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * _ROWS_PER_BAND:(i + 1) * _ROWS_PER_BAND].tobytes() for i in range(NUM_BANDS)]
+
+    def query(self, text: str, mask: Iterable[str] = (), threshold: Optional[float] = None) -> Tuple[Optional[int], np.ndarray, List[bytes]]:
+        """Return (id of best near-duplicate or None, signature, band keys)."""
+        sig = signature(shingles(text, mask))
+        bands = self._bands(sig)
+        candidates = set()
+        for band, key in enumerate(bands):
+            candidates.update(self._buckets[band].get(key, ()))
+        if not candidates:
+            return None, sig, bands
+        ids = np.fromiter(candidates, dtype=np.intp, count=len(candidates))
+        # Fraction of agreeing minhashes estimates Jaccard similarity.
+        scores = (self._signatures[ids] == sig).mean(axis=1)
+        best = int(scores.argmax())
+        if scores[best] < (self.threshold if threshold is None else threshold):
+            return None, sig, bands
+        return int(ids[best]), sig, bands
+
+    def insert(self, text: str, sig: np.ndarray, bands: List[bytes]) -> int:
+        idx = len(self.texts)
+        if idx == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.zeros_like(self._signatures)])
+        self.texts.append(text)
+        self._signatures[idx] = sig
+        for band, key in enumerate(bands):
+            self._buckets[band][key].append(idx)
+        return idx
+
+    def add(self, text: str, mask: Iterable[str] = ()) -> Optional[int]:
+        """Insert the idea unless it's a near-duplicate; return the match id if so."""
+        match, sig, bands = self.query(text, mask)
+        if match is None:
+            self.insert(text, sig, bands)
+        return match
+
+
+_sessions: "OrderedDict[str, DedupeIndex]" = OrderedDict()
+
+
+def get_dedupe_index(session_id: str) -> DedupeIndex:
+    """Return the session's index, evicting the least recently used session."""
+    index = _sessions.get(session_id)
+    if index is None:
+        index = _sessions[session_id] = DedupeIndex()
+        while len(_sessions) > DEDUPE_MAX_SESSIONS:
+            _sessions.popitem(last=False)
+    else:
+        _sessions.move_to_end(session_id)
+    return index
+
+
+def topic_mask(prompt: Optional[str]) -> List[str]:
+    """Words of the session prompt, which templates insert verbatim."""
+    return _TOKEN_RE.findall(prompt.lower()) if prompt else []
+
+
+def find_duplicates(
+    texts: List[str],
+    session_id: Optional[str] = None,
+    prompt: Optional[str] = None,
+    update: bool = True,
+    threshold: Optional[float] = None,
+) -> List[Optional[str]]:
+    """For each text, return the earlier idea it duplicates (or None).
+
+    Texts are checked against the session (if any) and against earlier texts
+    in the same call. Unique texts are added to the session when `update`.
+    """
+    mask = topic_mask(prompt)
+    threshold = DEDUPE_THRESHOLD if threshold is None else threshold
+    session = get_dedupe_index(session_id) if session_id else None
+    batch = DedupeIndex(threshold)
+    matches: List[Optional[str]] = []
+    fresh = []
+    for text in texts:
+        found, sig, bands = session.query(text, mask, threshold) if session is not None else (None, None, None)
+        if found is not None:
+            matches.append(session.texts[found])
+            continue
+        found, sig, bands = batch.query(text, mask)
+        if found is not None:
+            matches.append(batch.texts[found])
+            continue
+        batch.insert(text, sig, bands)
+        fresh.append((text, sig, bands))
+        matches.append(None)
+    if session is not None and update:
+        for text, sig, bands in fresh:
+            session.insert(text, sig, bands)
+    return matches
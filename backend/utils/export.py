@@ -0,0 +1,229 @@
+"""
+Session Export for AI Brainstorming Agent
+-----------------------------------------
+Renders a session's event log as Markdown, JSON Lines or PDF for the
+Organize & Export step.
+
+Every format is a generator of byte chunks fed by `SessionLog.replay()`, so
+a session with tens of thousands of ideas is exported in constant memory and
+can be sent with chunked transfer as it is produced. Output is deterministic
+for a given log position (no wall-clock timestamps), which is what lets a
+spooled copy serve HTTP Range requests for resumed downloads.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import textwrap
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List
+
+from utils.session_log import SessionLog
+
+EXPORT_FORMATS = {
+    "markdown": ("text/markdown; charset=utf-8", "md"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "pdf": ("application/pdf", "pdf"),
+}
+EXPORT_SPOOL_DIR = os.getenv("EXPORT_SPOOL_DIR") or os.path.join(tempfile.gettempdir(), "brainstorm-exports")
+CHUNK_BYTES = 64 * 1024
+
+
+def _chunked(pieces: Iterator[str]) -> Iterator[bytes]:
+    """Coalesce small text pieces into ~CHUNK_BYTES writes."""
+    buffer: List[str] = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_BYTES:
+            yield "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def _timestamp(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+
+
+# -----------------------------------------------------------------------------
+# text formats
+# -----------------------------------------------------------------------------
+def jsonl_lines(log: SessionLog, session_id: str, until: int, themes: List[Dict]) -> Iterator[str]:
+    """One JSON object per line: every event in order, then the themes."""
+    for event in log.replay(session_id, until=until):
+        yield json.dumps(event) + "\n"
+    for theme in themes:
+        yield json.dumps({"kind": "theme", "data": theme}) + "\n"
+
+
+def markdown_lines(log: SessionLog, session_id: str, until: int, themes: List[Dict]) -> Iterator[str]:
+    """Markdown report; each section is its own pass over the log."""
+    yield f"# Brainstorm session {session_id}\n"
+
+    yield "\n## Rounds\n\n"
+    for event in log.replay(session_id, ["phase"], until):
+        phase = event["data"]
+        yield f"- {_timestamp(event['ts'])}: {phase.get('mode')} round on \"{phase.get('prompt')}\" ({phase.get('technique')})\n"
+
+    yield "\n## Ideas\n\n"
+    count = 0
+    for event in log.replay(session_id, ["idea"], until):
+        idea = event["data"]
+        count += 1
+        novelty = idea.get("novelty")
+        suffix = f" _(novelty {novelty:.2f})_" if isinstance(novelty, (int, float)) else ""
+        yield f"{count}. {idea.get('text', '')}{suffix}\n"
+
+    if themes:
+        yield "\n## Themes\n\n"
+        for theme in themes:
+            yield f"- **{theme['theme']}** ({theme['size']} ideas), e.g. {theme['representative']}\n"
+
+    yield "\n## Q&A\n"
+    for event in log.replay(session_id, ["qa"], until):
+        qa = event["data"]
+        yield f"\n**Q ({qa.get('idea_text')}):** {qa.get('question')}\n\n{qa.get('answer')}\n"
+
+    yield "\n## Conversation\n\n"
+    for event in log.replay(session_id, ["turn"], until):
+        turn = event["data"]
+        speaker = "You" if turn.get("type") == "user" else "Agent"
+        yield f"**{speaker}:** {turn.get('text', '')}\n\n"
+
+
+# -----------------------------------------------------------------------------
+# PDF
+# -----------------------------------------------------------------------------
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # US Letter, points
+MARGIN = 54
+FONT_SIZE = 10
+LEADING = 14
+WRAP_COLUMNS = 95
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+
+
+def _pdf_escape(text: str) -> str:
+    text = text.encode("cp1252", "replace").decode("cp1252")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _plain_lines(markdown: Iterator[str]) -> Iterator[str]:
+    """Markdown report → wrapped plain-text lines for the PDF."""
+    for piece in markdown:
+        lines = piece.split("\n")
+        if piece.endswith("\n"):
+            lines.pop()
+        for line in lines:
+            line = line.replace("**", "").replace("_(", "(").replace(")_", ")").lstrip("#").strip()
+            if len(line) <= WRAP_COLUMNS:
+                yield line
+                continue
+            yield from textwrap.wrap(line, WRAP_COLUMNS, subsequent_indent="   ") or [""]
+
+
+def pdf_chunks(lines: Iterator[str]) -> Iterator[bytes]:
+    """Minimal streaming PDF 1.4 writer: Helvetica text pages.
+
+    Objects are written as pages fill up and their byte offsets remembered;
+    the page tree (object 2) and the xref table go last, so only one page of
+    text and one offset per object are ever held in memory.
+    """
+    offsets: Dict[int, int] = {}
+    page_ids: List[int] = []
+    position = 0
+    next_id = 4  # 1 catalog, 2 page tree, 3 font
+
+    def emit(obj_id: int, body: bytes) -> bytes:
+        nonlocal position
+        offsets[obj_id] = position
+        data = b"%d 0 obj\n" % obj_id + body + b"\nendobj\n"
+        position += len(data)
+        return data
+
+    def page(text_lines: List[str]) -> Iterator[bytes]:
+        nonlocal next_id
+        content = [f"BT /F1 {FONT_SIZE} Tf {LEADING} TL {MARGIN} {PAGE_HEIGHT - MARGIN} Td"]
+        content.extend(f"({_pdf_escape(line)}) '" for line in text_lines)
+        content.append("ET")
+        stream = "\n".join(content).encode("cp1252")
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        page_ids.append(page_id)
+        yield emit(content_id, b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        yield emit(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}]"
+            f" /Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode())
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    position = len(header)
+    yield header
+    yield emit(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    yield emit(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    buffer: List[str] = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) == LINES_PER_PAGE:
+            yield b"".join(page(buffer))
+            buffer = []
+    if buffer or not page_ids:
+        yield b"".join(page(buffer))
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    yield emit(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode())
+
+    xref_at = position
+    xref = [b"xref\n0 %d\n" % next_id, b"0000000000 65535 f \n"]
+    xref.extend(b"%010d 00000 n \n" % offsets[obj_id] for obj_id in range(1, next_id))
+    yield b"".join(xref)
+    yield b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (next_id, xref_at)
+
+
+# -----------------------------------------------------------------------------
+# entry points
+# -----------------------------------------------------------------------------
+def export_chunks(log: SessionLog, session_id: str, export_format: str, until: int, themes: List[Dict]) -> Iterator[bytes]:
+    """Byte chunks of the export of events up to `until`."""
+    if export_format == "jsonl":
+        return _chunked(jsonl_lines(log, session_id, until, themes))
+    if export_format == "markdown":
+        return _chunked(markdown_lines(log, session_id, until, themes))
+    if export_format == "pdf":
+        return pdf_chunks(_plain_lines(markdown_lines(log, session_id, until, themes)))
+    raise ValueError(f"Unknown export format: {export_format}")
+
+
+def export_tag(session_id: str, export_format: str, until: int, themes: List[Dict]) -> str:
+    """Stable identifier of one rendering; doubles as the HTTP ETag."""
+    raw = json.dumps([session_id, export_format, until, themes], sort_keys=True).encode()
+    return hashlib.sha1(raw).hexdigest()[:20]
+
+
+def spool_export(chunks: Iterator[bytes], session_id: str, export_format: str, tag: str) -> str:
+    """Write the export to a file once so ranged requests can seek into it.
+
+    Reuses the file while the log hasn't moved; older renderings of the same
+    session and format are removed when a new one is written.
+    """
+    os.makedirs(EXPORT_SPOOL_DIR, exist_ok=True)
+    prefix = hashlib.sha1(f"{session_id}\0{export_format}".encode()).hexdigest()[:12]
+    path = os.path.join(EXPORT_SPOOL_DIR, f"{prefix}-{tag}.{EXPORT_FORMATS[export_format][1]}")
+    if os.path.exists(path):
+        return path
+    partial = f"{path}.{os.getpid()}.part"
+    with open(partial, "wb") as out:
+        for chunk in chunks:
+            out.write(chunk)
+    os.replace(partial, path)
+    for stale in glob.glob(os.path.join(EXPORT_SPOOL_DIR, f"{prefix}-*")):
+        if stale != path and not stale.endswith(".part"):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return path
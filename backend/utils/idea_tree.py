@@ -0,0 +1,313 @@
+"""
+Idea Tree for AI Brainstorming Agent
+------------------------------------
+Lets a session "go deeper" on any idea: each idea is a node, expanding a
+node generates follow-on ideas as its children, and those can be expanded
+in turn.
+
+  • Storage is array-backed: node i is row i of a few parallel arrays
+    (parent, depth, first child, next sibling, ...) plus one list of texts,
+    so a tree of thousands of nodes is a handful of compact buffers and
+    every traversal is an iterative loop over integers.
+  • Expansion is lazy and memoized: children are generated the first time a
+    node is expanded and returned as-is on every later visit. Concurrent
+    expansions of the same node share one generation.
+  • Serialized subtrees are cached per node and only rebuilt after a
+    descendant changes.
+  • The session log is the source of truth. A change is appended as a
+    "branch" event and only then applied, by catching the tree up with the
+    log, so node ids are assigned in log order and every worker numbers
+    the same node the same way. Replay is first-writer-wins: a second
+    expansion of a node, or an attach of an idea already under the root, is
+    ignored. Trees are cached per worker and bounded
+    (IDEA_TREE_MAX_SESSIONS, IDEA_TREE_MAX_NODES); a cached tree is caught
+    up before use, and an evicted one is rebuilt from the whole log.
+"""
+
+import asyncio
+import os
+from array import array
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+IDEA_TREE_MAX_NODES = int(os.getenv("IDEA_TREE_MAX_NODES", "20000"))
+IDEA_TREE_MAX_SESSIONS = int(os.getenv("IDEA_TREE_MAX_SESSIONS", "1000"))
+SUBTREE_CACHE_SIZE = 64
+
+ROOT = 0
+NONE = -1
+
+
+class IdeaTreeFull(ValueError):
+    """The session's tree already holds IDEA_TREE_MAX_NODES ideas."""
+
+
+class IdeaTree:
+    """Array-backed idea tree; node 0 is the session topic."""
+
+    def __init__(self, topic: str, max_nodes: int = IDEA_TREE_MAX_NODES):
+        self.max_nodes = max_nodes
+        self.texts: List[str] = []
+        self.parent = array("i")
+        self.depth = array("i")
+        self.first_child = array("i")
+        self.last_child = array("i")
+        self.next_sibling = array("i")
+        self.child_count = array("i")
+        self.expanded = array("b")
+        self.changed = array("l")  # version at which the node's subtree last changed
+        self.version = 0
+        self.log_id = 0  # id of the last session-log event applied
+        self._by_text: Dict[str, int] = {}  # direct children of the root, by normalized text
+        self._subtrees: Dict[Tuple[int, int], Tuple[int, List[Dict]]] = {}
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._add(NONE, topic)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    # -- building -------------------------------------------------------------
+    def _add(self, parent: int, text: str) -> int:
+        node = len(self.texts)
+        self.texts.append(text)
+        self.parent.append(parent)
+        self.depth.append(self.depth[parent] + 1 if parent != NONE else 0)
+        self.first_child.append(NONE)
+        self.last_child.append(NONE)
+        self.next_sibling.append(NONE)
+        self.child_count.append(0)
+        self.expanded.append(0)
+        self.changed.append(self.version)
+        if parent != NONE:
+            if self.first_child[parent] == NONE:
+                self.first_child[parent] = node
+            else:
+                self.next_sibling[self.last_child[parent]] = node
+            self.last_child[parent] = node
+            self.child_count[parent] += 1
+        return node
+
+    def _touch(self, node: int) -> None:
+        """Mark `node` and its ancestors as changed (depth steps, not tree size)."""
+        self.version += 1
+        while node != NONE:
+            self.changed[node] = self.version
+            node = self.parent[node]
+
+    def _check(self, node: int) -> None:
+        if not 0 <= node < len(self.texts):
+            raise KeyError(node)
+
+    def check_room(self, count: int) -> None:
+        """Raise IdeaTreeFull unless `count` more ideas fit."""
+        if len(self.texts) + count > self.max_nodes:
+            raise IdeaTreeFull(f"idea tree is limited to {self.max_nodes} ideas")
+
+    def add_children(self, parent: int, texts: Iterable[str], expanded: bool = True) -> List[int]:
+        """Append children under `parent`; marks it expanded unless told otherwise."""
+        self._check(parent)
+        texts = [text for text in texts if text]
+        self.check_room(len(texts))
+        nodes = [self._add(parent, text) for text in texts]
+        if expanded:
+            self.expanded[parent] = 1
+        self._touch(parent)
+        return nodes
+
+    def set_topic(self, topic: str) -> None:
+        """Name the root; only possible while the tree holds nothing else."""
+        if len(self.texts) == 1:
+            self.texts[0] = topic
+            self._touch(ROOT)
+
+    def lookup(self, text: str) -> Optional[int]:
+        """Node of an idea attached under the root, if any."""
+        return self._by_text.get(" ".join(text.lower().split()))
+
+    def attach(self, text: str) -> Tuple[int, bool]:
+        """Node for an idea under the root, adding it the first time; (node, added)."""
+        node = self.lookup(text)
+        if node is not None:
+            return node, False
+        node = self.add_children(ROOT, [text], expanded=False)[0]
+        self._by_text[" ".join(text.lower().split())] = node
+        return node, True
+
+    async def expand(
+        self,
+        node: int,
+        generate: Callable[[], Awaitable[List[str]]],
+        commit: Optional[Callable[[List[str]], Awaitable[None]]] = None,
+    ) -> Tuple[List[int], bool]:
+        """Children of `node`, generating them on first expansion; (children, cached).
+
+        With `commit`, generated texts are handed to it instead of being added
+        directly; it must record them and bring the tree up to date (see
+        `apply`), which may install a rival expansion instead of this one.
+        """
+        self._check(node)
+        if self.expanded[node]:
+            return list(self.children(node)), True
+        pending = self._pending.get(node)
+        if pending is not None:
+            return list(await asyncio.shield(pending)), True
+        future = asyncio.get_running_loop().create_future()
+        self._pending[node] = future
+        try:
+            texts = [text for text in await generate() if text]
+            if commit is None:
+                children = self.add_children(node, texts)
+            else:
+                if not self.expanded[node]:
+                    await commit(texts)
+                if not self.expanded[node]:
+                    raise IdeaTreeFull(f"idea tree is limited to {self.max_nodes} ideas")
+                children = list(self.children(node))
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved; a lone caller re-raises it below
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(children)
+            return children, False
+        finally:
+            del self._pending[node]
+
+    # -- reading --------------------------------------------------------------
+    def children(self, node: int) -> Iterator[int]:
+        child = self.first_child[node]
+        while child != NONE:
+            yield child
+            child = self.next_sibling[child]
+
+    def path(self, node: int) -> List[int]:
+        """Node ids from the root down to `node`."""
+        self._check(node)
+        path = []
+        while node != NONE:
+            path.append(node)
+            node = self.parent[node]
+        path.reverse()
+        return path
+
+    def walk(self, node: int = ROOT, max_depth: Optional[int] = None) -> Iterator[int]:
+        """Pre-order traversal of a subtree with an explicit stack (no recursion limit)."""
+        self._check(node)
+        limit = self.depth[node] + max_depth if max_depth is not None else None
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            yield current
+            if limit is not None and self.depth[current] >= limit:
+                continue
+            # Push children in reverse so they come off the stack in order.
+            stack.extend(reversed(list(self.children(current))))
+
+    def node_dict(self, node: int) -> Dict[str, Any]:
+        return {
+            "id": node,
+            "parent": self.parent[node] if self.parent[node] != NONE else None,
+            "text": self.texts[node],
+            "depth": self.depth[node],
+            "expanded": bool(self.expanded[node]),
+            "children": self.child_count[node],
+        }
+
+    def subtree(self, node: int = ROOT, max_depth: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Flat pre-order node list of a subtree, cached until a descendant changes."""
+        self._check(node)
+        key = (node, -1 if max_depth is None else max_depth)
+        cached = self._subtrees.get(key)
+        if cached is not None and cached[0] >= self.changed[node]:
+            return cached[1]
+        nodes = [self.node_dict(n) for n in self.walk(node, max_depth)]
+        if len(self._subtrees) >= SUBTREE_CACHE_SIZE:
+            self._subtrees.clear()
+        self._subtrees[key] = (self.version, nodes)
+        return nodes
+
+    # -- persistence ----------------------------------------------------------
+    def to_dict(self, node: int = ROOT) -> Dict[str, Any]:
+        """Compact, JSON-able form of a subtree: parallel arrays, parents as local indexes.
+
+        Nodes stay in id order (parents always precede children), so the
+        whole tree round-trips through `from_dict()` with the same ids.
+        """
+        ids = sorted(self.walk(node))
+        local = {n: i for i, n in enumerate(ids)}
+        return {
+            "texts": [self.texts[n] for n in ids],
+            "parents": [local.get(self.parent[n], NONE) for n in ids],
+            "expanded": [self.expanded[n] for n in ids],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], max_nodes: int = IDEA_TREE_MAX_NODES) -> "IdeaTree":
+        """Rebuild a tree from `to_dict()` output; node ids follow the stored order."""
+        texts, parents = data["texts"], data["parents"]
+        tree = cls(texts[0], max_nodes)
+        for text, parent in zip(texts[1:], parents[1:]):
+            if not 0 <= parent < len(tree):
+                raise ValueError("parents must refer to earlier nodes")
+            node = tree._add(parent, text)
+            if parent == ROOT:
+                tree._by_text[" ".join(text.lower().split())] = node
+        for node, flag in enumerate(data.get("expanded", [])):
+            tree.expanded[node] = flag
+        return tree
+
+    def apply(self, event: Dict[str, Any]) -> None:
+        """Replay one "branch" event; the first expansion of a node wins.
+
+        Every worker applies the same events in the same order and drops the
+        same ones, so node ids agree everywhere.
+        """
+        if event.get("id", 0) and event["id"] <= self.log_id:
+            return  # already applied by an overlapping catch-up
+        data = event["data"]
+        self.log_id = max(self.log_id, event.get("id", 0))
+        if data.get("topic"):
+            self.set_topic(data["topic"])
+        parent = data.get("parent", ROOT)
+        try:
+            if not data.get("expanded", True):
+                for text in data["children"]:
+                    self.attach(text)
+            elif 0 <= parent < len(self.texts) and not self.expanded[parent]:
+                self.add_children(parent, data["children"])
+        except IdeaTreeFull:
+            pass  # logged by a worker that raced to fill the tree; dropped on every replay
+
+    @classmethod
+    def from_events(cls, events: Iterable[Dict[str, Any]], topic: str = "") -> "IdeaTree":
+        """Rebuild a tree by replaying its "branch" events in order."""
+        tree = cls(topic)
+        for event in events:
+            tree.apply(event)
+        return tree
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "nodes": len(self.texts),
+            "expanded": sum(self.expanded),
+            "max_depth": max(self.depth),
+            "cached_subtrees": len(self._subtrees),
+        }
+
+
+_trees: "OrderedDict[str, IdeaTree]" = OrderedDict()
+
+
+def get_idea_tree(session_id: str, load: Callable[[], IdeaTree]) -> IdeaTree:
+    """Return the session's tree, calling `load()` to build it when missing."""
+    tree = _trees.get(session_id)
+    if tree is None:
+        tree = _trees[session_id] = load()
+        while len(_trees) > IDEA_TREE_MAX_SESSIONS:
+            _trees.popitem(last=False)
+    else:
+        _trees.move_to_end(session_id)
+    return tree
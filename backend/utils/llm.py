@@ -0,0 +1,401 @@
+"""
+Model Backends for AI Brainstorming Agent
+-----------------------------------------
+Pluggable async idea-generation backends used by /brainstorm when USE_VERTEX
+is enabled. Each backend is a long-lived object: it owns one pooled client,
+caps in-flight calls with a semaphore, enforces a per-call timeout and retries
+transient failures with jittered exponential backoff.
+
+Backends:
+  • "http"   → any server speaking the /v1/generate JSON protocol
+               (see stub_model_server.py for a local stand-in). The system
+               instruction is sent once per version; after that a call
+               carries only `system_version` and the per-request suffix,
+               and the full prefix is resent only when the server answers
+               412 (it restarted, or another replica served the call).
+  • "vertex" → Gemini on Vertex AI via google-cloud-aiplatform. Context
+               caching needs PROMPT_CONTEXT_CACHE=true and a system
+               instruction of at least PROMPT_CACHE_MIN_TOKENS; the shipped
+               one is about 900 tokens, so with it caching stays off and
+               the instruction is sent on every call. `context_cache` says
+               which applies.
+"""
+
+import asyncio
+import datetime
+import json
+import os
+import random
+import re
+from typing import AsyncIterator, List, Optional
+
+from utils.metrics import span
+from utils.prompts import get_prompt_library
+
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "vertex")  # vertex or http
+MODEL_ENDPOINT = os.getenv("MODEL_ENDPOINT", "http://127.0.0.1:8100")
+MODEL_MAX_CONCURRENCY = int(os.getenv("MODEL_MAX_CONCURRENCY", "16"))
+MODEL_TIMEOUT_SEC = float(os.getenv("MODEL_TIMEOUT_SEC", "20"))
+MODEL_MAX_RETRIES = int(os.getenv("MODEL_MAX_RETRIES", "2"))
+MODEL_BACKOFF_BASE_SEC = float(os.getenv("MODEL_BACKOFF_BASE_SEC", "0.2"))
+MODEL_BACKOFF_MAX_SEC = float(os.getenv("MODEL_BACKOFF_MAX_SEC", "2.0"))
+MODEL_POOL_SIZE = int(os.getenv("MODEL_POOL_SIZE", "32"))
+MODEL_KEEPALIVE_SEC = float(os.getenv("MODEL_KEEPALIVE_SEC", "30"))
+PROMPT_CONTEXT_CACHE = os.getenv("PROMPT_CONTEXT_CACHE", "false").lower() == "true"
+PROMPT_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "2048"))  # provider minimum for cached content
+PROMPT_CACHE_TTL_SEC = int(os.getenv("PROMPT_CACHE_TTL_SEC", "3600"))
+
+
+class ModelBackendError(RuntimeError):
+    """Raised when the model backend fails after all retries."""
+
+
+class RetryableModelError(ModelBackendError):
+    """A transient failure (timeout, 429, 5xx) worth retrying."""
+
+
+def build_model_prompt(prompt: str, max_ideas: int, technique: dict, branch_from: Optional[str] = None) -> str:
+    """Build the per-request part of one brainstorm round.
+
+    The system instruction is attached by each backend separately, so this
+    is only the short suffix that changes between calls. With `branch_from`
+    the round grows follow-on ideas from that idea instead.
+    """
+    if branch_from:
+        return get_prompt_library().render(
+            "branching_prompt",
+            topic=prompt,
+            idea=branch_from,
+            max_ideas=max_ideas,
+            method=technique["method"],
+            prompt_hint=technique["prompt_hint"],
+        )
+    return get_prompt_library().render(
+        "base_prompt",
+        topic=prompt,
+        max_ideas=max_ideas,
+        method=technique["method"],
+        prompt_hint=technique["prompt_hint"],
+    )
+
+
+# A bullet or "1." / "2)" numbering, but not digits that belong to the idea ("3D-printed").
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def parse_idea_lines(text: str, max_ideas: int) -> List[str]:
+    """Split raw model text into clean idea strings."""
+    ideas = []
+    for line in text.splitlines():
+        line = _LIST_MARKER.sub("", line).strip()
+        if line:
+            ideas.append(line)
+        if len(ideas) >= max_ideas:
+            break
+    return ideas
+
+
+class ModelBackend:
+    """Base class: concurrency cap, per-call timeout and jittered retries."""
+
+    name = "base"
+
+    def __init__(
+        self,
+        max_concurrency: int = MODEL_MAX_CONCURRENCY,
+        timeout: float = MODEL_TIMEOUT_SEC,
+        max_retries: int = MODEL_MAX_RETRIES,
+        backoff_base: float = MODEL_BACKOFF_BASE_SEC,
+        backoff_max: float = MODEL_BACKOFF_MAX_SEC,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Private RNG so backoff jitter never touches the global random state.
+        self._rng = random.Random()
+
+    async def generate(
+        self, prompt: str, max_ideas: int, temperature: float, technique: dict, branch_from: Optional[str] = None,
+    ) -> List[str]:
+        """Return up to `max_ideas` idea strings for the prompt (or branching from one idea)."""
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                try:
+                    with span("model_call"):
+                        return await asyncio.wait_for(
+                            self._call(prompt, max_ideas, temperature, technique, branch_from),
+                            timeout=self.timeout,
+                        )
+                except (asyncio.TimeoutError, RetryableModelError) as exc:
+                    if attempt >= self.max_retries:
+                        raise ModelBackendError(
+                            f"{self.name} backend failed after {attempt + 1} attempts: {exc!r}"
+                        ) from exc
+                    await asyncio.sleep(self._backoff(attempt))
+                    attempt += 1
+
+    async def stream(self, prompt: str, max_ideas: int, temperature: float, technique: dict) -> AsyncIterator[str]:
+        """Yield idea strings as soon as the model produces them.
+
+        A failed attempt is only retried if nothing was yielded yet, so callers
+        never see duplicated ideas. The timeout applies to each idea.
+        """
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                emitted = 0
+                chunks = self._stream_call(prompt, max_ideas, temperature, technique).__aiter__()
+                try:
+                    while emitted < max_ideas:
+                        try:
+                            text = await asyncio.wait_for(chunks.__anext__(), timeout=self.timeout)
+                        except StopAsyncIteration:
+                            break
+                        emitted += 1
+                        yield text
+                    return
+                except (asyncio.TimeoutError, RetryableModelError) as exc:
+                    if emitted or attempt >= self.max_retries:
+                        raise ModelBackendError(
+                            f"{self.name} backend stream failed after {emitted} ideas: {exc!r}"
+                        ) from exc
+                    await asyncio.sleep(self._backoff(attempt))
+                    attempt += 1
+                finally:
+                    await chunks.aclose()
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return self._rng.uniform(0, cap)
+
+    async def _call(
+        self, prompt: str, max_ideas: int, temperature: float, technique: dict, branch_from: Optional[str] = None,
+    ) -> List[str]:
+        raise NotImplementedError
+
+    async def _stream_call(self, prompt: str, max_ideas: int, temperature: float, technique: dict) -> AsyncIterator[str]:
+        # Backends without native streaming emit the whole batch at once.
+        for text in await self._call(prompt, max_ideas, temperature, technique):
+            yield text
+
+    async def aclose(self) -> None:
+        """Release pooled connections."""
+
+
+class HTTPModelBackend(ModelBackend):
+    """Talks to a model server over one pooled keep-alive HTTP client."""
+
+    name = "http"
+
+    def __init__(
+        self,
+        endpoint: str = MODEL_ENDPOINT,
+        pool_size: int = MODEL_POOL_SIZE,
+        keepalive: float = MODEL_KEEPALIVE_SEC,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        import httpx
+
+        self._httpx = httpx
+        self._server_version: Optional[str] = None  # system_version the server confirmed it holds
+        self.prefix_stats = {"sent": 0, "omitted": 0, "misses": 0}
+        self._client = httpx.AsyncClient(
+            base_url=endpoint,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=keepalive,
+            ),
+            timeout=httpx.Timeout(self.timeout),
+        )
+
+    def _payload(
+        self, prompt: str, max_ideas: int, temperature: float, technique: dict, stream: bool,
+        branch_from: Optional[str] = None,
+    ) -> dict:
+        library = get_prompt_library()
+        payload = {
+            "system_version": library.version,
+            "prompt": build_model_prompt(prompt, max_ideas, technique, branch_from),
+            "topic": prompt,
+            "max_ideas": max_ideas,
+            "temperature": temperature,
+            "stream": stream,
+        }
+        # The server keeps the system instruction by version; send it only
+        # until it has confirmed this one.
+        if self._server_version != library.version:
+            payload["system"] = library.system_instruction
+            self.prefix_stats["sent"] += 1
+        else:
+            self.prefix_stats["omitted"] += 1
+        return payload
+
+    def _prefix_missed(self, status_code: int) -> bool:
+        """Whether the server answered 412: it no longer holds our system_version."""
+        if status_code != 412:
+            return False
+        self.prefix_stats["misses"] += 1
+        self._server_version = None
+        return True
+
+    def _prefix_accepted(self, payload: dict) -> None:
+        if "system" in payload:
+            self._server_version = payload["system_version"]
+
+    @staticmethod
+    def _check_status(status_code: int) -> None:
+        if status_code == 429 or status_code >= 500:
+            raise RetryableModelError(f"HTTP {status_code}")
+        if status_code >= 400:
+            raise ModelBackendError(f"HTTP {status_code}")
+
+    async def _call(
+        self, prompt: str, max_ideas: int, temperature: float, technique: dict, branch_from: Optional[str] = None,
+    ) -> List[str]:
+        for _ in range(2):
+            payload = self._payload(prompt, max_ideas, temperature, technique, stream=False, branch_from=branch_from)
+            try:
+                resp = await self._client.post("/v1/generate", json=payload)
+            except self._httpx.TransportError as exc:
+                raise RetryableModelError(str(exc)) from exc
+            if not self._prefix_missed(resp.status_code):
+                break
+        self._check_status(resp.status_code)
+        self._prefix_accepted(payload)
+        data = resp.json()
+        return [idea["text"] for idea in data.get("ideas", [])][:max_ideas]
+
+    async def _stream_call(self, prompt: str, max_ideas: int, temperature: float, technique: dict) -> AsyncIterator[str]:
+        # The server answers stream=true with one JSON idea per line (NDJSON).
+        try:
+            for attempt in range(2):
+                payload = self._payload(prompt, max_ideas, temperature, technique, stream=True)
+                async with self._client.stream("POST", "/v1/generate", json=payload) as resp:
+                    if attempt == 0 and self._prefix_missed(resp.status_code):
+                        continue
+                    self._check_status(resp.status_code)
+                    self._prefix_accepted(payload)
+                    async for line in resp.aiter_lines():
+                        if line.strip():
+                            yield json.loads(line)["text"]
+                    return
+        except self._httpx.TransportError as exc:
+            raise RetryableModelError(str(exc)) from exc
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class VertexModelBackend(ModelBackend):
+    """Gemini on Vertex AI; the SDK keeps its own pooled gRPC channel."""
+
+    name = "vertex"
+
+    def __init__(self, project: str, region: str, model_name: str, **kwargs):
+        super().__init__(**kwargs)
+        # Imported here: the SDK is slow to import and unused unless enabled.
+        import vertexai
+        from vertexai.generative_models import GenerativeModel
+
+        vertexai.init(project=project, location=region)
+        self._model_cls = GenerativeModel
+        self._model_name = model_name
+        self._model = None
+        self._model_version: Optional[str] = None
+        self.context_cache = "off: not built yet"
+
+    def _get_model(self):
+        """Model bound to the current system instruction; rebuilt when it changes."""
+        library = get_prompt_library()
+        if self._model is None or self._model_version != library.version:
+            self._model = None
+            if not PROMPT_CONTEXT_CACHE:
+                self.context_cache = "off: PROMPT_CONTEXT_CACHE=false"
+            elif library.system_tokens < PROMPT_CACHE_MIN_TOKENS:
+                self.context_cache = (
+                    f"off: system instruction is ~{library.system_tokens} tokens, "
+                    f"below PROMPT_CACHE_MIN_TOKENS={PROMPT_CACHE_MIN_TOKENS}"
+                )
+            else:
+                try:
+                    from vertexai.preview import caching
+
+                    cached = caching.CachedContent.create(
+                        model_name=self._model_name,
+                        system_instruction=library.system_instruction,
+                        ttl=datetime.timedelta(seconds=PROMPT_CACHE_TTL_SEC),
+                    )
+                    self._model = self._model_cls.from_cached_content(cached_content=cached)
+                    self.context_cache = "on"
+                except Exception as exc:
+                    self._model = None  # fall back to sending the instruction each call
+                    self.context_cache = f"off: cache creation failed ({exc!r})"
+            if self._model is None:
+                self._model = self._model_cls(self._model_name, system_instruction=library.system_instruction)
+            self._model_version = library.version
+        return self._model
+
+    async def _call(
+        self, prompt: str, max_ideas: int, temperature: float, technique: dict, branch_from: Optional[str] = None,
+    ) -> List[str]:
+        from google.api_core import exceptions as gexc
+
+        try:
+            result = await self._get_model().generate_content_async(
+                build_model_prompt(prompt, max_ideas, technique, branch_from),
+                generation_config={"temperature": temperature},
+            )
+        except (gexc.ServiceUnavailable, gexc.TooManyRequests, gexc.DeadlineExceeded, gexc.InternalServerError) as exc:
+            raise RetryableModelError(str(exc)) from exc
+        return parse_idea_lines(result.text, max_ideas)
+
+    async def _stream_call(self, prompt: str, max_ideas: int, temperature: float, technique: dict) -> AsyncIterator[str]:
+        from google.api_core import exceptions as gexc
+
+        try:
+            chunks = await self._get_model().generate_content_async(
+                build_model_prompt(prompt, max_ideas, technique),
+                generation_config={"temperature": temperature},
+                stream=True,
+            )
+            buffer = ""
+            async for chunk in chunks:
+                buffer += chunk.text
+                # Only complete lines are ideas; keep the trailing partial line.
+                *lines, buffer = buffer.split("\n")
+                for idea in parse_idea_lines("\n".join(lines), max_ideas):
+                    yield idea
+            for idea in parse_idea_lines(buffer, max_ideas):
+                yield idea
+        except (gexc.ServiceUnavailable, gexc.TooManyRequests, gexc.DeadlineExceeded, gexc.InternalServerError) as exc:
+            raise RetryableModelError(str(exc)) from exc
+
+
+_backend: Optional[ModelBackend] = None
+
+
+def get_model_backend(project: str, region: str, model_name: str) -> ModelBackend:
+    """Return the process-wide backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        if MODEL_BACKEND == "http":
+            _backend = HTTPModelBackend()
+        elif MODEL_BACKEND == "vertex":
+            _backend = VertexModelBackend(project, region, model_name)
+        else:
+            raise ValueError(f"Unknown MODEL_BACKEND: {MODEL_BACKEND}")
+    return _backend
+
+
+async def close_model_backend() -> None:
+    """Close the process-wide backend, if one was created."""
+    global _backend
+    if _backend is not None:
+        await _backend.aclose()
+        _backend = None
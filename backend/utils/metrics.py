@@ -0,0 +1,256 @@
+"""
+Metrics & Profiling for AI Brainstorming Agent
+----------------------------------------------
+Low-overhead, in-process instrumentation:
+
+  • Histograms with fixed latency buckets; observing is a bisect and two
+    additions, no locks, no allocation.
+  • `span("stage")` times a named hot-path stage (technique selection,
+    generation, model call, cache lookup, scoring, intents, ...).
+  • `MetricsMiddleware` times every request by route template and status.
+  • `render_prometheus()` writes everything in the Prometheus text format
+    for GET /metrics. Each worker reports its own process.
+  • `SamplingProfiler` is an opt-in stack sampler for one worker. It runs in
+    a background thread only while started, so it costs nothing when off.
+"""
+
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+PROFILER_MAX_SEC = float(os.getenv("PROFILER_MAX_SEC", "60"))
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class HistogramFamily:
+    """One metric name, one Histogram per label-value tuple."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.children: Dict[Tuple[str, ...], Histogram] = {}
+
+    def labels(self, *values: str) -> Histogram:
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = Histogram()
+        return child
+
+
+REQUEST_SECONDS = HistogramFamily(
+    "http_request_duration_seconds", "Request latency by route template and status.", ("method", "route", "status"),
+)
+STAGE_SECONDS = HistogramFamily(
+    "stage_duration_seconds", "Latency of named hot-path stages.", ("stage",),
+)
+
+Samples = Dict[Tuple[Tuple[str, str], ...], float]  # ((label, value), ...) -> sample value
+
+# Values read at scrape time: name -> (type, help, collect).
+_collectors: Dict[str, Tuple[str, str, Callable[[], Samples]]] = {}
+
+
+def register_collector(name: str, help_text: str, collect: Callable[[], Samples], kind: str = "gauge") -> None:
+    """Expose values computed at scrape time, e.g. cache counters."""
+    _collectors[name] = (kind, help_text, collect)
+
+
+class span:
+    """Time a block into `stage_duration_seconds{stage=...}`.
+
+        with span("scoring"):
+            ...
+    """
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, stage: str):
+        self.histogram = STAGE_SECONDS.labels(stage)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: request latency by route template, not raw path.
+
+    Timing stops when the last body chunk is sent, so streamed responses are
+    measured end to end.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = "500"
+        done = False
+
+        def observe():
+            nonlocal done
+            if done:
+                return
+            done = True
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners can't blow up cardinality.
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.labels(scope["method"], path, status).observe(time.perf_counter() - start)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            observe()
+
+
+# -----------------------------------------------------------------------------
+# Prometheus exposition
+# -----------------------------------------------------------------------------
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(pairs: Iterable[Tuple[str, str]]) -> str:
+    inner = ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs)
+    return "{" + inner + "}" if inner else ""
+
+
+def _render_family(family: HistogramFamily) -> List[str]:
+    lines = [f"# HELP {family.name} {family.help}", f"# TYPE {family.name} histogram"]
+    for values, hist in list(family.children.items()):
+        labels = list(zip(family.label_names, values))
+        cumulative = 0
+        for bound, count in zip(_bounds(hist), hist.counts):
+            cumulative += count
+            lines.append(f"{family.name}_bucket{_label_text(labels + [('le', bound)])} {cumulative}")
+        lines.append(f"{family.name}_sum{_label_text(labels)} {hist.sum:.6f}")
+        lines.append(f"{family.name}_count{_label_text(labels)} {hist.count}")
+    return lines
+
+
+def _bounds(hist: Histogram) -> List[str]:
+    return [repr(bound) for bound in hist.buckets] + ["+Inf"]
+
+
+def render_prometheus() -> str:
+    lines = _render_family(REQUEST_SECONDS) + _render_family(STAGE_SECONDS)
+    for name, (kind, help_text, collect) in _collectors.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in collect().items():
+            lines.append(f"{name}{_label_text(labels)} {value}")
+    lines.append("# HELP process_uptime_seconds Seconds since this worker imported the app.")
+    lines.append("# TYPE process_uptime_seconds gauge")
+    lines.append(f"process_uptime_seconds {time.monotonic() - _STARTED:.3f}")
+    return "\n".join(lines) + "\n"
+
+
+_STARTED = time.monotonic()
+
+
+# -----------------------------------------------------------------------------
+# sampling profiler
+# -----------------------------------------------------------------------------
+class SamplingProfiler:
+    """Samples one thread's Python stack every `interval` seconds.
+
+    Results are collapsed stacks ("outer;inner;leaf count"), the input format
+    of flamegraph.pl and speedscope. Sampling stops by itself after
+    PROFILER_MAX_SEC so a forgotten session can't run forever.
+    """
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.samples: Counter = Counter()
+        self.started_at: Optional[float] = None
+        self.interval = PROFILER_INTERVAL_MS / 1000
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms: float = PROFILER_INTERVAL_MS, target_thread: Optional[int] = None) -> None:
+        if self.running:
+            return
+        self.samples = Counter()
+        self.interval = max(interval_ms, 1.0) / 1000
+        self.started_at = time.time()
+        self._stop.clear()
+        target = target_thread or threading.main_thread().ident
+        self._thread = threading.Thread(target=self._run, args=(target,), name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, target: int) -> None:
+        deadline = time.monotonic() + PROFILER_MAX_SEC
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def snapshot(self) -> Dict:
+        return {
+            "enabled": PROFILER_ENABLED,
+            "running": self.running,
+            "pid": os.getpid(),
+            "interval_ms": self.interval * 1000,
+            "started_at": self.started_at,
+            "samples": sum(self.samples.values()),
+        }
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,217 @@
+"""
+Offline Idea Engine for AI Brainstorming Agent
+----------------------------------------------
+Generates ideas without a model, for local development, load tests and
+degraded mode. Each technique in TECHNIQUE_MAP owns a set of templates whose
+slots are filled from fragment lists:
+
+  • SCAMPER            operator × part of the problem × replacement
+  • Morphological Mix  mechanism × channel × audience
+  • Reverse Storming   way to make it worse × the inversion × who acts
+  • Role Storming      role × what they'd change × how
+  • Metaphor Remix     metaphor × what it borrows × first step
+
+The combinations form one large index space per technique. Nothing is
+materialized: an idea is decoded from its index (mixed radix), and a
+request walks the space with a seeded affine permutation, so it pulls
+exactly the `max_ideas` it needs, never repeats, and costs the same whether
+the space holds a hundred combinations or a million.
+
+Randomness comes from a `random.Random` owned by the request, seeded from
+the prompt, technique and temperature: the same request always gets the
+same ideas, and concurrent requests never share RNG state.
+"""
+
+import hashlib
+import math
+import random
+import string
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.techniques import TECHNIQUE_MAP
+
+# template -> fragment lists, one per `{slot}` in order of appearance
+Template = Tuple[str, Tuple[Tuple[str, ...], ...]]
+
+_PARTS = (
+    "the sign-up step", "the pricing", "the materials", "the first five minutes",
+    "the reward", "the reminder", "the hand-off between people", "the physical space",
+)
+_ALTERNATIVES = (
+    "a shared community version", "something people already carry", "a weekly ritual",
+    "a one-tap default", "a visible scoreboard", "a neighbour-to-neighbour swap",
+    "a local business sponsor", "a story instead of a statistic",
+)
+_MECHANISMS = (
+    "a subscription", "a deposit-and-return loop", "a friendly competition", "a peer mentor network",
+    "a micro-grant fund", "a pop-up event", "an open dataset", "a loyalty stamp card",
+    "a buddy system", "a public pledge wall",
+)
+_CHANNELS = (
+    "a mobile app", "the local library", "school assemblies", "a text-message bot",
+    "workplace canteens", "a printed zine", "a neighbourhood group chat", "sports clubs",
+)
+_AUDIENCES = (
+    "first-timers", "busy parents", "students", "retirees", "small businesses",
+    "teenagers", "newcomers to the area", "people who tried once and quit",
+)
+_WORSE = (
+    ("hide all the information", "publish everything on a single, plain-language page"),
+    ("make it expensive to take part", "make the first attempt free and the second cheaper"),
+    ("make every step take an hour", "cut the whole thing to one step that takes a minute"),
+    ("punish people for mistakes", "celebrate the first honest attempt, however small"),
+    ("make people do it alone", "pair everyone with a partner from day one"),
+    ("change the rules every week", "fix one simple rule and show it everywhere"),
+    ("ignore what people already do", "attach it to a habit people already have"),
+    ("give feedback once a year", "show progress the same day"),
+)
+_ACTORS = (
+    "volunteers", "the city council", "a local school", "a corner shop",
+    "an online community", "the people most affected",
+)
+_ROLES = (
+    "a ten-year-old", "a night-shift nurse", "a shop owner", "a bus driver", "a grandparent",
+    "a game designer", "a skeptical journalist", "a new arrival who speaks little of the language",
+)
+_CHANGES = (
+    "remove the paperwork", "make it visible from the street", "turn it into a game",
+    "make it fit in a lunch break", "let friends join in", "show who benefits",
+    "make it work without a phone", "make quitting harder than staying",
+)
+_HOWS = (
+    "with a single poster", "through a weekly meetup", "with a sticker on the door",
+    "through a short video", "with a shared spreadsheet", "through a paper map",
+)
+_METAPHORS = (
+    ("a garden", "small daily care beats big occasional effort"),
+    ("a relay race", "progress is handed on, not owned"),
+    ("a music festival", "line-ups, wristbands and a reason to show up on a date"),
+    ("a library", "borrow, return, and trust people with shared things"),
+    ("a video game level", "clear goals, instant feedback, and a next level"),
+    ("a restaurant kitchen", "stations, prep, and calling out what's needed"),
+    ("a beehive", "many small roles, one shared result"),
+    ("public transport", "fixed routes and timetables people can plan around"),
+)
+_FIRST_STEPS = (
+    "pilot it on one street", "run it for a single weekend", "test it with ten people",
+    "sketch it on one page", "borrow it from a group already doing it", "launch it at the next event",
+)
+
+ENGINES: Dict[str, Sequence[Template]] = {
+    "SCAMPER": (
+        ("Substitute {part} of {topic} with {alt}", (_PARTS, _ALTERNATIVES)),
+        ("Combine {part} of {topic} with {alt}", (_PARTS, _ALTERNATIVES)),
+        ("Adapt {alt} from elsewhere to rework {part} of {topic}", (_ALTERNATIVES, _PARTS)),
+        ("Modify {part} of {topic} so it reaches {audience}", (_PARTS, _AUDIENCES)),
+        ("Put {part} of {topic} to another use: {mechanism} for {audience}", (_PARTS, _MECHANISMS, _AUDIENCES)),
+        ("Eliminate {part} of {topic} and rely on {alt} instead", (_PARTS, _ALTERNATIVES)),
+        ("Reverse {part} of {topic}: let {audience} run it through {channel}", (_PARTS, _AUDIENCES, _CHANNELS)),
+    ),
+    "Morphological Mix": (
+        ("{mechanism} for {topic}, delivered through {channel} for {audience}", (_MECHANISMS, _CHANNELS, _AUDIENCES)),
+        ("Fuse {mechanism} with {alt} to tackle {topic} for {audience}", (_MECHANISMS, _ALTERNATIVES, _AUDIENCES)),
+    ),
+    "Reverse Storming": (
+        ("To make {topic} worse we would {worse}; instead, {actor} could {better}", (_WORSE, _ACTORS)),
+        ("If we wanted {topic} to fail for {audience}, we'd {worse}. Flip it: {better}", (_AUDIENCES, _WORSE)),
+    ),
+    "Role Storming": (
+        ("As {role}, I'd tackle {topic} and {change} {how}", (_ROLES, _CHANGES, _HOWS)),
+        ("How would {role} explain {topic} to {audience}? They'd {change} {how}", (_ROLES, _AUDIENCES, _CHANGES, _HOWS)),
+    ),
+    "Metaphor Remix": (
+        ("Treat {topic} like {metaphor}: {lesson}; {first_step}", (_METAPHORS, _FIRST_STEPS)),
+        ("Run {topic} the way {audience} would run {metaphor}: {lesson}", (_AUDIENCES, _METAPHORS)),
+    ),
+}
+
+# Slots filled from a paired fragment: (worse, better) and (metaphor, lesson).
+_PAIRED_SLOTS = {"worse": ("worse", "better"), "metaphor": ("metaphor", "lesson")}
+
+
+class IdeaSpace:
+    """Every idea one technique can produce, addressable by index."""
+
+    def __init__(self, method: str, templates: Sequence[Template]):
+        self.method = method
+        self.templates = [(text, axes, _slot_names(text, len(axes))) for text, axes in templates]
+        # offsets[i] is the first index owned by template i
+        self.offsets: List[int] = []
+        total = 0
+        for text, axes, slots in self.templates:
+            _check_axes(text, axes, slots)
+            self.offsets.append(total)
+            total += math.prod(len(axis) for axis in axes)
+        self.size = total
+
+    def __len__(self) -> int:
+        return self.size
+
+    def idea(self, index: int, topic: str) -> str:
+        """Decode one index into text (mixed radix over the template's slots)."""
+        t = bisect_right(self.offsets, index) - 1
+        text, axes, slots = self.templates[t]
+        index -= self.offsets[t]
+        fields = {"topic": topic}
+        for axis, slot in zip(reversed(axes), reversed(slots)):
+            index, digit = divmod(index, len(axis))
+            fragment = axis[digit]
+            if slot in _PAIRED_SLOTS:
+                first, second = _PAIRED_SLOTS[slot]
+                fields[first], fields[second] = fragment
+            else:
+                fields[slot] = fragment
+        idea = text.format(**fields)
+        return idea[:1].upper() + idea[1:]
+
+    def walk(self, topic: str, rng: random.Random) -> Iterator[str]:
+        """Every idea exactly once, in a seeded order, produced on demand.
+
+        `i -> (step * i + start) mod size` is a permutation when step and
+        size are coprime, so the order needs no shuffled index list.
+        """
+        size = self.size
+        start = rng.randrange(size)
+        step = rng.randrange(1, size) if size > 1 else 1
+        while math.gcd(step, size) != 1:
+            step = rng.randrange(1, size)
+        for i in range(size):
+            yield self.idea((step * i + start) % size, topic)
+
+
+def _slot_names(text: str, count: int) -> List[str]:
+    """Slots of a template in order, skipping `{topic}` and the paired second halves."""
+    skip = {"topic"} | {second for _, second in _PAIRED_SLOTS.values()}
+    names = [field for _, field, _, _ in string.Formatter().parse(text) if field and field not in skip]
+    if len(names) != count:
+        raise ValueError(f"template has {len(names)} slots but {count} fragment lists: {text}")
+    return names
+
+
+def _check_axes(text: str, axes, slots: List[str]) -> None:
+    for axis, slot in zip(axes, slots):
+        if isinstance(axis[0], tuple) != (slot in _PAIRED_SLOTS):
+            raise ValueError(f"fragment list for {{{slot}}} does not match its slot: {text}")
+
+
+# Built once at import: a few small int lists per technique, no idea text.
+SPACES: Dict[str, IdeaSpace] = {method: IdeaSpace(method, templates) for method, templates in ENGINES.items()}
+
+
+def idea_space(method: str) -> IdeaSpace:
+    """The index space for a technique (unknown methods use Morphological Mix)."""
+    return SPACES.get(method) or SPACES[TECHNIQUE_MAP["balanced"]["method"]]
+
+
+def request_rng(topic: str, method: str, temperature: float, seed: Optional[int] = None) -> random.Random:
+    """A private RNG for one request; deterministic unless `seed` says otherwise."""
+    if seed is None:
+        digest = hashlib.sha1(f"{topic.strip().lower()}\0{method}\0{temperature:.2f}".encode("utf-8")).digest()
+        seed = int.from_bytes(digest[:8], "big")
+    return random.Random(seed)
+
+
+def offline_ideas(topic: str, technique: dict, rng: random.Random) -> Iterator[str]:
+    """Lazily yield distinct ideas for `topic` using the technique's templates."""
+    return idea_space(technique.get("method", "")).walk(topic.strip() or "this challenge", rng)
@@ -0,0 +1,169 @@
+"""
+Prompt Library for AI Brainstorming Agent
+-----------------------------------------
+Loads the files in backend/prompts/ once and keeps them ready to use:
+
+  • gemini_system_instruction.txt is the static prefix shared by every
+    call. It is kept as-is with a content digest, so backends can attach it
+    once (Vertex system instruction / context cache) and send only the
+    per-request suffix.
+  • base_prompt.txt and branching_prompt.txt are per-request templates with
+    `{field}` placeholders. Each is validated against its allowed fields
+    and compiled into an f-string function at load time.
+
+Files are re-checked at most every PROMPT_RELOAD_SEC; edits are picked up
+without a restart, and an edit that fails validation is reported and
+ignored so the last good version keeps serving.
+"""
+
+import hashlib
+import os
+import string
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+PROMPTS_DIR = os.getenv("PROMPTS_DIR") or os.path.join(os.path.dirname(__file__), "..", "prompts")
+PROMPT_RELOAD_SEC = float(os.getenv("PROMPT_RELOAD_SEC", "2"))
+
+SYSTEM_INSTRUCTION = "gemini_system_instruction"
+TEMPLATE_FIELDS = {
+    "base_prompt": {"topic", "max_ideas", "method", "prompt_hint"},
+    "branching_prompt": {"topic", "idea", "max_ideas", "method", "prompt_hint"},
+}
+
+
+class PromptTemplateError(ValueError):
+    """A prompt file is missing or uses placeholders it is not allowed to."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return max(1, (len(text) + 3) // 4) if text else 0
+
+
+def _strip_comments(text: str) -> str:
+    return "\n".join(line for line in text.splitlines() if not line.startswith("#")).strip()
+
+
+def compile_template(name: str, text: str, allowed: set) -> Callable[..., str]:
+    """Validate `text` and compile it into `render(**fields) -> str`.
+
+    Every allowed field is a keyword argument, so callers pass the same set
+    whether or not the current wording uses all of them.
+    """
+    body = []
+    try:
+        parsed = list(string.Formatter().parse(text))
+    except ValueError as exc:
+        raise PromptTemplateError(f"{name}: {exc}") from exc
+    for literal, field, spec, conversion in parsed:
+        body.append(literal.replace("{", "{{").replace("}", "}}"))
+        if field is None:
+            continue
+        if field not in allowed:
+            raise PromptTemplateError(f"{name}: unknown placeholder {{{field}}}; allowed: {', '.join(sorted(allowed))}")
+        body.append("{" + field + (f"!{conversion}" if conversion else "") + (f":{spec}" if spec else "") + "}")
+    source = f"def render(*, {', '.join(sorted(allowed))}):\n    return f{''.join(body)!r}\n"
+    namespace: dict = {}
+    exec(source, namespace)
+    return namespace["render"]
+
+
+class PromptLibrary:
+    """Loaded prompt files plus their compiled renderers."""
+
+    def __init__(self, directory: str = PROMPTS_DIR, reload_interval: float = PROMPT_RELOAD_SEC):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtimes: Dict[str, Optional[float]] = {}
+        self._checked_at = 0.0
+        self.stats = {"reloads": 0, "reload_errors": 0}
+        self.last_error: Optional[str] = None
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.txt")
+
+    def _load(self) -> None:
+        """Read and compile everything; raises without touching the current state."""
+        mtimes = {}
+        texts = {}
+        for name in (SYSTEM_INSTRUCTION, *TEMPLATE_FIELDS):
+            path = self._path(name)
+            try:
+                mtimes[name] = os.stat(path).st_mtime
+                with open(path, encoding="utf-8") as f:
+                    texts[name] = f.read()
+            except OSError as exc:
+                raise PromptTemplateError(f"{name}: {exc}") from exc
+        renderers = {
+            name: compile_template(name, _strip_comments(texts[name]), fields)
+            for name, fields in TEMPLATE_FIELDS.items()
+        }
+        system = texts[SYSTEM_INSTRUCTION].strip()
+
+        self.system_instruction = system
+        self.system_tokens = estimate_tokens(system)
+        self.version = hashlib.sha1(system.encode("utf-8")).hexdigest()[:12]
+        self._renderers = renderers
+        self._mtimes = mtimes
+
+    def maybe_reload(self) -> bool:
+        """Reload if any file changed since the last check; True if reloaded."""
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return False
+        with self._lock:
+            if now - self._checked_at < self.reload_interval:
+                return False
+            self._checked_at = now
+            current = {}
+            for name in self._mtimes:
+                try:
+                    current[name] = os.stat(self._path(name)).st_mtime
+                except OSError:
+                    current[name] = None
+            if current == self._mtimes:
+                return False
+            try:
+                self._load()
+            except PromptTemplateError as exc:
+                # Keep serving the last good version; retry on the next edit.
+                self._mtimes = current
+                self.stats["reload_errors"] += 1
+                self.last_error = str(exc)
+                return False
+            self.stats["reloads"] += 1
+            self.last_error = None
+            return True
+
+    def render(self, name: str, **fields) -> str:
+        """Render a per-request template (the suffix after the system instruction)."""
+        self.maybe_reload()
+        try:
+            render = self._renderers[name]
+        except KeyError:
+            raise PromptTemplateError(f"unknown template: {name}") from None
+        return render(**fields)
+
+    def snapshot(self) -> Dict:
+        return {
+            "version": self.version,
+            "system_tokens": self.system_tokens,
+            "templates": sorted(self._renderers),
+            **self.stats,
+            "last_error": self.last_error,
+        }
+
+
+_library: Optional[PromptLibrary] = None
+
+
+def get_prompt_library() -> PromptLibrary:
+    """Return the process-wide prompt library, loading it on first use."""
+    global _library
+    if _library is None:
+        _library = PromptLibrary()
+    return _library
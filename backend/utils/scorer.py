@@ -1 +1,218 @@
-# placeholder — content to be added later
+"""
+Novelty Scoring for AI Brainstorming Agent
+------------------------------------------
+Embeds idea text locally with a hashing-trick TF-IDF (NumPy, CPU only) and
+scores novelty as distance from:
+
+  • the session's prior ideas (an incrementally maintained index), and
+  • a small background corpus of generic, overused brainstorming ideas.
+
+Term counts are stored raw and IDF weights are refreshed as the session
+grows, so adding ideas never requires re-embedding what is already indexed.
+Everything is batched: one call scores a whole list of ideas with a couple
+of matrix products.
+"""
+
+import os
+import re
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+EMBED_DIM = int(os.getenv("SCORER_EMBED_DIM", "512"))
+SCORER_MAX_SESSIONS = int(os.getenv("SCORER_MAX_SESSIONS", "1000"))
+SCORER_IDF_REFRESH = float(os.getenv("SCORER_IDF_REFRESH", "0.1"))  # growth ratio between IDF refreshes
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it its of on or our that the "
+    "this to with your we you use using through".split()
+)
+
+# Generic ideas every brainstorm produces; being close to these is not novel.
+BACKGROUND_CORPUS = [
+    "Build a mobile app",
+    "Create a website and online platform",
+    "Use social media to raise awareness",
+    "Start an education and awareness campaign",
+    "Partner with local businesses and schools",
+    "Use AI and machine learning to optimize",
+    "Gamify the experience with points and rewards",
+    "Create a community marketplace",
+    "Use blockchain for transparency and tracking",
+    "Organize volunteer events and workshops",
+    "Offer discounts and incentives",
+    "Crowdfund the project",
+    "Launch a subscription service",
+    "Use IoT sensors to collect data",
+    "Build a chatbot to answer questions",
+    "Partner with government and nonprofits",
+    "Host a hackathon",
+    "Create a recycling program",
+    "Make it sustainable and eco-friendly",
+    "Use virtual reality and augmented reality",
+]
+
+
+@lru_cache(maxsize=65536)
+def _bucket(token: str) -> int:
+    # crc32 is stable across processes, unlike hash().
+    return zlib.crc32(token.encode("utf-8")) % EMBED_DIM
+
+
+def keywords(text: str) -> List[str]:
+    """Lowercased content words of the text, stopwords removed."""
+    return [w for w in _TOKEN_RE.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def _features(text: str) -> List[int]:
+    words = keywords(text)
+    buckets = [_bucket(w) for w in words]
+    buckets.extend(_bucket(a + " " + b) for a, b in zip(words, words[1:]))
+    return buckets
+
+
+def term_counts(texts: Iterable[str]) -> np.ndarray:
+    """Return a (n, EMBED_DIM) matrix of log-scaled hashed term counts."""
+    texts = list(texts)
+    rows: List[int] = []
+    cols: List[int] = []
+    for i, text in enumerate(texts):
+        feats = _features(text)
+        rows.extend([i] * len(feats))
+        cols.extend(feats)
+    counts = np.zeros((len(texts), EMBED_DIM), dtype=np.float32)
+    np.add.at(counts, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+    return np.log1p(counts, out=counts)
+
+
+def _idf(doc_freq: np.ndarray, n_docs: int) -> np.ndarray:
+    return (np.log((1.0 + n_docs) / (1.0 + doc_freq)) + 1.0).astype(np.float32)
+
+
+def corpus_idf(counts: np.ndarray) -> np.ndarray:
+    """IDF weights for a batch of term-count rows plus the background corpus."""
+    return _idf(_BACKGROUND_DF + (counts > 0).sum(axis=0), len(BACKGROUND_CORPUS) + len(counts))
+
+
+def unit_vectors(counts: np.ndarray, idf: np.ndarray) -> np.ndarray:
+    """L2-normalized TF-IDF rows for term-count rows."""
+    unit = counts * idf
+    unit /= _row_norms(counts, idf)[:, None]
+    return unit
+
+
+def _row_norms(counts: np.ndarray, idf: np.ndarray) -> np.ndarray:
+    norms = np.sqrt(np.square(counts) @ np.square(idf))
+    norms[norms == 0] = 1.0
+    return norms
+
+
+def _max_similarity(unit: np.ndarray, idf: np.ndarray, rows: np.ndarray, norms: np.ndarray) -> np.ndarray:
+    """Max cosine similarity of unit TF-IDF query rows against raw count rows."""
+    if len(rows) == 0:
+        return np.zeros(len(unit), dtype=np.float32)
+    return ((unit * idf) @ rows.T / norms).max(axis=1)
+
+
+_BACKGROUND_COUNTS = term_counts(BACKGROUND_CORPUS)
+_BACKGROUND_DF = (_BACKGROUND_COUNTS > 0).sum(axis=0).astype(np.float32)
+
+
+class SessionIndex:
+    """Growable matrix of a session's term-count rows.
+
+    IDF weights (and the row norms that depend on them) are snapshotted and
+    only refreshed once the index has grown by SCORER_IDF_REFRESH, so a
+    lookup costs one (batch × size) product instead of re-weighting every row.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._rows = np.zeros((capacity, EMBED_DIM), dtype=np.float32)
+        self._norms = np.ones(capacity, dtype=np.float32)
+        self.size = 0
+        self.doc_freq = np.zeros(EMBED_DIM, dtype=np.float32)
+        self.idf = _idf(_BACKGROUND_DF, len(BACKGROUND_CORPUS))
+        self._refreshed_at = 0
+
+    @property
+    def rows(self) -> np.ndarray:
+        return self._rows[: self.size]
+
+    @property
+    def norms(self) -> np.ndarray:
+        return self._norms[: self.size]
+
+    def add(self, counts: np.ndarray) -> None:
+        start, needed = self.size, self.size + len(counts)
+        if needed > len(self._rows):
+            capacity = max(needed, 2 * len(self._rows))
+            self._rows = _grow(self._rows, capacity)
+            self._norms = np.concatenate([self._norms, np.ones(capacity - len(self._norms), dtype=np.float32)])
+        self._rows[start:needed] = counts
+        self.doc_freq += (counts > 0).sum(axis=0)
+        self.size = needed
+        if needed >= self._refreshed_at * (1.0 + SCORER_IDF_REFRESH) + 16:
+            self.refresh()
+        else:
+            self._norms[start:needed] = _row_norms(counts, self.idf)
+
+    def refresh(self) -> None:
+        """Recompute IDF from the background corpus plus this session."""
+        self.idf = _idf(_BACKGROUND_DF + self.doc_freq, len(BACKGROUND_CORPUS) + self.size)
+        self._norms[: self.size] = _row_norms(self.rows, self.idf)
+        self._refreshed_at = self.size
+
+
+def _grow(matrix: np.ndarray, capacity: int) -> np.ndarray:
+    grown = np.zeros((capacity, matrix.shape[1]), dtype=matrix.dtype)
+    grown[: len(matrix)] = matrix
+    return grown
+
+
+_sessions: "OrderedDict[str, SessionIndex]" = OrderedDict()
+
+
+def get_session_index(session_id: str) -> SessionIndex:
+    """Return the session's index, evicting the least recently used session."""
+    index = _sessions.get(session_id)
+    if index is None:
+        index = _sessions[session_id] = SessionIndex()
+        while len(_sessions) > SCORER_MAX_SESSIONS:
+            _sessions.popitem(last=False)
+    else:
+        _sessions.move_to_end(session_id)
+    return index
+
+
+def score_novelty(texts: List[str], session_id: Optional[str] = None, update: bool = True) -> List[float]:
+    """Score novelty in [0, 1] for a batch of ideas.
+
+    Each idea is compared with the background corpus, the session's prior
+    ideas and the ideas before it in the same batch; novelty is one minus the
+    closest match. With `update`, the batch is then added to the session.
+    """
+    if not texts:
+        return []
+    session = get_session_index(session_id) if session_id else None
+    query = term_counts(texts)
+
+    idf = session.idf if session is not None else corpus_idf(query)
+    unit = unit_vectors(query, idf)
+
+    closest = _max_similarity(unit, idf, _BACKGROUND_COUNTS, _row_norms(_BACKGROUND_COUNTS, idf))
+    if session is not None:
+        closest = np.maximum(closest, _max_similarity(unit, idf, session.rows, session.norms))
+
+    # Within the batch, each idea only competes with the ones before it.
+    if len(texts) > 1:
+        closest = np.maximum(closest, np.tril(unit @ unit.T, k=-1).max(axis=1))
+
+    if session is not None and update:
+        session.add(query)
+
+    novelty = np.clip(1.0 - closest, 0.0, 1.0)
+    return [round(float(n), 2) for n in novelty]
@@ -0,0 +1,217 @@
+"""
+Session Event Log for AI Brainstorming Agent
+--------------------------------------------
+Durable, append-only record of what happened in a session: ideas generated,
+conversation turns, phase changes, questions asked about ideas and branches
+of the idea tree. Replaces the one-JSON-blob-per-update layout sketched in
+data/sample_sessions.json.
+
+  • Storage: one SQLite file in WAL mode, indexed by (session_id, id) for
+    paging through a session and by ts for time-range maintenance.
+  • Writes: `append()` only enqueues; a single writer thread drains the queue
+    and commits many events per transaction (group commit), so request
+    handlers never wait on disk and concurrent sessions share each fsync.
+  • Reads: keyset pagination by event id, plus `replay()` which streams a
+    whole session page by page for export.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "sessions.db")
+SESSION_LOG_PATH = os.getenv("SESSION_LOG_PATH") or DEFAULT_LOG_PATH
+EVENT_BATCH_MAX = int(os.getenv("EVENT_BATCH_MAX", "512"))
+EVENT_FLUSH_MS = float(os.getenv("EVENT_FLUSH_MS", "20"))
+
+EVENT_KINDS = ("idea", "turn", "phase", "qa", "branch")
+_STOP = object()
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS events ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " session_id TEXT NOT NULL, ts REAL NOT NULL,"
+    " kind TEXT NOT NULL, data TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS events_session ON events (session_id, id)",
+    "CREATE INDEX IF NOT EXISTS events_ts ON events (ts)",
+)
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _row_to_event(row: tuple) -> Dict[str, Any]:
+    return {"id": row[0], "session_id": row[1], "ts": row[2], "kind": row[3], "data": json.loads(row[4])}
+
+
+class SessionLog:
+    """Append-only event store with a background group-commit writer."""
+
+    def __init__(self, path: str = SESSION_LOG_PATH, batch_max: int = EVENT_BATCH_MAX, flush_ms: float = EVENT_FLUSH_MS):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.batch_max = batch_max
+        self.flush_interval = flush_ms / 1000
+        self._read_lock = threading.Lock()
+        self._reader = _connect(path)
+        for statement in _SCHEMA:
+            self._reader.execute(statement)
+        self._reader.commit()
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self.stats = {"appended": 0, "committed": 0, "batches": 0, "largest_batch": 0, "errors": 0}
+        self.last_error: Optional[str] = None
+        self._writer = threading.Thread(target=self._write_loop, name="session-log-writer", daemon=True)
+        self._writer.start()
+
+    # -- writes ---------------------------------------------------------------
+    def append(self, session_id: str, kind: str, data: Any) -> None:
+        """Queue one event; returns immediately."""
+        self._queue.put((session_id, time.time(), kind, json.dumps(data)))
+        self.stats["appended"] += 1
+
+    def append_many(self, session_id: str, kind: str, items: Sequence[Any]) -> None:
+        ts = time.time()
+        for data in items:
+            self._queue.put((session_id, ts, kind, json.dumps(data)))
+        self.stats["appended"] += len(items)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything appended so far is committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _write_loop(self) -> None:
+        conn = _connect(self.path)
+        stop = False
+        while not stop:
+            batch: List[tuple] = []
+            waiters: List[threading.Event] = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break  # someone is waiting: commit now
+                batch.append(item)
+                if len(batch) >= self.batch_max:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    with conn:
+                        conn.executemany("INSERT INTO events (session_id, ts, kind, data) VALUES (?, ?, ?, ?)", batch)
+                    self.stats["committed"] += len(batch)
+                    self.stats["batches"] += 1
+                    self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+                except sqlite3.Error as exc:
+                    self.stats["errors"] += 1
+                    self.last_error = str(exc)
+            for waiter in waiters:
+                waiter.set()
+        conn.close()
+
+    # -- reads ----------------------------------------------------------------
+    def read(
+        self,
+        session_id: str,
+        after: int = 0,
+        limit: int = 100,
+        kinds: Optional[Sequence[str]] = None,
+        until: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Up to `limit` events with id > `after` (and <= `until`), oldest first."""
+        sql = "SELECT id, session_id, ts, kind, data FROM events WHERE session_id = ? AND id > ?"
+        params: List[Any] = [session_id, after]
+        if until is not None:
+            sql += " AND id <= ?"
+            params.append(until)
+        if kinds:
+            sql += " AND kind IN (%s)" % ",".join("?" * len(kinds))
+            params.extend(kinds)
+        sql += " ORDER BY id LIMIT ?"
+        params.append(limit)
+        with self._read_lock:
+            rows = self._reader.execute(sql, params).fetchall()
+        return [_row_to_event(row) for row in rows]
+
+    def replay(
+        self,
+        session_id: str,
+        kinds: Optional[Sequence[str]] = None,
+        until: Optional[int] = None,
+        page_size: int = 1000,
+        after: int = 0,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream every event of a session in order, one page in memory at a time.
+
+        Pass `until` (see `last_event_id`) to pin the replay to a snapshot
+        while new events keep arriving, and `after` to resume from an event id.
+        """
+        while True:
+            page = self.read(session_id, after, page_size, kinds, until)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = page[-1]["id"]
+
+    def last_event_id(self, session_id: str) -> int:
+        """Id of the session's newest committed event, 0 if it has none."""
+        with self._read_lock:
+            row = self._reader.execute("SELECT MAX(id) FROM events WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] or 0
+
+    def purge_before(self, ts: float) -> int:
+        """Delete events older than `ts` (retention)."""
+        with self._read_lock:
+            cur = self._reader.execute("DELETE FROM events WHERE ts < ?", (ts,))
+            self._reader.commit()
+            return cur.rowcount
+
+    @property
+    def alive(self) -> bool:
+        """Whether the writer thread is still draining the queue."""
+        return self._writer.is_alive()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "queued": self.stats["appended"] - self.stats["committed"], "last_error": self.last_error}
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._writer.join()
+        with self._read_lock:
+            self._reader.close()
+
+
+_log: Optional[SessionLog] = None
+
+
+def get_session_log() -> SessionLog:
+    """Return the process-wide event log, opening it on first use."""
+    global _log
+    if _log is None:
+        _log = SessionLog()
+    return _log
+
+
+def close_session_log() -> None:
+    """Commit queued events and close the log."""
+    global _log
+    if _log is not None:
+        _log.close()
+        _log = None
@@ -0,0 +1,193 @@
+"""
+Conversation Sessions for AI Brainstorming Agent
+------------------------------------------------
+Server-side state for /conversation so clients send only the new message
+each turn instead of re-posting the whole transcript.
+
+A session keeps a bounded ring buffer of recent turns plus running summary
+state (extracted name, topic, total message count, vibe). Stores are pluggable:
+
+  • "memory" → in-process LRU with idle TTL (single worker).
+  • "redis"  → any Redis-compatible server, shared by all workers
+               (see stub_redis_server.py for a local stand-in).
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, List, Optional
+
+from utils.vibe import VibeStats
+
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")  # memory or redis
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://127.0.0.1:6380/0")
+SESSION_HISTORY_TURNS = int(os.getenv("SESSION_HISTORY_TURNS", "12"))
+SESSION_TTL_SEC = int(os.getenv("SESSION_TTL_SEC", "3600"))
+SESSION_MAX_LOCAL = int(os.getenv("SESSION_MAX_LOCAL", "10000"))
+SESSION_UPDATE_RETRIES = int(os.getenv("SESSION_UPDATE_RETRIES", "16"))
+
+
+class ConversationSession:
+    """Recent turns plus running summary state for one conversation."""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.turns: Deque[dict] = deque(maxlen=SESSION_HISTORY_TURNS)
+        self.message_count = 0  # every message ever seen, not just the buffered ones
+        self.name: Optional[str] = None
+        self.topic: Optional[str] = None
+        self.vibe = VibeStats()  # running mood of the user's turns
+        self.updated_at = time.time()
+
+    @property
+    def history(self) -> List[dict]:
+        return list(self.turns)
+
+    def record(self, message_type: str, text: str) -> None:
+        self.turns.append({"type": message_type, "text": text})
+        self.message_count += 1
+        self.updated_at = time.time()
+
+    def remember(self, name: Optional[str], topic: Optional[str]) -> None:
+        """Keep the first name heard and the latest topic."""
+        self.name = self.name or name
+        self.topic = topic or self.topic
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "turns": list(self.turns),
+            "message_count": self.message_count,
+            "name": self.name,
+            "topic": self.topic,
+            "vibe": self.vibe.to_dict(),
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConversationSession":
+        session = cls(data["session_id"])
+        session.turns.extend(data.get("turns", []))
+        session.message_count = data.get("message_count", len(session.turns))
+        session.name = data.get("name")
+        session.topic = data.get("topic")
+        session.vibe = VibeStats.from_dict(data.get("vibe", {}))
+        session.updated_at = data.get("updated_at", time.time())
+        return session
+
+
+class InMemorySessionStore:
+    """Per-process store: LRU-bounded, sessions expire after SESSION_TTL_SEC idle."""
+
+    def __init__(self, max_sessions: int = SESSION_MAX_LOCAL, ttl: int = SESSION_TTL_SEC):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+
+    async def get(self, session_id: str) -> Optional[ConversationSession]:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if time.time() - session.updated_at > self.ttl:
+            del self._sessions[session_id]
+            return None
+        self._sessions.move_to_end(session_id)
+        return session
+
+    async def save(self, session: ConversationSession) -> None:
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    async def update(self, session_id: str, change: Callable[[ConversationSession], None]) -> ConversationSession:
+        """Apply `change` to the session (created if missing) and store it."""
+        # No await between read and write, so nothing else on the loop interleaves.
+        session = await self.get(session_id) or ConversationSession(session_id)
+        change(session)
+        await self.save(session)
+        return session
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class RedisSessionStore:
+    """Sessions as JSON blobs with a sliding TTL in a Redis-compatible server."""
+
+    def __init__(self, url: str = SESSION_REDIS_URL, ttl: int = SESSION_TTL_SEC, prefix: str = "session:"):
+        # Optional dependency: only needed when SESSION_STORE=redis.
+        import redis.asyncio as redis
+        from redis.exceptions import WatchError
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._watch_error = WatchError
+
+    async def get(self, session_id: str) -> Optional[ConversationSession]:
+        raw = await self._client.get(self.prefix + session_id)
+        return ConversationSession.from_dict(json.loads(raw)) if raw else None
+
+    async def save(self, session: ConversationSession) -> None:
+        await self._client.set(self.prefix + session.session_id, json.dumps(session.to_dict()), ex=self.ttl)
+
+    async def update(self, session_id: str, change: Callable[[ConversationSession], None]) -> ConversationSession:
+        """Apply `change` to the session (created if missing) and store it.
+
+        Optimistic check-and-set: WATCH the key, read, apply, then write in
+        MULTI/EXEC. If another worker wrote the key in between, EXEC is
+        refused and the change is re-applied to the fresh copy, so
+        concurrent turns are never overwritten.
+        """
+        key = self.prefix + session_id
+        for attempt in range(SESSION_UPDATE_RETRIES):
+            async with self._client.pipeline() as pipe:
+                try:
+                    await pipe.watch(key)
+                    raw = await pipe.get(key)
+                    session = ConversationSession.from_dict(json.loads(raw)) if raw else ConversationSession(session_id)
+                    change(session)
+                    pipe.multi()
+                    pipe.set(key, json.dumps(session.to_dict()), ex=self.ttl)
+                    await pipe.execute()
+                    return session
+                except self._watch_error:
+                    # Lost the race; back off a little so racers spread out.
+                    await asyncio.sleep(random.uniform(0, 0.002 * (attempt + 1)))
+        raise RuntimeError(f"session {session_id} kept changing; gave up after {SESSION_UPDATE_RETRIES} tries")
+
+    async def delete(self, session_id: str) -> None:
+        await self._client.delete(self.prefix + session_id)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_store = None
+
+
+def get_session_store():
+    """Return the process-wide session store, creating it on first use."""
+    global _store
+    if _store is None:
+        if SESSION_STORE == "memory":
+            _store = InMemorySessionStore()
+        elif SESSION_STORE == "redis":
+            _store = RedisSessionStore()
+        else:
+            raise ValueError(f"Unknown SESSION_STORE: {SESSION_STORE}")
+    return _store
+
+
+async def close_session_store() -> None:
+    global _store
+    if _store is not None:
+        await _store.aclose()
+        _store = None
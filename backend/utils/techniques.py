@@ -3,9 +3,12 @@ Technique Mapping for AI Brainstorming Agent
 ---------------------------------------------
 Maps personality tone or group energy to structured creativity techniques.
 Used during Phase 3 to determine which brainstorming method Gemini should use
-to guide the next generation round.
+to guide the next generation round. Without an explicit personality, the
+session's conversation vibe decides (see utils/vibe.py).
 """
 
+from typing import Optional
+
 TECHNIQUE_MAP = {
     "high_energy": {
         "method": "Metaphor Remix",
@@ -34,7 +37,15 @@ TECHNIQUE_MAP = {
     }
 }
 
-def suggest_technique(personality_signal: str) -> dict:
+def choose_personality(personality_signal: Optional[str] = None, vibe=None) -> str:
+    """TECHNIQUE_MAP key: the explicit personality if given, else the session's vibe (utils.vibe.VibeStats)."""
+    if personality_signal:
+        key = personality_signal.lower()
+        return key if key in TECHNIQUE_MAP else "balanced"
+    if vibe is not None:
+        return vibe.personality()
+    return "balanced"
+
+def suggest_technique(personality_signal: Optional[str] = None, vibe=None) -> dict:
     """Return the suggested technique dict given a personality or sentiment signal."""
-    key = personality_signal.lower()
-    return TECHNIQUE_MAP.get(key, TECHNIQUE_MAP["balanced"])
+    return TECHNIQUE_MAP[choose_personality(personality_signal, vibe)]
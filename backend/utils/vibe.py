@@ -0,0 +1,185 @@
+"""
+Vibe Classifier for AI Brainstorming Agent
+------------------------------------------
+Reads the mood of a conversation so Phase 3 can pick a technique when the
+client doesn't name a personality, and scores idea sentiment.
+
+  • Every user turn is reduced to a few cues: sentiment (lexicon with
+    negation), energy (exclamations, shouting, high-arousal words) and how
+    analytical, contrarian or empathetic its wording is.
+  • VibeStats folds each turn into exponentially weighted running means, so
+    an update costs the same on turn 3 as on turn 300 and never re-reads the
+    history. It lives in the conversation session and travels with it
+    through the session store.
+  • `personality()` maps the running vibe to a TECHNIQUE_MAP key.
+  • `score_sentiment()` scores a round of ideas against the same lexicon,
+    ignoring the session prompt's words, which templates insert verbatim.
+
+All local, no model calls: a turn costs one regex pass and dict lookups.
+"""
+
+import math
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+VIBE_ALPHA = float(os.getenv("VIBE_ALPHA", "0.4"))  # weight of the newest turn
+VIBE_MIN_TURNS = int(os.getenv("VIBE_MIN_TURNS", "2"))
+
+POSITIVE = {
+    "good": 1.0, "great": 1.5, "love": 1.8, "like": 0.6, "enjoy": 1.2, "fun": 1.2, "happy": 1.5,
+    "excited": 1.8, "exciting": 1.6, "awesome": 1.8, "amazing": 1.8, "cool": 1.0, "nice": 0.8,
+    "better": 0.8, "best": 1.2, "easy": 0.8, "simple": 0.6, "free": 0.5, "win": 1.2, "success": 1.4,
+    "successful": 1.4, "help": 0.6, "helpful": 1.0, "hope": 0.8, "hopeful": 1.0, "inspire": 1.4,
+    "inspiring": 1.4, "creative": 1.0, "clean": 0.6, "healthy": 0.8, "safe": 0.8, "together": 0.6,
+    "share": 0.5, "shared": 0.5, "friendly": 1.0, "celebrate": 1.4, "reward": 0.8, "grow": 0.6,
+    "improve": 0.8, "boost": 0.8, "brilliant": 1.8, "perfect": 1.6, "yes": 0.6, "thanks": 0.8,
+    "wonderful": 1.8, "delight": 1.6, "save": 0.6, "saves": 0.6, "benefit": 0.8, "support": 0.6,
+}
+NEGATIVE = {
+    "bad": -1.2, "worse": -1.2, "worst": -1.6, "hate": -1.8, "problem": -0.8, "problems": -0.8,
+    "issue": -0.6, "fail": -1.4, "fails": -1.4, "failed": -1.4, "failure": -1.5, "hard": -0.6,
+    "difficult": -0.8, "expensive": -0.8, "waste": -0.8, "wasted": -1.0, "broken": -1.2,
+    "boring": -1.2, "annoying": -1.4, "frustrating": -1.6, "frustrated": -1.6, "stuck": -1.0,
+    "struggle": -1.0, "struggling": -1.0, "worry": -1.0, "worried": -1.2, "afraid": -1.2,
+    "angry": -1.6, "sad": -1.4, "lonely": -1.2, "risk": -0.6, "risky": -0.8, "pollution": -1.0,
+    "slow": -0.6, "ugly": -1.2, "unfair": -1.4, "punish": -1.2, "lose": -1.0, "lost": -0.8,
+    "impossible": -1.4, "terrible": -1.8, "awful": -1.8, "useless": -1.6,
+    "painful": -1.4, "tired": -0.8, "stress": -1.2, "stressful": -1.4, "confusing": -1.0,
+}
+LEXICON: Dict[str, float] = {**POSITIVE, **NEGATIVE}
+NEGATIONS = {"not", "no", "never", "don't", "dont", "doesn't", "isn't", "wasn't", "won't", "can't", "cannot", "without"}
+
+AROUSAL = {
+    "love", "excited", "exciting", "awesome", "amazing", "wow", "let's", "lets", "totally", "super",
+    "crazy", "wild", "huge", "epic", "brilliant", "now", "go", "yes", "yeah", "absolutely", "definitely",
+    "hate", "angry", "fun", "party", "fast", "quick", "imagine",
+}
+ANALYTICAL = {
+    "how", "why", "data", "measure", "metric", "metrics", "cost", "costs", "budget", "plan", "step",
+    "steps", "process", "system", "analyze", "analysis", "compare", "efficient", "efficiency", "optimize",
+    "structure", "evidence", "test", "track", "numbers", "percent", "roi", "scale", "model", "framework",
+}
+CONTRARIAN = {
+    "but", "however", "although", "won't", "doesn't", "never", "disagree", "wrong", "fails", "fail",
+    "problem", "actually", "unless", "instead", "overrated", "skeptical", "doubt", "pointless", "against",
+    "flip", "opposite", "reverse", "broken",
+}
+EMPATHETIC = {
+    "people", "feel", "feels", "feeling", "community", "kids", "children", "parents", "family", "families",
+    "elderly", "neighbours", "neighbors", "users", "customers", "students", "they", "them", "care",
+    "lonely", "everyone", "someone", "together", "help", "support", "needs", "experience", "friends",
+}
+
+_TOKEN = re.compile(r"[A-Za-z']+|!")
+
+
+class TurnVibe(NamedTuple):
+    sentiment: float  # -1 (negative) .. 1 (positive)
+    energy: float  # 0 .. 1
+    analytical: float  # share of words that are analytical cues
+    contrarian: float
+    empathetic: float
+
+
+def _polarity(total: float) -> float:
+    """Squash a summed lexicon score into -1..1 (VADER-style normalization)."""
+    return total / math.sqrt(total * total + 15.0) if total else 0.0
+
+
+def _sentiment_sum(words: Sequence[str]) -> float:
+    total = 0.0
+    for i, word in enumerate(words):
+        weight = LEXICON.get(word)
+        if weight is not None:
+            # A negation in the two words before flips and damps the word.
+            if (i and words[i - 1] in NEGATIONS) or (i > 1 and words[i - 2] in NEGATIONS):
+                weight *= -0.5
+            total += weight
+    return total
+
+
+def analyze_turn(text: str) -> TurnVibe:
+    """Vibe cues of one message."""
+    tokens = _TOKEN.findall(text)
+    words = [t.lower() for t in tokens if t != "!"]
+    if not words:
+        return TurnVibe(0.0, min(1.0, 0.3 * len(tokens)), 0.0, 0.0, 0.0)
+    exclaims = len(tokens) - len(words)
+    shouted = sum(1 for t in tokens if len(t) > 2 and t.isupper())
+    arousal = sum(1 for w in words if w in AROUSAL)
+    n = len(words)
+    energy = min(1.0, 0.3 * exclaims + 2.0 * shouted / n + 3.0 * arousal / n)
+    return TurnVibe(
+        _polarity(_sentiment_sum(words)),
+        energy,
+        sum(1 for w in words if w in ANALYTICAL) / n,
+        sum(1 for w in words if w in CONTRARIAN) / n,
+        sum(1 for w in words if w in EMPATHETIC) / n,
+    )
+
+
+class VibeStats:
+    """Running (exponentially weighted) vibe of a conversation; O(1) per turn."""
+
+    __slots__ = ("turns", "sentiment", "energy", "analytical", "contrarian", "empathetic")
+
+    def __init__(self):
+        self.turns = 0
+        self.sentiment = 0.0
+        self.energy = 0.0
+        self.analytical = 0.0
+        self.contrarian = 0.0
+        self.empathetic = 0.0
+
+    def update(self, text: str) -> TurnVibe:
+        """Fold one user message into the running vibe."""
+        turn = analyze_turn(text)
+        # The first turn seeds the averages; later turns move them by VIBE_ALPHA.
+        alpha = 1.0 if self.turns == 0 else VIBE_ALPHA
+        self.turns += 1
+        for field, value in zip(TurnVibe._fields, turn):
+            setattr(self, field, getattr(self, field) + alpha * (value - getattr(self, field)))
+        return turn
+
+    def personality(self) -> str:
+        """TECHNIQUE_MAP key that suits the conversation so far ("balanced" until it's clear)."""
+        if self.turns < VIBE_MIN_TURNS:
+            return "balanced"
+        if self.energy >= 0.5 and self.sentiment >= 0:
+            return "high_energy"
+        styles = {
+            "analytical": self.analytical,
+            # Skepticism reads as contrarian, and so does a sour mood.
+            "contrarian": self.contrarian + 0.1 * max(0.0, -self.sentiment),
+            "empathetic": self.empathetic,
+        }
+        style = max(styles, key=styles.get)
+        return style if styles[style] >= 0.08 else "balanced"
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VibeStats":
+        vibe = cls()
+        for field in cls.__slots__:
+            if field in data:
+                setattr(vibe, field, data[field])
+        return vibe
+
+
+def score_sentiment(texts: Sequence[str], prompt: Optional[str] = None) -> List[float]:
+    """Lexicon sentiment of each text on a 0..1 scale (0.5 is neutral).
+
+    Takes a whole round of ideas at once, so scoring sits next to novelty
+    in the scoring stage instead of being made up per idea. Words of
+    `prompt` are skipped, so "reducing plastic waste" doesn't make every
+    idea about it negative.
+    """
+    mask = {t.lower() for t in _TOKEN.findall(prompt)} if prompt else set()
+    scores = []
+    for text in texts:
+        words = [w for w in (t.lower() for t in _TOKEN.findall(text) if t != "!") if w not in mask]
+        scores.append(round(0.5 + _polarity(_sentiment_sum(words)) / 2, 2))
+    return scores
@@ -0,0 +1,25 @@
+"""
+Python client for the AI Brainstorming Agent API.
+
+    from brainstorm_client import BrainstormClient
+
+    with BrainstormClient("http://localhost:8000") as client:
+        for frame in client.stream_brainstorm("Ideas for reducing plastic waste"):
+            print(frame)
+
+AsyncBrainstormClient offers the same calls for asyncio code.
+"""
+
+from .client import AsyncBrainstormClient, BrainstormAPIError, BrainstormClient
+from .models import BrainstormMeta, BrainstormResult, ConversationReply, Idea, IdeaAnswer
+
+__all__ = [
+    "AsyncBrainstormClient",
+    "BrainstormAPIError",
+    "BrainstormClient",
+    "BrainstormMeta",
+    "BrainstormResult",
+    "ConversationReply",
+    "Idea",
+    "IdeaAnswer",
+]
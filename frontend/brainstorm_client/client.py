@@ -0,0 +1,307 @@
+"""
+API Client for AI Brainstorming Agent
+-------------------------------------
+Sync and async clients for the backend's HTTP API, for Python frontends
+(streamlit_app.py), scripts and notebooks.
+
+  • One pooled keep-alive httpx client per BrainstormClient: create it once
+    and reuse it (Streamlit: `st.cache_resource`), so a rerun doesn't pay for
+    a new TCP/TLS connection.
+  • Typed wrappers for /brainstorm, /ask-about-idea and /conversation that
+    return the dataclasses in models.py.
+  • `stream_brainstorm()` iterates /brainstorm/stream (NDJSON): a
+    BrainstormMeta first, then each Idea as soon as the server scores it.
+  • Retries only what the server never ran: connection failures before the
+    request was sent, and 429/503 refusals from admission control (honouring
+    Retry-After), with jittered exponential backoff. A turn recorded in a
+    conversation session is never sent twice.
+
+Settings come from BRAINSTORM_API_* environment variables unless passed in.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from typing import AsyncIterator, Iterator, List, Optional, Union
+
+import httpx
+
+from .models import BrainstormMeta, BrainstormResult, ConversationReply, Idea, IdeaAnswer
+
+BRAINSTORM_API_URL = os.getenv("BRAINSTORM_API_URL", "http://localhost:8000")
+BRAINSTORM_API_TIMEOUT_SEC = float(os.getenv("BRAINSTORM_API_TIMEOUT_SEC", "30"))
+BRAINSTORM_API_MAX_RETRIES = int(os.getenv("BRAINSTORM_API_MAX_RETRIES", "2"))
+BRAINSTORM_API_BACKOFF_BASE_SEC = float(os.getenv("BRAINSTORM_API_BACKOFF_BASE_SEC", "0.2"))
+BRAINSTORM_API_BACKOFF_MAX_SEC = float(os.getenv("BRAINSTORM_API_BACKOFF_MAX_SEC", "2.0"))
+BRAINSTORM_API_MAX_RETRY_WAIT_SEC = float(os.getenv("BRAINSTORM_API_MAX_RETRY_WAIT_SEC", "10"))  # longer Retry-After: give up
+BRAINSTORM_API_POOL_SIZE = int(os.getenv("BRAINSTORM_API_POOL_SIZE", "10"))
+BRAINSTORM_API_KEEPALIVE_SEC = float(os.getenv("BRAINSTORM_API_KEEPALIVE_SEC", "30"))
+
+# Refusals from admission control: nothing was generated, so trying again is safe.
+RETRY_STATUSES = (429, 503)
+# Transport failures that happen before the request reaches the server.
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+StreamFrame = Union[BrainstormMeta, Idea]
+
+
+class BrainstormAPIError(RuntimeError):
+    """The API refused or failed a request (after any retries)."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def _error(path: str, resp: httpx.Response) -> BrainstormAPIError:
+    try:
+        detail = resp.json().get("detail", resp.text)
+    except ValueError:
+        detail = resp.text
+    retry_after = resp.headers.get("retry-after")
+    return BrainstormAPIError(
+        f"{path}: HTTP {resp.status_code}: {detail}",
+        status_code=resp.status_code,
+        retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+    )
+
+
+def _frame(path: str, line: str) -> Optional[StreamFrame]:
+    """Decode one NDJSON stream line; None once the round is done."""
+    data = json.loads(line)
+    kind = data.get("type")
+    if kind == "meta":
+        return BrainstormMeta.from_dict(data)
+    if kind == "idea":
+        return Idea.from_dict(data["idea"])
+    if kind == "done":
+        return None
+    raise BrainstormAPIError(f"{path}: {data.get('detail', 'stream failed')}", retry_after=data.get("retry_after"))
+
+
+def _brainstorm_payload(
+    prompt: str, max_ideas: int, temperature: float, mode: str,
+    personality: Optional[str], session_id: Optional[str], dedupe: bool,
+) -> dict:
+    payload = {"prompt": prompt, "max_ideas": max_ideas, "temperature": temperature, "mode": mode, "dedupe": dedupe}
+    if personality:
+        payload["personality"] = personality
+    if session_id:
+        payload["session_id"] = session_id
+    return payload
+
+
+def _drop_none(**fields) -> dict:
+    return {name: value for name, value in fields.items() if value is not None}
+
+
+class _ClientBase:
+    """Settings and the retry schedule shared by the sync and async clients."""
+
+    def __init__(
+        self,
+        base_url: str = BRAINSTORM_API_URL,
+        timeout: float = BRAINSTORM_API_TIMEOUT_SEC,
+        max_retries: int = BRAINSTORM_API_MAX_RETRIES,
+        backoff_base: float = BRAINSTORM_API_BACKOFF_BASE_SEC,
+        backoff_max: float = BRAINSTORM_API_BACKOFF_MAX_SEC,
+        max_retry_wait: float = BRAINSTORM_API_MAX_RETRY_WAIT_SEC,
+        pool_size: int = BRAINSTORM_API_POOL_SIZE,
+        keepalive: float = BRAINSTORM_API_KEEPALIVE_SEC,
+        client_id: Optional[str] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_wait = max_retry_wait
+        # Private RNG so backoff jitter never touches the global random state.
+        self._rng = random.Random()
+        self._http_options = {
+            "base_url": self.base_url,
+            "timeout": httpx.Timeout(timeout),
+            "limits": httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=keepalive,
+            ),
+            # The server rate-limits per X-Client-Id, else per session_id, else per address.
+            # Leave it unset on a client shared by many users, or they share one bucket.
+            "headers": {"X-Client-Id": client_id} if client_id else {},
+        }
+
+    def _delay(self, attempt: int, retry_after: Optional[float]) -> Optional[float]:
+        """Seconds to wait before retry `attempt + 1`, or None to give up."""
+        if attempt >= self.max_retries:
+            return None
+        # Full-jitter exponential backoff, but never sooner than the server asked.
+        delay = self._rng.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay if delay <= self.max_retry_wait else None
+
+    def _retry(self, path: str, attempt: int, exc: Exception) -> float:
+        """The wait before retrying after `exc`; raises when it isn't worth retrying."""
+        if isinstance(exc, BrainstormAPIError):
+            delay = self._delay(attempt, exc.retry_after) if exc.status_code in RETRY_STATUSES else None
+            if delay is None:
+                raise exc
+        else:
+            delay = self._delay(attempt, None)
+            if delay is None:
+                raise BrainstormAPIError(f"{path}: {exc!r}") from exc
+        return delay
+
+
+class BrainstormClient(_ClientBase):
+    """Blocking client with one keep-alive connection pool; safe to share between threads."""
+
+    def __init__(self, base_url: str = BRAINSTORM_API_URL, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self._http = httpx.Client(**self._http_options)
+
+    def __enter__(self) -> "BrainstormClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release pooled connections."""
+        self._http.close()
+
+    def _send(self, path: str, payload: dict, stream: bool = False) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                resp = self._http.send(self._http.build_request("POST", path, json=payload), stream=stream)
+                if resp.status_code < 400:
+                    return resp
+                resp.read()
+                resp.close()
+                raise _error(path, resp)
+            except (BrainstormAPIError, *_NOT_SENT) as exc:
+                time.sleep(self._retry(path, attempt, exc))
+                attempt += 1
+
+    def brainstorm(
+        self, prompt: str, *, max_ideas: int = 5, temperature: float = 0.8, mode: str = "untimed",
+        personality: Optional[str] = None, session_id: Optional[str] = None, dedupe: bool = True,
+    ) -> BrainstormResult:
+        """One brainstorm round (POST /brainstorm)."""
+        payload = _brainstorm_payload(prompt, max_ideas, temperature, mode, personality, session_id, dedupe)
+        return BrainstormResult.from_dict(self._send("/brainstorm", payload).json())
+
+    def stream_brainstorm(
+        self, prompt: str, *, max_ideas: int = 5, temperature: float = 0.8, mode: str = "untimed",
+        personality: Optional[str] = None, session_id: Optional[str] = None, dedupe: bool = True,
+    ) -> Iterator[StreamFrame]:
+        """Yield the round's BrainstormMeta, then each Idea as it arrives (POST /brainstorm/stream).
+
+        Stopping early closes the response, and the server stops generating.
+        """
+        payload = _brainstorm_payload(prompt, max_ideas, temperature, mode, personality, session_id, dedupe)
+        resp = self._send("/brainstorm/stream", payload, stream=True)
+        try:
+            for line in resp.iter_lines():
+                if line.strip():
+                    frame = _frame("/brainstorm/stream", line)
+                    if frame is None:
+                        return
+                    yield frame
+            raise BrainstormAPIError("/brainstorm/stream: stream ended before the round was done")
+        finally:
+            resp.close()
+
+    def ask_about_idea(
+        self, question: str, idea_text: str, *, topic: Optional[str] = None,
+        context: Optional[str] = None, session_id: Optional[str] = None,
+    ) -> IdeaAnswer:
+        """Answer a question about one idea (POST /ask-about-idea)."""
+        payload = _drop_none(question=question, idea_text=idea_text, topic=topic, context=context, session_id=session_id)
+        return IdeaAnswer.from_dict(self._send("/ask-about-idea", payload).json())
+
+    def conversation(
+        self, message: str, *, session_id: Optional[str] = None,
+        history: Optional[List[dict]] = None, context: Optional[str] = None,
+    ) -> ConversationReply:
+        """Reply to one message (POST /conversation); with `session_id` the server keeps the history."""
+        payload = _drop_none(message=message, session_id=session_id, conversation_history=history, context=context)
+        return ConversationReply.from_dict(self._send("/conversation", payload).json())
+
+
+class AsyncBrainstormClient(_ClientBase):
+    """asyncio twin of BrainstormClient; create and close it on the loop that uses it."""
+
+    def __init__(self, base_url: str = BRAINSTORM_API_URL, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self._http = httpx.AsyncClient(**self._http_options)
+
+    async def __aenter__(self) -> "AsyncBrainstormClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Release pooled connections."""
+        await self._http.aclose()
+
+    async def _send(self, path: str, payload: dict, stream: bool = False) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                resp = await self._http.send(self._http.build_request("POST", path, json=payload), stream=stream)
+                if resp.status_code < 400:
+                    return resp
+                await resp.aread()
+                await resp.aclose()
+                raise _error(path, resp)
+            except (BrainstormAPIError, *_NOT_SENT) as exc:
+                await asyncio.sleep(self._retry(path, attempt, exc))
+                attempt += 1
+
+    async def brainstorm(
+        self, prompt: str, *, max_ideas: int = 5, temperature: float = 0.8, mode: str = "untimed",
+        personality: Optional[str] = None, session_id: Optional[str] = None, dedupe: bool = True,
+    ) -> BrainstormResult:
+        """One brainstorm round (POST /brainstorm)."""
+        payload = _brainstorm_payload(prompt, max_ideas, temperature, mode, personality, session_id, dedupe)
+        return BrainstormResult.from_dict((await self._send("/brainstorm", payload)).json())
+
+    async def stream_brainstorm(
+        self, prompt: str, *, max_ideas: int = 5, temperature: float = 0.8, mode: str = "untimed",
+        personality: Optional[str] = None, session_id: Optional[str] = None, dedupe: bool = True,
+    ) -> AsyncIterator[StreamFrame]:
+        """Yield the round's BrainstormMeta, then each Idea as it arrives (POST /brainstorm/stream)."""
+        payload = _brainstorm_payload(prompt, max_ideas, temperature, mode, personality, session_id, dedupe)
+        resp = await self._send("/brainstorm/stream", payload, stream=True)
+        try:
+            async for line in resp.aiter_lines():
+                if line.strip():
+                    frame = _frame("/brainstorm/stream", line)
+                    if frame is None:
+                        return
+                    yield frame
+            raise BrainstormAPIError("/brainstorm/stream: stream ended before the round was done")
+        finally:
+            await resp.aclose()
+
+    async def ask_about_idea(
+        self, question: str, idea_text: str, *, topic: Optional[str] = None,
+        context: Optional[str] = None, session_id: Optional[str] = None,
+    ) -> IdeaAnswer:
+        """Answer a question about one idea (POST /ask-about-idea)."""
+        payload = _drop_none(question=question, idea_text=idea_text, topic=topic, context=context, session_id=session_id)
+        return IdeaAnswer.from_dict((await self._send("/ask-about-idea", payload)).json())
+
+    async def conversation(
+        self, message: str, *, session_id: Optional[str] = None,
+        history: Optional[List[dict]] = None, context: Optional[str] = None,
+    ) -> ConversationReply:
+        """Reply to one message (POST /conversation); with `session_id` the server keeps the history."""
+        payload = _drop_none(message=message, session_id=session_id, conversation_history=history, context=context)
+        return ConversationReply.from_dict((await self._send("/conversation", payload)).json())
@@ -0,0 +1,89 @@
+"""
+Typed results of the AI Brainstorming Agent API.
+
+Frozen dataclasses mirroring the backend's response models. They are plain
+picklable values, so Streamlit's `st.cache_data` can store them as-is.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Idea:
+    text: str
+    novelty: float
+    sentiment: float
+    duplicate_of: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Idea":
+        return cls(
+            text=data["text"],
+            novelty=data.get("novelty", 0.0),
+            sentiment=data.get("sentiment", 0.5),
+            duplicate_of=data.get("duplicate_of"),
+        )
+
+
+@dataclass(frozen=True)
+class BrainstormMeta:
+    """First frame of a streamed round: the technique and when the round ends."""
+
+    chosen_technique: Optional[str] = None
+    technique_description: Optional[str] = None
+    phase_end_at: Optional[str] = None
+    mode: str = "untimed"
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BrainstormMeta":
+        return cls(
+            chosen_technique=data.get("chosen_technique"),
+            technique_description=data.get("technique_description"),
+            phase_end_at=data.get("phase_end_at"),
+            mode=data.get("mode", "untimed"),
+        )
+
+
+@dataclass(frozen=True)
+class BrainstormResult:
+    ideas: Tuple[Idea, ...]
+    meta: BrainstormMeta
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BrainstormResult":
+        return cls(
+            ideas=tuple(Idea.from_dict(idea) for idea in data.get("ideas", [])),
+            meta=BrainstormMeta.from_dict(data),
+        )
+
+
+@dataclass(frozen=True)
+class IdeaAnswer:
+    answer: str
+    suggested_followups: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IdeaAnswer":
+        return cls(answer=data["answer"], suggested_followups=tuple(data.get("suggested_followups") or ()))
+
+
+@dataclass(frozen=True)
+class ConversationReply:
+    response: str
+    extracted_topic: Optional[str] = None
+    extracted_name: Optional[str] = None
+    should_proceed: bool = False
+    suggested_questions: Tuple[str, ...] = ()
+    session_id: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConversationReply":
+        return cls(
+            response=data["response"],
+            extracted_topic=data.get("extracted_topic"),
+            extracted_name=data.get("extracted_name"),
+            should_proceed=data.get("should_proceed", False),
+            suggested_questions=tuple(data.get("suggested_questions") or ()),
+            session_id=data.get("session_id"),
+        )
@@ -12,6 +12,7 @@ function App() {
   const [isLoading, setIsLoading] = useState(true)
   const [session, setSession] = useState({
     step: 'welcome', // welcome, warmup, ideaburst, organize, wrapup
+    sessionId: crypto.randomUUID(), // server-side event log for export
     userName: '',
     userUnique: '',
     topic: '',
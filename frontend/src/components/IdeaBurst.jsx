@@ -92,7 +92,8 @@ const IdeaBurst = ({ session, updateSession, goToStep }) => {
           max_ideas: 8,
           temperature: 0.8,
           mode: mode,
-          personality: personality
+          personality: personality,
+          session_id: session.sessionId
         })
         if (response.data && response.data.ideas) {
           const formattedIdeas = response.data.ideas.map((idea, index) => ({
@@ -5,9 +5,9 @@ import './OrganizeExport.css'
 
 const OrganizeExport = ({ session, updateSession, goToStep }) => {
   const [viewMode, setViewMode] = useState(session.viewMode || 'mindmap')
+  const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || 'http://localhost:8000'
 
   const handleExport = (format) => {
-    // Placeholder for export functionality
     const data = {
       topic: session.topic,
       userName: session.userName,
@@ -24,9 +24,12 @@ const OrganizeExport = ({ session, updateSession, goToStep }) => {
       a.download = `brainstorm-${session.topic.replace(/\s+/g, '-')}-${Date.now()}.json`
       a.click()
       URL.revokeObjectURL(url)
-    } else if (format === 'pdf') {
-      // Placeholder for PDF export
-      alert('PDF export coming soon!')
+    } else {
+      // Markdown and PDF are rendered and streamed by the backend from the
+      // session's event log, so large sessions don't freeze the tab
+      const a = document.createElement('a')
+      a.href = `${BACKEND_URL}/sessions/${encodeURIComponent(session.sessionId)}/export?format=${format}`
+      a.click()
     }
   }
 
@@ -193,6 +196,12 @@ const OrganizeExport = ({ session, updateSession, goToStep }) => {
           >
             <FiDownload /> Export as PDF
           </button>
+          <button
+            className="export-button"
+            onClick={() => handleExport('markdown')}
+          >
+            <FiDownload /> Export as Markdown
+          </button>
         </div>
       </div>
 
@@ -3,6 +3,7 @@ import { motion, AnimatePresence } from 'framer-motion'
 import { FaMicrophone, FaMicrophoneSlash, FaVolumeUp, FaTimes, FaRobot } from 'react-icons/fa'
 import { FiSend, FiSkipForward, FiX } from 'react-icons/fi'
 import voiceService from '../services/voiceService'
+import conversationSocket from '../services/conversationSocket'
 import axios from 'axios'
 import './VoiceConversation.css'
 
@@ -42,6 +43,21 @@ const VoiceConversation = ({ onComplete, onSkip }) => {
     setTimeout(startConversation, 500)
   }, [])
 
+  useEffect(() => {
+    // Stream transcripts over the realtime socket; falls back to HTTP if it can't connect
+    conversationSocket.onDraft = (draft) => {
+      if (draft.extracted_name) setExtractedName(draft.extracted_name)
+      if (draft.extracted_topic) setExtractedTopic(draft.extracted_topic)
+    }
+    conversationSocket.connect().catch((error) => {
+      console.warn('Realtime conversation unavailable, using HTTP:', error)
+    })
+    return () => {
+      conversationSocket.onDraft = null
+      conversationSocket.close()
+    }
+  }, [])
+
   useEffect(() => {
     scrollToBottom()
   }, [messages])
@@ -68,6 +84,10 @@ const VoiceConversation = ({ onComplete, onSkip }) => {
         console.error('Voice recognition error:', error)
         setIsListening(false)
         // Don't show alert, just allow user to try again or type
+      },
+      (partialTranscript) => {
+        setInputText(partialTranscript)
+        conversationSocket.sendPartial(partialTranscript)
       }
     )
   }
@@ -131,59 +151,37 @@ const VoiceConversation = ({ onComplete, onSkip }) => {
     extractInformation(userMessage)
 
     try {
-      // Call backend to get response (we'll use the ask-about-idea endpoint or create a new one)
-      // For now, let's create a conversational response
-      const response = await generateConversationalResponse(userMessage, messages)
+      const data = await generateConversationalResponse(userMessage, messages)
       
       // Add assistant message
       const assistantMsg = {
         id: Date.now() + 1,
         type: 'assistant',
-        text: response,
+        text: data.response,
         timestamp: new Date()
       }
       setMessages(prev => [...prev, assistantMsg])
 
       // Speak the response
-      await voiceService.speak(response)
+      await voiceService.speak(data.response)
       
       // Check if we have enough information to proceed
-      // Try to get response from backend which includes should_proceed flag
-      try {
-        const backendResponse = await axios.post(`${BACKEND_URL}/conversation`, {
-          message: userMessage,
-          conversation_history: messages.map(msg => ({
-            type: msg.type,
-            text: msg.text
-          }))
-        })
-        
-        if (backendResponse.data.should_proceed && backendResponse.data.extracted_topic) {
-          setExtractedTopic(backendResponse.data.extracted_topic)
-          // Offer to proceed to brainstorming
-          const proceedMessage = {
-            id: Date.now() + 2,
-            type: 'assistant',
-            text: `Great! Based on our conversation, I understand you want to brainstorm about "${backendResponse.data.extracted_topic}". Would you like to proceed to generate some creative ideas?`,
-            timestamp: new Date(),
-            isActionMessage: true
-          }
-          setMessages(prev => [...prev, proceedMessage])
-          await voiceService.speak(proceedMessage.text)
-        }
-      } catch (error) {
-        // Fallback: check locally
-        if (extractedTopic && extractedTopic.length > 10 && messages.length >= 4) {
-          const proceedMessage = {
-            id: Date.now() + 2,
-            type: 'assistant',
-            text: `Great! Based on our conversation, I understand you want to brainstorm about "${extractedTopic}". Would you like to proceed to generate some creative ideas?`,
-            timestamp: new Date(),
-            isActionMessage: true
-          }
-          setMessages(prev => [...prev, proceedMessage])
-          await voiceService.speak(proceedMessage.text)
+      const topic = data.local ? extractedTopic : data.extracted_topic
+      const canProceed = data.local
+        ? extractedTopic && extractedTopic.length > 10 && messages.length >= 4
+        : data.should_proceed && data.extracted_topic
+      if (canProceed) {
+        setExtractedTopic(topic)
+        // Offer to proceed to brainstorming
+        const proceedMessage = {
+          id: Date.now() + 2,
+          type: 'assistant',
+          text: `Great! Based on our conversation, I understand you want to brainstorm about "${topic}". Would you like to proceed to generate some creative ideas?`,
+          timestamp: new Date(),
+          isActionMessage: true
         }
+        setMessages(prev => [...prev, proceedMessage])
+        await voiceService.speak(proceedMessage.text)
       }
     } catch (error) {
       console.error('Error generating response:', error)
@@ -201,18 +199,23 @@ const VoiceConversation = ({ onComplete, onSkip }) => {
   }
 
   const generateConversationalResponse = async (userMessage, conversationHistory) => {
-    // Try to use backend if available
+    // One request per turn: the realtime socket if open, else HTTP, else a local reply
     try {
-      const response = await axios.post(`${BACKEND_URL}/conversation`, {
-        message: userMessage,
-        conversation_history: conversationHistory.map(msg => ({
-          type: msg.type,
-          text: msg.text
-        })),
-        context: 'voice_conversation'
-      })
-      
-      const data = response.data
+      let data
+      if (conversationSocket.isOpen()) {
+        data = await conversationSocket.finish(userMessage)
+      } else {
+        const response = await axios.post(`${BACKEND_URL}/conversation`, {
+          message: userMessage,
+          conversation_history: conversationHistory.map(msg => ({
+            type: msg.type,
+            text: msg.text
+          })),
+          context: 'voice_conversation',
+          session_id: conversationSocket.sessionId || undefined
+        })
+        data = response.data
+      }
       
       // Update extracted information
       if (data.extracted_topic && !extractedTopic) {
@@ -222,11 +225,11 @@ const VoiceConversation = ({ onComplete, onSkip }) => {
         setExtractedName(data.extracted_name)
       }
       
-      return data.response
+      return data
     } catch (error) {
       console.error('Error getting conversational response:', error)
       // Fallback to local response generation
-      return generateLocalResponse(userMessage, conversationHistory)
+      return { response: generateLocalResponse(userMessage, conversationHistory), local: true }
     }
   }
 
@@ -0,0 +1,92 @@
+/**
+ * Realtime conversation socket
+ * Streams partial transcripts to /ws/conversation and receives drafts and replies
+ */
+
+const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || 'http://localhost:8000'
+
+class ConversationSocket {
+  constructor() {
+    this.socket = null
+    this.sessionId = null
+    this.onDraft = null
+    this.pendingReply = null
+    this.lastPartial = ''
+  }
+
+  /**
+   * Open the socket; resolves with the session id once the server is ready
+   */
+  connect(sessionId = null) {
+    if (this.socket && this.socket.readyState <= WebSocket.OPEN) {
+      return this.ready
+    }
+    const url = new URL('/ws/conversation', BACKEND_URL.replace(/^http/, 'ws'))
+    if (sessionId || this.sessionId) {
+      url.searchParams.set('session_id', sessionId || this.sessionId)
+    }
+    this.socket = new WebSocket(url)
+    this.ready = new Promise((resolve, reject) => {
+      this.socket.onmessage = (event) => {
+        const frame = JSON.parse(event.data)
+        if (frame.type === 'ready') {
+          this.sessionId = frame.session_id
+          resolve(frame.session_id)
+        } else if (frame.type === 'draft') {
+          this.onDraft?.(frame)
+        } else if (frame.type === 'reply' || frame.type === 'error') {
+          const pending = this.pendingReply
+          this.pendingReply = null
+          if (frame.type === 'reply') {
+            pending?.resolve(frame)
+          } else {
+            pending?.reject(new Error(frame.detail))
+          }
+        }
+      }
+      this.socket.onerror = () => reject(new Error('Conversation socket error'))
+      this.socket.onclose = () => {
+        this.pendingReply?.reject(new Error('Conversation socket closed'))
+        this.pendingReply = null
+        this.socket = null
+      }
+    })
+    return this.ready
+  }
+
+  isOpen() {
+    return !!this.socket && this.socket.readyState === WebSocket.OPEN
+  }
+
+  /**
+   * Send the utterance so far (the whole transcript, not just the new words)
+   */
+  sendPartial(text) {
+    if (this.isOpen() && text !== this.lastPartial) {
+      this.lastPartial = text
+      this.socket.send(JSON.stringify({ type: 'partial', text }))
+    }
+  }
+
+  /**
+   * Finish the utterance; resolves with the reply (same fields as POST /conversation)
+   */
+  finish(text) {
+    if (!this.isOpen()) {
+      return Promise.reject(new Error('Conversation socket is not open'))
+    }
+    this.lastPartial = ''
+    return new Promise((resolve, reject) => {
+      this.pendingReply = { resolve, reject }
+      this.socket.send(JSON.stringify({ type: 'final', text }))
+    })
+  }
+
+  close() {
+    this.socket?.close()
+    this.socket = null
+  }
+}
+
+// Export singleton instance
+export default new ConversationSocket()
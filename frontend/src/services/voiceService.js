@@ -140,8 +140,9 @@ class VoiceService {
 
   /**
    * Start speech recognition
+   * onPartial (optional) receives the utterance so far while the user is still speaking
    */
-  async startListening(onResult, onError) {
+  async startListening(onResult, onError, onPartial = null) {
     if (!this.recognition) {
       onError(new Error('Speech recognition not supported in this browser'))
       return
@@ -151,9 +152,14 @@ class VoiceService {
       this.stopListening()
     }
 
+    this.recognition.interimResults = !!onPartial
     this.recognition.onresult = (event) => {
-      const transcript = event.results[0][0].transcript
-      onResult(transcript)
+      const transcript = Array.from(event.results, (result) => result[0].transcript).join('')
+      if (event.results[event.results.length - 1].isFinal) {
+        onResult(transcript)
+      } else {
+        onPartial?.(transcript)
+      }
     }
 
     this.recognition.onerror = (event) => {
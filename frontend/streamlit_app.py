@@ -1,6 +1,8 @@
+import uuid
+
 import streamlit as st
-import requests
-import json
+
+from brainstorm_client import BrainstormAPIError, BrainstormClient, BrainstormMeta, IdeaAnswer
 
 st.set_page_config(page_title="AI Brainstorming Agent", layout="centered")
 
@@ -8,13 +10,70 @@ st.title("💡 AI Brainstorming Agent")
 st.caption("Don't follow trends. Follow the spark.")
 
 backend_url = st.secrets.get("backend_url", "http://localhost:8000")
+PERSONALITIES = ["auto", "balanced", "high_energy", "analytical", "contrarian", "empathetic"]
+
+
+@st.cache_resource
+def get_client(url: str) -> BrainstormClient:
+    """One pooled client per backend, shared by every rerun and browser session."""
+    # No client id: the server then rate-limits each browser by its session_id.
+    return BrainstormClient(url)
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def ask_about_idea(url: str, question: str, idea_text: str, topic: str) -> IdeaAnswer:
+    # Same question about the same idea: served from here without a request.
+    return get_client(url).ask_about_idea(question, idea_text, topic=topic)
+
+
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 user_input = st.text_area("What are we brainstorming today?")
+col1, col2 = st.columns(2)
+personality = col1.selectbox("Personality", PERSONALITIES)
+max_ideas = col2.slider("Ideas", 1, 20, 5)
 
-if st.button("Generate Ideas"):
+if st.button("Generate Ideas") and user_input.strip():
+    # Streamed into the page as they arrive; kept in session_state so reruns
+    # (asking about an idea, moving a slider) don't generate the round again.
+    st.session_state.round = {"prompt": user_input, "meta": None, "ideas": []}
     with st.spinner("Generating ideas..."):
-        payload = {"user_prompt": user_input}
-        response = requests.post(f"{backend_url}/generate", json=payload)
-        data = response.json()
-        st.success("Here’s what the AI suggests:")
-        st.write(data.get("response", "No response"))
+        live = st.empty()
+        try:
+            for frame in get_client(backend_url).stream_brainstorm(
+                user_input,
+                max_ideas=max_ideas,
+                personality=None if personality == "auto" else personality,
+                session_id=st.session_state.session_id,
+            ):
+                if isinstance(frame, BrainstormMeta):
+                    st.session_state.round["meta"] = frame
+                else:
+                    st.session_state.round["ideas"].append(frame)
+                    live.markdown("\n".join(f"- {idea.text}" for idea in st.session_state.round["ideas"]))
+        except BrainstormAPIError as exc:
+            st.error(f"The backend couldn't generate ideas: {exc}")
+        live.empty()
+
+current = st.session_state.get("round")
+if current and current["ideas"]:
+    meta = current["meta"]
+    st.success("Here’s what the AI suggests:")
+    if meta and meta.chosen_technique:
+        st.caption(f"Technique: {meta.chosen_technique} — {meta.technique_description}")
+    for idea in current["ideas"]:
+        st.markdown(f"- {idea.text}  \n  _novelty {idea.novelty:.2f} · sentiment {idea.sentiment:.2f}_")
+
+    st.subheader("Dig into an idea")
+    chosen = st.selectbox("Idea", [idea.text for idea in current["ideas"]])
+    question = st.text_input("Question", "How would we implement this?")
+    if st.button("Ask") and question.strip():
+        try:
+            answer = ask_about_idea(backend_url, question, chosen, current["prompt"])
+        except BrainstormAPIError as exc:
+            st.error(f"The backend couldn't answer: {exc}")
+        else:
+            st.write(answer.answer)
+            for followup in answer.suggested_followups:
+                st.caption(f"• {followup}")
@@ -2,9 +2,20 @@
 """
 AI Brainstorming Agent - Quick Start Script
 Cross-platform startup script for both backend and frontend services
+
+    python start_system.py                 # dev: backend with --reload + frontend
+    python start_system.py --prod          # backend only, one worker per CPU
+    python start_system.py --prod --workers 4 --port 8080
+
+Production mode runs gunicorn with preloaded Uvicorn workers
+(backend/gunicorn_conf.py), or plain `uvicorn --workers` where gunicorn is
+unavailable (Windows). SIGTERM and Ctrl+C drain gracefully: in-flight
+requests, including streamed ones, get GRACEFUL_TIMEOUT_SEC to finish.
 """
 
+import argparse
 import os
+import signal
 import sys
 import subprocess
 import time
@@ -12,6 +23,8 @@ import webbrowser
 import shutil
 from pathlib import Path
 
+GRACEFUL_TIMEOUT_SEC = int(os.getenv("GRACEFUL_TIMEOUT_SEC", "30"))
+
 def print_header():
     print("=" * 50)
     print("AI Brainstorming Agent - Quick Start")
@@ -108,6 +121,106 @@ def start_backend():
 
     return backend_process
 
+def venv_python():
+    """Python interpreter inside the backend virtual environment."""
+    # Absolute, since the server is started with backend/ as its cwd.
+    venv_dir = (Path("backend") / "venv").absolute()
+    if sys.platform == "win32":
+        return str(venv_dir / "Scripts" / "python.exe")
+    return str(venv_dir / "bin" / "python")
+
+def start_backend_prod(host, port, workers):
+    """Start the backend for production: preloaded multi-worker server"""
+    backend_dir = Path("backend")
+    python_cmd = venv_python()
+    has_gunicorn = sys.platform != "win32" and subprocess.run(
+        [python_cmd, "-c", "import gunicorn, uvicorn_worker"], capture_output=True
+    ).returncode == 0
+    env = {
+        **os.environ,
+        "HOST": host,
+        "PORT": str(port),
+        "GRACEFUL_TIMEOUT_SEC": str(GRACEFUL_TIMEOUT_SEC),
+    }
+    if workers:
+        env["WEB_CONCURRENCY"] = str(workers)
+
+    if has_gunicorn:
+        command = [python_cmd, "-m", "gunicorn", "-c", "gunicorn_conf.py", "main:app"]
+    else:
+        if not workers:
+            sys.path.insert(0, str(backend_dir))
+            from gunicorn_conf import available_cpus
+            workers = available_cpus()
+        command = [
+            python_cmd, "-m", "uvicorn", "main:app",
+            "--host", host, "--port", str(port), "--workers", str(workers),
+            "--timeout-graceful-shutdown", str(GRACEFUL_TIMEOUT_SEC),
+        ]
+    print(f"[*] Starting backend ({'gunicorn' if has_gunicorn else 'uvicorn'}, "
+          f"{env.get('WEB_CONCURRENCY') or workers or 'one per CPU'} workers) on http://{host}:{port}")
+
+    # Own process group: Ctrl+C reaches only this script, which then asks the
+    # server for a graceful drain instead of the server's fast shutdown.
+    if sys.platform == "win32":
+        return subprocess.Popen(command, cwd=str(backend_dir), env=env,
+                                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+    return subprocess.Popen(command, cwd=str(backend_dir), env=env, start_new_session=True)
+
+def wait_ready(port, timeout=60):
+    """Poll /ready until a warmed-up worker answers (workers only accept once warm)"""
+    import urllib.request
+    import urllib.error
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=2) as resp:
+                if resp.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.5)
+    return False
+
+def drain(process):
+    """Ask the server to finish in-flight requests, then stop it"""
+    if process.poll() is not None:
+        return process.returncode
+    print(f"[*] Draining backend (up to {GRACEFUL_TIMEOUT_SEC}s)...")
+    process.send_signal(signal.CTRL_BREAK_EVENT if sys.platform == "win32" else signal.SIGTERM)
+    try:
+        return process.wait(timeout=GRACEFUL_TIMEOUT_SEC + 5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        return process.wait()
+
+def run_prod(args):
+    """Production mode: backend only, stays in the foreground until stopped"""
+    python_found = check_command("python", "Python") or check_command("python3", "Python")
+    if not python_found:
+        print("[ERROR] Python is not installed or not in PATH")
+        sys.exit(1)
+    setup_backend()
+    backend_process = start_backend_prod(args.host, args.port, args.workers)
+
+    stopping = []
+    def request_stop(signum, frame):
+        stopping.append(signum)
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    if wait_ready(args.port):
+        print(f"[✓] Backend ready: http://{args.host}:{args.port}/ready")
+    else:
+        print("[!] Backend did not report ready yet; check its output above")
+
+    while not stopping and backend_process.poll() is None:
+        time.sleep(0.5)
+    code = drain(backend_process)
+    print("Backend stopped.")
+    sys.exit(code if code and code > 0 else 0)
+
 def start_frontend():
     """Start frontend server"""
     print("[*] Starting frontend server on http://localhost:5173")
@@ -128,10 +241,22 @@ def open_browser():
     time.sleep(2)  # Wait for servers to be ready
     webbrowser.open("http://localhost:5173")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Start the AI Brainstorming Agent")
+    parser.add_argument("--prod", action="store_true", help="production backend: multi-worker, warmed up, graceful drain")
+    parser.add_argument("--host", default="0.0.0.0", help="bind address in --prod mode")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")), help="backend port in --prod mode")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per available CPU)")
+    return parser.parse_args()
+
 def main():
     """Main execution flow"""
+    args = parse_args()
     print_header()
 
+    if args.prod:
+        run_prod(args)
+
     # Check prerequisites
     if not check_prerequisites():
         sys.exit(1)